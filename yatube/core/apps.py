@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import auth, sqlite  # noqa: F401
+        if settings.TEMPLATE_PROFILING:
+            from .profiling import install
+            install()
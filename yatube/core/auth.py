@@ -0,0 +1,71 @@
+"""Пользователь запроса из кеша, а не из базы.
+
+AuthenticationMiddleware на каждом запросе читает строку User по id из
+сессии. get_cached_user делает то же, что django.contrib.auth.get_user,
+но сначала ищет пользователя в кеше по ключу с его id. Запись в кеше
+удаляется при сохранении и удалении пользователя, так что смена
+пароля или блокировка видны сразу; проверка хеша сессии выполняется
+как обычно и разлогинивает старые сессии после смены пароля.
+
+Это верно только с общим для всех процессов кешем (SHARED_CACHE),
+поэтому CachedAuthenticationMiddleware включается лишь вместе с ним.
+QuerySet.update() сигналов не шлёт: после массового изменения
+пользователей их нужно убрать из кеша через forget_cached_users.
+"""
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 _get_user_session_key, get_user_model,
+                                 load_backend)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+USER_KEY: str = 'users:user:{}'
+
+
+def user_key(user_id) -> str:
+    return USER_KEY.format(user_id)
+
+
+def _load_user(backend_path: str, user_id):
+    key = user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TTL)
+    return user
+
+
+def get_cached_user(request):
+    user = None
+    try:
+        user_id = _get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        pass
+    else:
+        if backend_path in settings.AUTHENTICATION_BACKENDS:
+            user = _load_user(backend_path, user_id)
+            if hasattr(user, 'get_session_auth_hash'):
+                session_hash = request.session.get(HASH_SESSION_KEY)
+                if not (session_hash and constant_time_compare(
+                    session_hash, user.get_session_auth_hash()
+                )):
+                    request.session.flush()
+                    user = None
+    return user or AnonymousUser()
+
+
+def forget_cached_users(user_ids: Iterable) -> None:
+    cache.delete_many([user_key(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    cache.delete(user_key(instance.pk))
@@ -0,0 +1,140 @@
+"""Server-sent events и подписка на события внутри процесса.
+
+Брокер живёт в памяти процесса: событие, опубликованное в канал,
+получают все соединения этого процесса, подписанные на канал. При
+нескольких процессах каждый видит только свои публикации, поэтому
+клиент должен считать уведомления подсказкой, а не журналом.
+
+Подписка хранит не очередь сообщений, а один счётчик: сколько
+событий пришло с последней отправки клиенту. Память на соединение
+не растёт, как бы часто ни публиковались события и как бы медленно
+ни читал клиент.
+
+Каждое соединение занимает поток сервера, поэтому нужен
+многопоточный WSGI-сервер, а число соединений на процесс ограничено
+EVENTS_MAX_CONNECTIONS.
+"""
+import json
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+
+
+class Subscription:
+    """Счётчик событий, пришедших в каналы одного соединения."""
+
+    def __init__(self, broker: 'Broker', channels: Iterable[str]):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.pending = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def notify(self, count: int) -> None:
+        with self.condition:
+            self.pending += count
+            self.condition.notify()
+
+    def wait(self, timeout: float) -> int:
+        """Ждёт события не дольше timeout и сбрасывает счётчик."""
+        with self.condition:
+            if not self.pending:
+                self.condition.wait(timeout)
+            count, self.pending = self.pending, 0
+        return count
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._connections = 0
+
+    def subscribe(self, channels: Iterable[str]) -> Optional[Subscription]:
+        """Подписка на каналы или None, если соединений уже слишком много."""
+        subscription = Subscription(self, channels)
+        with self._lock:
+            if self._connections >= settings.EVENTS_MAX_CONNECTIONS:
+                return None
+            self._connections += 1
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._connections -= 1
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self._channels.pop(channel, None)
+
+    def publish(self, channel: str, count: int = 1) -> None:
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.notify(count)
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+
+def format_event(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class EventStream:
+    """Тело ответа text/event-stream для одной подписки.
+
+    Пока событий нет, раз в EVENTS_HEARTBEAT секунд уходит
+    комментарий: по нему прокси не закрывают соединение, а сервер
+    узнаёт об ушедшем клиенте. Через EVENTS_STREAM_LIFETIME секунд
+    поток заканчивается, и браузер переподключается сам, освобождая
+    поток сервера. close() вызывает сервер, даже если поток ещё не
+    читали, поэтому подписка снимается в любом случае.
+    """
+
+    def __init__(self, subscription: Subscription, event: str):
+        self.subscription = subscription
+        self.event = event
+
+    def __iter__(self) -> Iterator[str]:
+        yield f'retry: {settings.EVENTS_RETRY * 1000}\n\n'
+        deadline = time.monotonic() + settings.EVENTS_STREAM_LIFETIME
+        while time.monotonic() < deadline:
+            count = self.subscription.wait(settings.EVENTS_HEARTBEAT)
+            if count:
+                yield format_event(self.event, {'count': count})
+            else:
+                yield ': heartbeat\n\n'
+
+    def close(self) -> None:
+        self.subscription.close()
+
+
+def event_stream_response(broker: Broker, channels: Iterable[str],
+                          event: str) -> HttpResponse:
+    """Поток событий event из каналов channels."""
+    subscription = broker.subscribe(channels)
+    if subscription is None:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = str(settings.EVENTS_RETRY)
+        return response
+    response = StreamingHttpResponse(
+        EventStream(subscription, event), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен копить поток в буфере
+    response['X-Accel-Buffering'] = 'no'
+    return response
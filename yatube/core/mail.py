@@ -0,0 +1,74 @@
+"""Почтовый бэкенд, который держит одно соединение на много писем.
+
+Обычный бэкенд открывает соединение на каждый вызов send_mail.
+PooledEmailBackend открывает соединение нижележащего бэкенда
+(EMAIL_POOL_BACKEND: SMTP, файловый или любой другой) один раз и
+отправляет через него все письма, пока его не закроют. После
+EMAIL_POOL_MAX_MESSAGES писем соединение открывается заново: многие
+SMTP-серверы ограничивают число писем на соединение. Письма уходят
+по одному, поэтому если сервер оборвал соединение, через новое
+отправляется только письмо, на котором оно оборвалось, а не вся порция.
+"""
+from smtplib import SMTPServerDisconnected
+from typing import List
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+
+class PooledEmailBackend(BaseEmailBackend):
+    def __init__(self, backend: str = None, max_messages: int = None,
+                 fail_silently: bool = False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.connection = get_connection(
+            backend or settings.EMAIL_POOL_BACKEND,
+            fail_silently=fail_silently,
+            **kwargs
+        )
+        self.max_messages = max_messages or settings.EMAIL_POOL_MAX_MESSAGES
+        self.is_open = False
+        self.sent_on_connection = 0
+        # сколько раз открывалось соединение, для статистики
+        self.connections = 0
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.connection.open()
+        self.is_open = True
+        self.sent_on_connection = 0
+        self.connections += 1
+        return True
+
+    def close(self):
+        if not self.is_open:
+            return
+        try:
+            self.connection.close()
+        finally:
+            self.is_open = False
+
+    def _send(self, messages: List) -> int:
+        sent = 0
+        for message in messages:
+            try:
+                sent += self.connection.send_messages([message]) or 0
+            except SMTPServerDisconnected:
+                self.close()
+                self.open()
+                sent += self.connection.send_messages([message]) or 0
+            self.sent_on_connection += 1
+        return sent
+
+    def send_messages(self, email_messages):
+        messages = list(email_messages)
+        sent = 0
+        while messages:
+            if self.sent_on_connection >= self.max_messages:
+                self.close()
+            self.open()
+            size = self.max_messages - self.sent_on_connection
+            portion, messages = messages[:size], messages[size:]
+            sent += self._send(portion)
+        return sent
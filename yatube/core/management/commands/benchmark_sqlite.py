@@ -0,0 +1,123 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import apply_pragmas
+
+SCHEMA: str = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, text TEXT NOT NULL, pub_date REAL NOT NULL)'
+)
+READ_SQL: str = 'SELECT id, text, pub_date FROM post ORDER BY id DESC LIMIT 10'
+WRITE_SQL: str = 'INSERT INTO post (text, pub_date) VALUES (?, ?)'
+
+
+def prepare(path: str, rows: int, pragmas: dict) -> None:
+    connection = sqlite3.connect(path)
+    try:
+        apply_pragmas(connection, pragmas)
+        connection.execute(SCHEMA)
+        connection.executemany(
+            WRITE_SQL, (('x' * 200, time.time()) for _ in range(rows))
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class Worker(threading.Thread):
+    """Смешанная нагрузка: доля write_ratio операций — вставки."""
+
+    def __init__(self, path: str, pragmas: dict, persistent: bool,
+                 write_ratio: float, deadline: float):
+        super().__init__()
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.write_ratio = write_ratio
+        self.deadline = deadline
+        self.reads = self.writes = self.locked = 0
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        apply_pragmas(connection, self.pragmas)
+        return connection
+
+    def operation(self, connection) -> None:
+        try:
+            if random.random() < self.write_ratio:
+                connection.execute(WRITE_SQL, ('x' * 200, time.time()))
+                connection.commit()
+                self.writes += 1
+            else:
+                connection.execute(READ_SQL).fetchall()
+                self.reads += 1
+        except sqlite3.OperationalError:
+            connection.rollback()
+            self.locked += 1
+
+    def run(self):
+        connection = self.connect() if self.persistent else None
+        while time.monotonic() < self.deadline:
+            if self.persistent:
+                self.operation(connection)
+                continue
+            # как раньше: своё соединение на каждый запрос
+            connection = self.connect()
+            self.operation(connection)
+            connection.close()
+        if self.persistent:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при смешанных чтениях '
+        'и записях: журнал по умолчанию с соединением на операцию '
+        'против SQLITE_PRAGMAS и постоянных соединений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        modes = (
+            ('до', {}, False),
+            ('после', settings.SQLITE_PRAGMAS, True),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for number, (title, pragmas, persistent) in enumerate(modes):
+                path = os.path.join(directory, f'bench{number}.sqlite3')
+                prepare(path, options['rows'], pragmas)
+                deadline = time.monotonic() + options['duration']
+                workers = [
+                    Worker(
+                        path, pragmas, persistent,
+                        options['write_ratio'], deadline
+                    )
+                    for _ in range(options['threads'])
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                self.report(title, workers, options['duration'])
+
+    def report(self, title: str, workers, duration: float) -> None:
+        reads = sum(worker.reads for worker in workers)
+        writes = sum(worker.writes for worker in workers)
+        locked = sum(worker.locked for worker in workers)
+        self.stdout.write(
+            f'{title}: чтений {reads / duration:.0f}/с, '
+            f'записей {writes / duration:.0f}/с, '
+            f'ошибок блокировки {locked}'
+        )
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.replicas import sync_replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу в реплики для чтения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Обновлять реплики каждые REPLICA_SYNC_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = sync_replicas()
+            self.stdout.write(f'Обновлено реплик: {count}')
+            if not options['loop']:
+                return
+            time.sleep(settings.REPLICA_SYNC_INTERVAL)
@@ -0,0 +1,235 @@
+import gzip
+import mimetypes
+import os
+import re
+import zlib
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.functional import SimpleLazyObject
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .auth import get_cached_user
+from .replicas import allow_replica_reads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# имя с хешем от ManifestStaticFilesStorage: bootstrap.min.0123456789ab.css
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+ENCODINGS: tuple = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE: str = 'public, max-age=31536000, immutable'
+SAFE_METHODS: tuple = ('GET', 'HEAD', 'OPTIONS')
+
+
+def accepted_encodings(request) -> set:
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """Отдаёт файлы из STATIC_ROOT, не доходя до URL-диспетчера.
+
+    Если клиент принимает br или gzip и рядом с файлом лежит сжатая
+    копия от collectstatic, отдаётся она. FileResponse передаёт
+    открытый файл серверу, и тот может отправить его через sendfile.
+    Файлы с хешем в имени кешируются браузером навсегда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            settings.STATIC_ROOT
+            and request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(
+                request, request.path_info[len(settings.STATIC_URL):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name: str):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        accepted = accepted_encodings(request)
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size
+        ):
+            return HttpResponseNotModified()
+
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if HASHED_NAME_RE.search(name):
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
+
+
+def _gzip_stream(chunks, level: int):
+    # 16 + MAX_WBITS: заголовок и контрольная сумма gzip
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        # SYNC_FLUSH отправляет клиенту всё, что уже отрендерено
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks, quality: int):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы в br или gzip, смотря что принимает клиент.
+
+    Ответы меньше COMPRESSION_MIN_SIZE, уже сжатые и с типами из
+    COMPRESSION_SKIP_TYPES отдаются как есть. Потоковые ответы
+    сжимаются по частям, не дожидаясь конца рендеринга.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.should_compress(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request)
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        if response.has_header('ETag'):
+            # сжатое тело уже не совпадает с ETag исходного побайтно
+            response['ETag'] = re.sub(r'^(?!W/)', 'W/', response['ETag'])
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def should_compress(response) -> bool:
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(settings.COMPRESSION_SKIP_TYPES):
+            return False
+        if response.streaming:
+            # файлы отдаёт StaticFilesMiddleware, у них свои сжатые копии
+            return not isinstance(response, FileResponse)
+        return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    @staticmethod
+    def compress(content: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(
+                content, quality=settings.COMPRESSION_BROTLI_QUALITY
+            )
+        return gzip.compress(
+            content, settings.COMPRESSION_GZIP_LEVEL, mtime=0
+        )
+
+    @staticmethod
+    def compress_stream(chunks, encoding: str):
+        if encoding == 'br':
+            return _brotli_stream(
+                chunks, settings.COMPRESSION_BROTLI_QUALITY
+            )
+        return _gzip_stream(chunks, settings.COMPRESSION_GZIP_LEVEL)
+
+
+class ReplicaMiddleware:
+    """Разрешает читать с реплик безопасным запросам.
+
+    После POST и других изменяющих запросов клиент получает cookie
+    REPLICA_PIN_COOKIE на REPLICA_PIN_SECONDS секунд. Пока она жива,
+    его запросы читают основную базу и видят свои записи, даже если
+    реплики ещё не обновились.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+            return response
+        if settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            return self.get_response(request)
+        with allow_replica_reads():
+            return self.get_response(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
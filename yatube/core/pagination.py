@@ -0,0 +1,148 @@
+from typing import List, Optional
+
+from django.conf import settings
+
+
+def parse_cursor(value) -> Optional[int]:
+    """Превращает курсор из GET-параметра в число."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """Страница, которая выбирается по ключу, а не по номеру.
+
+    Запрос страницы не зависит от её глубины: база читает индекс
+    начиная с курсора и не считает общее количество записей.
+    """
+
+    def __init__(self, object_list, cursor=None, next_cursor=None,
+                 number=1):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        # номер нужен только для подписи в пагинаторе
+        self.number = number if cursor is not None else 1
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+def keyset_paginate(queryset, key, cursor, per_page, descending=False,
+                    number=None):
+    """Возвращает страницу queryset после значения cursor поля key."""
+    if cursor is not None:
+        lookup = f'{key}__lt' if descending else f'{key}__gt'
+        queryset = queryset.filter(**{lookup: cursor})
+    ordering = f'-{key}' if descending else key
+    # лишняя запись показывает, есть ли следующая страница
+    object_list = list(queryset.order_by(ordering)[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        next_cursor = getattr(object_list[-1], key)
+    return KeysetPage(object_list, cursor, next_cursor, number or 1)
+
+
+def page_window(number: int, num_pages: Optional[int],
+                size: int) -> List[Optional[int]]:
+    """Номера страниц вокруг текущей, None — многоточие.
+
+    Первая и последняя страницы видны всегда, поэтому ссылок не больше
+    2 * size + 5 при любом числе страниц. Без num_pages последней
+    страницей считается текущая.
+    """
+    last = num_pages or number
+    start = max(number - size, 1)
+    end = min(number + size, last)
+    pages = []
+    if start > 1:
+        pages.append(1)
+        if start > 2:
+            pages.append(None)
+    pages.extend(range(start, end + 1))
+    if end < last:
+        if end < last - 1:
+            pages.append(None)
+        pages.append(last)
+    return pages
+
+
+def _query_url(query, **params) -> str:
+    query = query.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return f'?{query.urlencode()}'
+
+
+def page_navigation(page, query, window: int = None) -> dict:
+    """Ссылки пагинатора для Page и для KeysetPage.
+
+    У страницы по номеру показывается окно номеров вокруг текущей.
+    У страницы по курсору адрес есть только у первой и следующей
+    страниц, поэтому окно вырождается в «1 … текущая». Если пагинатор
+    знает число записей лишь приблизительно (атрибут estimated),
+    номер последней страницы помечается как оценка.
+    """
+    window = settings.PAGINATION_WINDOW if window is None else window
+    if isinstance(page, KeysetPage):
+        number, num_pages, window = page.number, None, 0
+        estimated = False
+
+        def url(page_number):
+            return _query_url(query, after=None, page=None)
+
+        next_url = _query_url(
+            query, after=page.next_cursor, page=number + 1
+        ) if page.has_next() else None
+        previous_url = None
+    else:
+        number = page.number
+        num_pages = page.paginator.num_pages
+        estimated = getattr(page.paginator, 'estimated', False)
+
+        def url(page_number):
+            return _query_url(query, page=page_number)
+
+        next_url = (
+            url(page.next_page_number()) if page.has_next() else None
+        )
+        previous_url = (
+            url(page.previous_page_number()) if page.has_previous() else None
+        )
+
+    links = [
+        {
+            'number': page_number,
+            'url': url(page_number) if page_number else None,
+            'current': page_number == number,
+            'estimated': estimated and page_number == num_pages,
+        }
+        for page_number in page_window(number, num_pages, window)
+    ]
+    return {
+        'links': links,
+        'previous_url': previous_url,
+        'next_url': next_url,
+        'show': page.has_other_pages(),
+    }
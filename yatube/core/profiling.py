@@ -0,0 +1,81 @@
+"""Профилирование рендеринга шаблонов.
+
+При TEMPLATE_PROFILING в CoreConfig.ready оборачиваются рендеринг
+шаблона целиком, тега {% include %} и тега {% thumbnail %}. Время
+копится в памяти процесса и показывается на странице
+template_profile. Время включающее: в шаблон входят все его
+include, в include — всё, что рендерит подключённый шаблон.
+"""
+import functools
+import threading
+import time
+from typing import Callable, List
+
+from django.template.base import Template
+from django.template.loader_tags import IncludeNode
+from sorl.thumbnail.templatetags.thumbnail import ThumbnailNode
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def record(kind: str, name: str, elapsed: float) -> None:
+    with _lock:
+        count, total, slowest = _stats.get((kind, name), (0, 0.0, 0.0))
+        _stats[kind, name] = (
+            count + 1, total + elapsed, max(slowest, elapsed)
+        )
+
+
+def get_stats() -> List[dict]:
+    """Строки профиля, самые дорогие по суммарному времени сверху."""
+    with _lock:
+        items = list(_stats.items())
+    rows = [
+        {
+            'kind': kind,
+            'name': name,
+            'count': count,
+            'total_ms': total * 1000,
+            'average_ms': total * 1000 / count,
+            'max_ms': slowest * 1000,
+        }
+        for (kind, name), (count, total, slowest) in items
+    ]
+    return sorted(rows, key=lambda row: -row['total_ms'])
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def _timed(kind: str, get_name: Callable, render: Callable) -> Callable:
+    @functools.wraps(render)
+    def wrapper(self, context):
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            record(kind, get_name(self), time.perf_counter() - start)
+    wrapper.profiled = True
+    return wrapper
+
+
+def _template_name(template) -> str:
+    return template.origin.template_name or template.origin.name
+
+
+def install() -> None:
+    """Подменяет методы рендеринга; повторный вызов ничего не делает."""
+    if getattr(Template.render, 'profiled', False):
+        return
+    Template.render = _timed('template', _template_name, Template.render)
+    IncludeNode.render = _timed(
+        'include', lambda node: node.template.token, IncludeNode.render
+    )
+    ThumbnailNode.render = _timed(
+        'thumbnail',
+        lambda node: f'{node.file_.token} {node.geometry.token}',
+        ThumbnailNode.render
+    )
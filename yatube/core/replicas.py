@@ -0,0 +1,68 @@
+"""Реплики SQLite только для чтения.
+
+Реплика — копия файла основной базы, которую периодически обновляет
+команда sync_replicas через online backup API. Копия пишется во
+временный файл и подменяет реплику атомарно, поэтому открытое
+соединение дочитывает старую версию, а новое видит новую целиком.
+
+Читать с реплики разрешено только внутри запроса, который пропустил
+ReplicaMiddleware: GET-запрос без свежей записи от этого клиента.
+Команды, shell и тесты всегда работают с основной базой: им нужны
+только что записанные данные.
+"""
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def replica_reads_allowed() -> bool:
+    return getattr(_state, 'allowed', False)
+
+
+@contextlib.contextmanager
+def allow_replica_reads():
+    previous = replica_reads_allowed()
+    _state.allowed = True
+    try:
+        yield
+    finally:
+        _state.allowed = previous
+
+
+def database_path(alias: str) -> str:
+    """Путь к файлу базы; NAME может быть URI вида file:...?mode=ro."""
+    name = settings.DATABASES[alias]['NAME']
+    if name.startswith('file:'):
+        name = name[len('file:'):].partition('?')[0]
+    return name
+
+
+def sync_replica(source: str, target: str) -> None:
+    """Копирует базу source в файл target."""
+    directory = os.path.dirname(os.path.abspath(target))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.sqlite3')
+    os.close(fd)
+    try:
+        with contextlib.closing(sqlite3.connect(source)) as primary, \
+                contextlib.closing(sqlite3.connect(temp_path)) as replica:
+            primary.backup(replica)
+            # в режиме WAL реплику нельзя открыть только для чтения
+            replica.execute('PRAGMA journal_mode=DELETE')
+        os.replace(temp_path, target)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def sync_replicas() -> int:
+    """Обновляет все реплики из DATABASE_REPLICAS."""
+    source = database_path('default')
+    for alias in settings.DATABASE_REPLICAS:
+        sync_replica(source, database_path(alias))
+    return len(settings.DATABASE_REPLICAS)
@@ -0,0 +1,34 @@
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .replicas import replica_reads_allowed
+
+
+class ReplicaRouter:
+    """Чтение моделей из REPLICATED_APPS идёт на случайную реплику.
+
+    Запись, миграции и чтение внутри транзакции основной базы остаются
+    на основной базе: в транзакции нужно видеть свои же изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not settings.DATABASE_REPLICAS
+            or model._meta.app_label not in settings.REPLICATED_APPS
+            or not replica_reads_allowed()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # в репликах те же строки, что и в основной базе
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,62 @@
+"""Настройка соединений SQLite.
+
+Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS: WAL, чтобы
+читатели не ждали писателя, synchronous=NORMAL, отображение файла в
+память и увеличенный кеш страниц. Соединения живут CONN_MAX_AGE
+секунд, поэтому настройка выполняется не на каждый запрос.
+
+Долгоживущее соединение раз в SQLITE_OPTIMIZE_INTERVAL секунд
+выполняет PRAGMA optimize после запроса: SQLite обновляет статистику
+планировщика только для таблиц, где она устарела.
+"""
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# на реплике и в базе в памяти журнал и запись не настраиваются
+WRITE_PRAGMAS: tuple = ('journal_mode', 'synchronous')
+
+
+def apply_pragmas(cursor, pragmas: dict) -> None:
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PRAGMAS
+    if (
+        connection.alias in settings.DATABASE_REPLICAS
+        or connection.is_in_memory_db()
+    ):
+        pragmas = {
+            name: value for name, value in pragmas.items()
+            if name not in WRITE_PRAGMAS
+        }
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
+    connection.optimized_at = time.monotonic()
+
+
+@receiver(request_finished)
+def optimize_sqlite(sender, **kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if (
+            connection.vendor != 'sqlite'
+            or connection.connection is None
+            or connection.in_atomic_block
+        ):
+            continue
+        optimized_at = getattr(connection, 'optimized_at', now)
+        if now - optimized_at < settings.SQLITE_OPTIMIZE_INTERVAL:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA optimize')
+        connection.optimized_at = now
@@ -0,0 +1,212 @@
+"""Хранилище статики для collectstatic.
+
+Поверх ManifestStaticFilesStorage:
+
+* из файлов CSS, подходящих под STATIC_PURGE_PATTERNS, до хеширования
+  вырезаются правила, чьи классы и id не встречаются в шаблонах
+  STATIC_PURGE_TEMPLATE_DIRS;
+* рядом с текстовыми файлами пишутся сжатые копии .gz и, если
+  установлен пакет brotli, .br — их отдаёт StaticFilesMiddleware;
+* без манифеста или без файла в нём {% static %} возвращает
+  исходное имя, а не падает с ошибкой.
+"""
+import gzip
+import os
+import re
+from typing import Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.contrib.staticfiles.utils import matches_patterns
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_PATTERNS: tuple = (
+    '*.css', '*.js', '*.svg', '*.ico', '*.txt', '*.json', '*.xml',
+)
+CONDITIONAL_AT_RULES: tuple = ('@media', '@supports', '@layer')
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+LICENSE_RE = re.compile(r'/\*!.*?\*/', re.DOTALL)
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+ID_RE = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+TOKEN_RE = re.compile(r'[\w-]+')
+
+
+def _blocks(css: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """Разбивает CSS на пары (заголовок, тело) верхнего уровня.
+
+    У правил без тела, например @charset, тело — None.
+    """
+    depth = 0
+    start = 0
+    prelude_end = 0
+    quote = None
+    for position, char in enumerate(css):
+        if quote:
+            if char == quote and css[position - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                prelude_end = position
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield (
+                    css[start:prelude_end].strip(),
+                    css[prelude_end + 1:position]
+                )
+                start = position + 1
+        elif char == ';' and depth == 0:
+            yield css[start:position + 1].strip(), None
+            start = position + 1
+
+
+def _top_level(text: str) -> Iterator[Tuple[int, str]]:
+    """Символы text вне скобок вместе с их позициями."""
+    depth = 0
+    for position, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0:
+            yield position, char
+
+
+def _split_selectors(prelude: str) -> List[str]:
+    """Делит список селекторов по запятым вне :is(…), :not(…) и т. п."""
+    selectors = []
+    start = 0
+    for position, char in _top_level(prelude):
+        if char == ',':
+            selectors.append(prelude[start:position])
+            start = position + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _selector_used(selector: str, used: Set[str]) -> bool:
+    """Есть ли в шаблонах все классы и id, которых требует selector.
+
+    Аргументы псевдоклассов в скобках отбрасываются: внутри :not(.x)
+    класс x как раз должен отсутствовать, а из :is(.x, .y) нужен
+    любой один, так что такие правила сохраняются по внешней части.
+    """
+    selector = ATTRIBUTE_RE.sub('', selector)
+    selector = ''.join(char for _, char in _top_level(selector))
+    return all(
+        name in used
+        for name in CLASS_RE.findall(selector) + ID_RE.findall(selector)
+    )
+
+
+def _purge(css: str, used: Set[str]) -> str:
+    rules = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            rules.append(prelude)
+        elif prelude.startswith(CONDITIONAL_AT_RULES):
+            inner = _purge(body, used)
+            if inner:
+                rules.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            # @font-face, @keyframes и прочие оставляем как есть
+            rules.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in _split_selectors(prelude)
+                if _selector_used(selector, used)
+            ]
+            if selectors:
+                rules.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(rules)
+
+
+def purge_css(css: str, used: Set[str]) -> str:
+    """Удаляет из CSS правила с неиспользуемыми классами и id.
+
+    Лицензионные комментарии /*! … */ сохраняются, остальные
+    комментарии, включая sourceMappingURL, удаляются.
+    """
+    licenses = ''.join(LICENSE_RE.findall(css))
+    purged = _purge(COMMENT_RE.sub('', css), used)
+    if purged.startswith('@charset'):
+        charset, _, purged = purged.partition(';')
+        return f'{charset};{licenses}{purged}'
+    return licenses + purged
+
+
+def template_tokens(directories: List[str]) -> Set[str]:
+    """Все слова из шаблонов: среди них заведомо есть все классы."""
+    tokens = set(settings.STATIC_PURGE_SAFELIST)
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith('.html'):
+                    continue
+                with open(os.path.join(root, filename)) as template:
+                    tokens.update(TOKEN_RE.findall(template.read()))
+    return tokens
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # файла нет в STATIC_ROOT: collectstatic ещё не запускали
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = self._purge_stylesheets(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if matches_patterns(name, COMPRESS_PATTERNS):
+                self._compress(name)
+
+    def _replace(self, name: str, content: bytes) -> None:
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def _purge_stylesheets(self, paths):
+        """Чистит CSS в STATIC_ROOT до того, как от него считают хеш."""
+        used = template_tokens(settings.STATIC_PURGE_TEMPLATE_DIRS)
+        paths = dict(paths)
+        for name, (storage, path) in paths.items():
+            if not matches_patterns(name, settings.STATIC_PURGE_PATTERNS):
+                continue
+            with storage.open(path) as stylesheet:
+                css = stylesheet.read().decode()
+            self._replace(name, purge_css(css, used).encode())
+            paths[name] = (self, name)
+        return paths
+
+    def _compress(self, name: str) -> None:
+        with self.open(name) as source:
+            data = source.read()
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                self._replace(name + suffix, compressed)
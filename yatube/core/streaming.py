@@ -0,0 +1,49 @@
+"""Потоковый рендеринг длинных страниц.
+
+Шаблон страницы рендерится целиком, но на месте длинного списка
+выводит STREAM_MARKER. Клиент сразу получает всё до маркера, затем
+элементы списка, отрендеренные порциями, и в конце остаток страницы.
+Время до первого байта не зависит от длины списка.
+"""
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+
+STREAM_MARKER: str = '<!-- stream -->'
+
+
+def _render_items(template, items: Iterable, name: str) -> Iterator[str]:
+    chunk = []
+    for item in items:
+        # без request, чтобы не вызывать контекст-процессоры на каждый элемент
+        chunk.append(template.render({name: item}))
+        if len(chunk) == settings.STREAMING_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def stream_template(request, template_name: str, context: dict,
+                    items: Iterable, item_template: str,
+                    item_name: str) -> StreamingHttpResponse:
+    """Ответ, в котором items подставляются на место STREAM_MARKER.
+
+    Каждый элемент рендерится шаблоном item_template с единственной
+    переменной item_name.
+    """
+    page = render_to_string(
+        template_name, dict(context, streaming=True), request
+    )
+    head, _, tail = page.partition(STREAM_MARKER)
+
+    def content():
+        yield head
+        yield from _render_items(
+            get_template(item_template), items, item_name
+        )
+        yield tail
+
+    return StreamingHttpResponse(content())
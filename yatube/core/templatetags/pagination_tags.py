@@ -0,0 +1,10 @@
+from core.pagination import page_navigation
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def pagination(context, page):
+    """Ссылки пагинатора с сохранением остальных GET-параметров."""
+    return page_navigation(page, context['request'].GET)
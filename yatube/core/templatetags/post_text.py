@@ -0,0 +1,38 @@
+from django import template
+from django.urls import NoReverseMatch, reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+from posts.tags import MENTION_RE, TAG_RE
+
+register = template.Library()
+
+
+def _tag_link(match) -> str:
+    tag = match.group(1)
+    return format_html(
+        '<a href="{}">#{}</a>',
+        reverse('posts:tag_posts', args=[tag.lower()]),
+        tag
+    )
+
+
+def _mention_link(match) -> str:
+    name = match.group(1).rstrip('.')
+    try:
+        url = reverse('posts:profile', args=[name])
+    except NoReverseMatch:
+        # у имени с символами вне slug нет страницы профиля
+        return match.group(0)
+    return format_html(
+        '<a href="{}">@{}</a>{}', url, name, match.group(1)[len(name):]
+    )
+
+
+@register.filter(needs_autoescape=True)
+def linkify(text, autoescape=True):
+    """Превращает #теги и @упоминания в ссылки."""
+    if autoescape:
+        text = conditional_escape(text)
+    text = TAG_RE.sub(_tag_link, text)
+    text = MENTION_RE.sub(_mention_link, text)
+    return mark_safe(text)
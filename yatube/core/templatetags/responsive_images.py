@@ -0,0 +1,74 @@
+"""Картинка с набором размеров для srcset.
+
+Для одной картинки в ленте нужны основная миниатюра и по миниатюре
+каждой ширины из POST_IMAGE_RENDITIONS в двух форматах, и каждая
+стоит sorl отдельного обращения к хранилищу ключей. Поэтому готовые
+адреса и размеры кешируются одной записью на файл картинки: при
+повторном показе весь набор берётся одним чтением кеша.
+"""
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+
+register = template.Library()
+
+RENDITIONS_KEY: str = 'images:renditions:{}'
+
+
+def _renditions_key(name: str) -> str:
+    return RENDITIONS_KEY.format(name)
+
+
+def forget_renditions(name: str) -> None:
+    """Забывает кешированные миниатюры удалённой картинки."""
+    cache.delete(_renditions_key(name))
+
+
+def _srcset(image, width: int, height: int, image_format: str,
+            options: dict) -> str:
+    """Миниатюры нескольких ширин с пропорциями width x height."""
+    renditions = []
+    for rendition_width in settings.POST_IMAGE_RENDITIONS:
+        thumbnail = get_thumbnail(
+            image,
+            f'{rendition_width}x{round(height * rendition_width / width)}',
+            format=image_format,
+            **options
+        )
+        renditions.append(f'{thumbnail.url} {rendition_width}w')
+    return ', '.join(renditions)
+
+
+@register.simple_tag
+def responsive_image(image, geometry, **options):
+    """Миниатюра geometry и её srcset в JPEG и WebP.
+
+    Возвращает словарь с url, width, height, srcset и webp_srcset
+    или None, если картинки нет.
+    """
+    if not image:
+        return None
+    key = _renditions_key(image.name)
+    spec = (
+        geometry,
+        tuple(sorted(options.items())),
+        tuple(settings.POST_IMAGE_RENDITIONS),
+    )
+    renditions = cache.get(key) or {}
+    if spec not in renditions:
+        width, height = (int(side) for side in geometry.split('x'))
+        thumbnail = get_thumbnail(image, geometry, **options)
+        renditions[spec] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+            'srcset': _srcset(image, width, height, 'JPEG', options),
+            'webp_srcset': _srcset(image, width, height, 'WEBP', options),
+        }
+        # общий кеш узнаёт об удалении картинки сразу, локальный — нет
+        cache.set(key, renditions, (
+            None if settings.SHARED_CACHE
+            else settings.POST_IMAGE_RENDITIONS_TTL
+        ))
+    return renditions[spec]
@@ -1,4 +1,7 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import redirect, render
+
+from .profiling import get_stats, reset
 
 
 def page_not_found(request, exception):
@@ -7,3 +10,11 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def template_profile(request):
+    if request.method == 'POST':
+        reset()
+        return redirect('template_profile')
+    return render(request, 'core/template_profile.html', {'rows': get_stats()})
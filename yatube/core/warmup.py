@@ -0,0 +1,22 @@
+import os
+
+from django.conf import settings
+from django.template.loader import get_template
+
+
+def warm_up_templates() -> int:
+    """Компилирует шаблоны проекта, чтобы кеш загрузчика был заполнен.
+
+    Возвращает число загруженных шаблонов.
+    """
+    loaded = 0
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith('.html'):
+                    continue
+                get_template(os.path.relpath(
+                    os.path.join(root, filename), directory
+                ).replace(os.sep, '/'))
+                loaded += 1
+    return loaded
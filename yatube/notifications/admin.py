@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import DigestSubscription
+
+
+class DigestSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'frequency', 'sent_until')
+    list_filter = ('frequency',)
+    raw_id_fields = ('user',)
+
+
+admin.site.register(DigestSubscription, DigestSubscriptionAdmin)
@@ -0,0 +1,10 @@
+from .inbox import unread_count
+
+
+def unread_notifications(request):
+    """Число непрочитанных уведомлений; считается, только если нужно."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    # шаблон вызывает функцию только там, где выводит число
+    return {'unread_notifications': lambda: unread_count(user)}
@@ -0,0 +1,155 @@
+"""Письма с новыми постами авторов, на которых подписан пользователь.
+
+Окно дайджеста выравнивается по границе часа или суток, поэтому
+повторный запуск в том же периоде ничего не отправляет. Подписки
+обрабатываются порциями по DIGEST_BATCH_SIZE: посты всех авторов, на
+которых подписана порция, выбираются одним запросом по графу Follow
+за общее окно, письма порции уходят через одно соединение
+PooledEmailBackend. sent_until сдвигается у каждой подписки сразу
+после того, как её письмо принято, поэтому прерванная рассылка при
+следующем запуске продолжается с тех, кому письмо ещё не ушло, и
+никому не повторяется. Окно подписки не уходит в прошлое дальше
+одного периода: после долгого простоя письмо придёт только за
+последний период. Между порциями команда выдерживает паузу, чтобы
+не превышать DIGEST_MAX_RATE писем в секунду.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from posts.models import Post
+
+from .models import DigestSubscription
+
+PERIODS: Dict[str, timedelta] = {
+    DigestSubscription.HOURLY: timedelta(hours=1),
+    DigestSubscription.DAILY: timedelta(days=1),
+}
+SUBJECTS: Dict[str, str] = {
+    DigestSubscription.HOURLY: 'Новые посты за час',
+    DigestSubscription.DAILY: 'Новые посты за день',
+}
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+def window_end(frequency: str, moment: datetime = None) -> datetime:
+    """Начало текущего часа или текущих суток по местному времени."""
+    moment = timezone.localtime(moment)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if frequency == DigestSubscription.DAILY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def due_subscriptions(frequency: str, end: datetime):
+    """Подписки, которым письмо за окно, кончающееся в end, ещё не ушло."""
+    return DigestSubscription.objects.filter(
+        frequency=frequency, user__is_active=True
+    ).exclude(
+        sent_until__gte=end
+    ).exclude(
+        user__email=''
+    ).select_related('user').order_by('pk')
+
+
+def collect_posts(subscriptions, end: datetime,
+                  period: timedelta) -> Dict[int, List[Post]]:
+    """Новые посты для каждого подписчика порции одним запросом."""
+    # окно не длиннее периода, иначе одна давняя подписка растянет
+    # выборку для всей порции
+    floor = end - period
+    since = {
+        item.user_id: max(item.sent_until or floor, floor)
+        for item in subscriptions
+    }
+    posts = Post.objects.filter(
+        author__following__user_id__in=since,
+        pub_date__gt=min(since.values()),
+        pub_date__lte=end,
+    ).annotate(
+        follower_id=F('author__following__user_id')
+    ).select_related('author', 'group').order_by('-pub_date')
+
+    digests = defaultdict(list)
+    for post in posts:
+        if post.pub_date > since[post.follower_id]:
+            digests[post.follower_id].append(post)
+    return digests
+
+
+def render_digest(subscription, posts: List[Post]) -> EmailMessage:
+    limit = settings.DIGEST_MAX_POSTS
+    body = render_to_string('notifications/digest_email.txt', {
+        'user': subscription.user,
+        'posts': posts[:limit],
+        'more': max(len(posts) - limit, 0),
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(
+        SUBJECTS[subscription.frequency],
+        body,
+        to=[subscription.user.email],
+    )
+
+
+def send_digests(frequency: str, batch_size: int = None,
+                 max_rate: float = None, connection=None,
+                 progress: Progress = None, now: datetime = None) -> int:
+    """Рассылает дайджесты частоты frequency; возвращает число писем."""
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    max_rate = settings.DIGEST_MAX_RATE if max_rate is None else max_rate
+    connection = connection or get_connection(settings.DIGEST_EMAIL_BACKEND)
+    end = window_end(frequency, now)
+    period = PERIODS[frequency]
+
+    sent = processed = 0
+    last_pk = 0
+    # соединение откроется при первом письме и закроется в конце
+    try:
+        while True:
+            subscriptions = list(
+                due_subscriptions(frequency, end).filter(
+                    pk__gt=last_pk
+                )[:batch_size]
+            )
+            if not subscriptions:
+                return sent
+            started = time.monotonic()
+            digests = collect_posts(subscriptions, end, period)
+            empty = [
+                item.pk for item in subscriptions
+                if not digests.get(item.user_id)
+            ]
+            DigestSubscription.objects.filter(pk__in=empty).update(
+                sent_until=end
+            )
+            messages = len(subscriptions) - len(empty)
+            for item in subscriptions:
+                if item.pk in empty:
+                    continue
+                message = render_digest(item, digests[item.user_id])
+                # письмо принято — подписка сдвигается сразу, чтобы
+                # обрыв на следующем письме не повторил это
+                if connection.send_messages([message]):
+                    sent += 1
+                    DigestSubscription.objects.filter(
+                        pk=item.pk
+                    ).update(sent_until=end)
+            last_pk = subscriptions[-1].pk
+            processed += len(subscriptions)
+            if progress is not None:
+                progress(processed, sent)
+            if max_rate and messages:
+                time.sleep(max(
+                    messages / max_rate
+                    - (time.monotonic() - started), 0
+                ))
+    finally:
+        connection.close()
@@ -0,0 +1,11 @@
+from django import forms
+
+from .models import DigestSubscription
+
+
+class DigestForm(forms.Form):
+    frequency = forms.ChoiceField(
+        label='Дайджест новых постов',
+        choices=(('', 'Не присылать'),) + DigestSubscription.FREQUENCY_CHOICES,
+        required=False
+    )
@@ -0,0 +1,194 @@
+"""Входящие уведомления пользователя.
+
+Число непрочитанных хранится в кеше и сдвигается при каждом новом
+уведомлении, так что шапка страницы не делает COUNT(*) на каждый
+запрос. Повторные события об одном и том же («ещё один комментарий к
+посту», «ещё один подписчик») не копятся отдельными строками, а
+сворачиваются в одно непрочитанное уведомление со списком
+участников без повторов. Уведомления подписчикам о новом посте не
+рассылаются в запросе автора: пост ставит в очередь PendingFanOut
+строку, а команда fan_out_notifications вставляет уведомления пачками
+по NOTIFICATIONS_BATCH_SIZE строк и запоминает курсор после каждой
+пачки, так что прерванная рассылка продолжается с того же места.
+
+Без общего кеша (SHARED_CACHE) каждый процесс держит своё число
+непрочитанных, и оно отстаёт не дольше NOTIFICATIONS_UNREAD_TTL.
+"""
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+from posts.counting import adjust_count, cached_count
+from posts.models import Follow
+
+from .models import Notification, PendingFanOut
+
+Progress = Optional[Callable[[int], None]]
+
+UNREAD_KEY: str = 'notifications:unread:{}'
+
+
+def unread_key(user_id: int) -> str:
+    return UNREAD_KEY.format(user_id)
+
+
+def unread_count(user) -> int:
+    return cached_count(
+        unread_key(user.pk),
+        Notification.objects.filter(recipient=user, unread=True),
+        settings.NOTIFICATIONS_UNREAD_TTL
+    )
+
+
+def _collapse(recipient, actor, verb: str,
+              post_id: Optional[int]) -> Optional[Notification]:
+    """Сворачивает событие в непрочитанное уведомление, если оно есть."""
+    unread = Notification.objects.filter(
+        recipient=recipient, verb=verb, post_id=post_id, unread=True
+    )
+    with transaction.atomic():
+        # одно условное обновление: строку, прочитанную в этот момент,
+        # оно не заденет, и тогда уведомление создаётся заново
+        if not unread.update(actor=actor, created=timezone.now()):
+            return None
+        notification = unread.get()
+        participants = Notification.actors.through.objects
+        participants.bulk_create(
+            [participants.model(
+                notification=notification, user_id=actor.pk
+            )],
+            ignore_conflicts=True
+        )
+        Notification.objects.filter(pk=notification.pk).update(
+            actor_count=Subquery(
+                participants.filter(
+                    notification_id=OuterRef('pk')
+                ).values('notification_id').annotate(
+                    count=Count('pk')
+                ).values('count')
+            )
+        )
+    notification.refresh_from_db(fields=['actor_count'])
+    return notification
+
+
+def notify(recipient, actor, verb: str,
+           post_id: Optional[int] = None) -> Notification:
+    """Добавляет уведомление или сворачивает его с непрочитанным таким же.
+
+    Свёрнутое уведомление остаётся на своём месте в ленте, но получает
+    новое время и последнего участника. Участники хранятся множеством,
+    поэтому повторный комментарий того же человека их не прибавляет.
+    Два непрочитанных уведомления об одном событии запрещает уникальный
+    индекс: если параллельный запрос успел создать своё, событие
+    сворачивается в него.
+    """
+    while True:
+        notification = _collapse(recipient, actor, verb, post_id)
+        if notification is not None:
+            return notification
+        try:
+            with transaction.atomic():
+                notification = Notification.objects.create(
+                    recipient=recipient,
+                    actor=actor,
+                    verb=verb,
+                    post_id=post_id
+                )
+                Notification.actors.through.objects.create(
+                    notification=notification, user_id=actor.pk
+                )
+        except IntegrityError:
+            continue
+        adjust_count(unread_key(recipient.pk), 1)
+        return notification
+
+
+def fan_out(actor, verb: str, recipient_ids: Iterable[int],
+            post_id: Optional[int] = None,
+            batch_size: Optional[int] = None) -> int:
+    """Рассылает уведомление многим получателям пачками; возвращает число.
+
+    Счётчики получателей пачки сбрасываются одним запросом к кешу и
+    пересчитываются при следующем обращении.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    recipient_ids = iter(recipient_ids)
+    sent = 0
+    while True:
+        batch = list(islice(recipient_ids, batch_size))
+        if not batch:
+            return sent
+        Notification.objects.bulk_create(
+            (
+                Notification(
+                    recipient_id=recipient_id,
+                    actor=actor,
+                    verb=verb,
+                    post_id=post_id
+                )
+                for recipient_id in batch
+            ),
+            batch_size=batch_size
+        )
+        cache.delete_many([unread_key(pk) for pk in batch])
+        sent += len(batch)
+
+
+def enqueue_fan_out(actor, verb: str, post_id: Optional[int] = None):
+    """Ставит в очередь уведомление всем подписчикам actor."""
+    return PendingFanOut.objects.create(
+        actor=actor, verb=verb, post_id=post_id
+    )
+
+
+def process_fan_outs(batch_size: int = None,
+                     progress: Progress = None) -> int:
+    """Рассылает уведомления из очереди; возвращает число вставленных.
+
+    Пачка уведомлений и сдвиг курсора пишутся одной транзакцией, и
+    повторный запуск после сбоя никому не отправит уведомление дважды.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    sent = 0
+    for pending in list(PendingFanOut.objects.select_related('actor')):
+        followers = Follow.objects.filter(
+            author_id=pending.actor_id
+        ).order_by('user_id').values_list('user_id', flat=True)
+        while True:
+            batch = list(
+                followers.filter(user_id__gt=pending.cursor)[:batch_size]
+            )
+            if not batch:
+                pending.delete()
+                break
+            with transaction.atomic():
+                sent += fan_out(
+                    pending.actor,
+                    pending.verb,
+                    batch,
+                    pending.post_id,
+                    batch_size
+                )
+                pending.cursor = batch[-1]
+                pending.save(update_fields=['cursor'])
+            if progress is not None:
+                progress(sent)
+    return sent
+
+
+def mark_read(user, notification_ids: Iterable[int]) -> int:
+    """Отмечает прочитанными показанные уведомления; возвращает их число.
+
+    Уведомления, которых не было на странице, остаются непрочитанными.
+    """
+    read = Notification.objects.filter(
+        recipient=user, unread=True, pk__in=list(notification_ids)
+    ).update(unread=False)
+    if read:
+        adjust_count(unread_key(user.pk), -read)
+    return read
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.inbox import process_fan_outs
+
+
+class Command(BaseCommand):
+    help = 'Рассылает подписчикам уведомления о новых постах из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Сколько уведомлений вставлять за одну транзакцию',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Проверять очередь каждые NOTIFICATIONS_FAN_OUT_INTERVAL '
+                 'секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = process_fan_outs(batch_size=options['batch_size'])
+            self.stdout.write(f'Отправлено уведомлений: {sent}')
+            if not options['loop']:
+                return
+            time.sleep(settings.NOTIFICATIONS_FAN_OUT_INTERVAL)
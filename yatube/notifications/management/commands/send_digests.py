@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from notifications.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Рассылает письма с новыми постами авторов из подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'frequency',
+            choices=sorted(PERIODS),
+            help='Какие дайджесты рассылать: за час или за день',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Сколько подписок обрабатывать за одну порцию',
+        )
+        parser.add_argument(
+            '--max-rate',
+            type=float,
+            help='Не больше стольких писем в секунду, 0 — без ограничения',
+        )
+
+    def progress(self, processed, sent):
+        self.stdout.write(f'subscriptions: {processed}, emails: {sent}')
+
+    def handle(self, *args, **options):
+        sent = send_digests(
+            options['frequency'],
+            batch_size=options['batch_size'],
+            max_rate=options['max_rate'],
+            progress=self.progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
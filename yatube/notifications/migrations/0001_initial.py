@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('comment', 'Комментарий'), ('follow', 'Подписка'), ('post', 'Новый пост')], max_length=16, verbose_name='Событие')),
+                ('post_id', models.IntegerField(blank=True, null=True, verbose_name='Пост')),
+                ('actor_count', models.PositiveIntegerField(default=1, verbose_name='Участников')),
+                ('unread', models.BooleanField(default=True, verbose_name='Не прочитано')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ('-pk',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'unread'], name='notifications_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestSubscription',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('hourly', 'Каждый час'), ('daily', 'Раз в день')], default='daily', max_length=8, verbose_name='Частота')),
+                ('sent_until', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено по')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='digest', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Подписка на дайджест',
+                'verbose_name_plural': 'Подписки на дайджест',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='digestsubscription',
+            index=models.Index(fields=['frequency', 'sent_until'], name='notifications_digest_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_actors(apps, schema_editor):
+    # сворачиваются только непрочитанные; у старых известен лишь последний
+    Notification = apps.get_model('notifications', 'Notification')
+    Actors = Notification.actors.through
+    Actors.objects.bulk_create(
+        (
+            Actors(notification_id=pk, user_id=actor_id)
+            for pk, actor_id in Notification.objects.filter(
+                unread=True
+            ).values_list('pk', 'actor_id').iterator()
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0002_digestsubscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actors',
+            field=models.ManyToManyField(related_name='_notification_actors_+', to=settings.AUTH_USER_MODEL, verbose_name='Участники'),
+        ),
+        migrations.RunPython(fill_actors, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='PendingFanOut',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('comment', 'Комментарий'), ('follow', 'Подписка'), ('post', 'Новый пост')], max_length=16, verbose_name='Событие')),
+                ('post_id', models.IntegerField(blank=True, null=True, verbose_name='Пост')),
+                ('cursor', models.PositiveIntegerField(default=0, verbose_name='Курсор')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Рассылка уведомлений',
+                'verbose_name_plural': 'Рассылки уведомлений',
+                'ordering': ('pk',),
+            },
+        ),
+    ]
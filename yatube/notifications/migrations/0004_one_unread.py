@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def read_duplicates(apps, schema_editor):
+    # из одинаковых непрочитанных уведомлений остаётся самое новое
+    Notification = apps.get_model('notifications', 'Notification')
+    unread = Notification.objects.filter(unread=True)
+    duplicates = unread.values('recipient', 'verb', 'post_id').annotate(
+        rows=Count('pk'), newest=Max('pk')
+    ).filter(rows__gt=1).order_by()
+    for row in duplicates.iterator():
+        unread.filter(
+            recipient=row['recipient'],
+            verb=row['verb'],
+            post_id=row['post_id'],
+            pk__lt=row['newest']
+        ).update(unread=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_distinct_actors'),
+    ]
+
+    operations = [
+        migrations.RunPython(read_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('post_id__isnull', False), ('unread', True)), fields=('recipient', 'verb', 'post_id'), name='notifications_one_unread_post'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('post_id__isnull', True), ('unread', True)), fields=('recipient', 'verb'), name='notifications_one_unread'),
+        ),
+    ]
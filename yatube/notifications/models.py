@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Q
+
+User = get_user_model()
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    POST = 'post'
+    VERB_CHOICES = (
+        (COMMENT, 'Комментарий'),
+        (FOLLOW, 'Подписка'),
+        (POST, 'Новый пост'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто'
+    )
+    # все, кто участвовал в свёрнутом уведомлении, без повторов
+    actors = models.ManyToManyField(
+        User,
+        related_name='+',
+        verbose_name='Участники'
+    )
+    verb = models.CharField('Событие', max_length=16, choices=VERB_CHOICES)
+    # не внешний ключ: пост может уйти в архив, а уведомление остаться
+    post_id = models.IntegerField('Пост', null=True, blank=True)
+    actor_count = models.PositiveIntegerField('Участников', default=1)
+    unread = models.BooleanField('Не прочитано', default=True)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                fields=['recipient', 'unread'],
+                name='notifications_unread_idx'
+            ),
+        ]
+        # непрочитанное уведомление о событии одно: повторные события
+        # сворачиваются в него. NULL в уникальном индексе не совпадает
+        # с NULL, поэтому уведомления без поста ограничены отдельно
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'verb', 'post_id'],
+                condition=Q(unread=True, post_id__isnull=False),
+                name='notifications_one_unread_post'
+            ),
+            models.UniqueConstraint(
+                fields=['recipient', 'verb'],
+                condition=Q(unread=True, post_id__isnull=True),
+                name='notifications_one_unread'
+            ),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        return f'{self.verb} → {self.recipient_id}'
+
+
+class PendingFanOut(models.Model):
+    """Уведомление подписчикам автора, рассылка которого не закончена."""
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    verb = models.CharField(
+        'Событие', max_length=16, choices=Notification.VERB_CHOICES
+    )
+    post_id = models.IntegerField('Пост', null=True, blank=True)
+    # id последнего подписчика, которому уведомление уже вставлено
+    cursor = models.PositiveIntegerField('Курсор', default=0)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'Рассылка уведомлений'
+        verbose_name_plural = 'Рассылки уведомлений'
+
+
+class DigestSubscription(models.Model):
+    HOURLY = 'hourly'
+    DAILY = 'daily'
+    FREQUENCY_CHOICES = (
+        (HOURLY, 'Каждый час'),
+        (DAILY, 'Раз в день'),
+    )
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digest',
+        verbose_name='Пользователь'
+    )
+    frequency = models.CharField(
+        'Частота', max_length=8, choices=FREQUENCY_CHOICES, default=DAILY
+    )
+    # посты до этого момента уже попали в письма
+    sent_until = models.DateTimeField('Отправлено по', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['frequency', 'sent_until'],
+                name='notifications_digest_idx'
+            ),
+        ]
+        verbose_name = 'Подписка на дайджест'
+        verbose_name_plural = 'Подписки на дайджест'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.frequency}'
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from posts.models import Comment, Follow, Post
+
+from .inbox import enqueue_fan_out, notify
+from .models import Notification
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    """Автор поста узнаёт о новом комментарии, кроме своего."""
+    # у комментария может не быть поста
+    if not created or instance.post_id is None:
+        return
+    post = instance.post
+    if post.author_id != instance.author_id:
+        notify(
+            post.author, instance.author, Notification.COMMENT, post.pk
+        )
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance, created, **kwargs):
+    if created:
+        notify(instance.author, instance.user, Notification.FOLLOW)
+
+
+@receiver(post_save, sender=Post)
+def notify_new_post(sender, instance, created, **kwargs):
+    """Уведомления подписчикам рассылает команда, а не этот запрос."""
+    if created and Follow.objects.filter(
+        author_id=instance.author_id
+    ).exists():
+        enqueue_fan_out(instance.author, Notification.POST, instance.pk)
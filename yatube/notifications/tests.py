@@ -0,0 +1,368 @@
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+from core.mail import PooledEmailBackend
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Post
+
+from .digests import collect_posts, send_digests, window_end
+from .inbox import fan_out, process_fan_outs, unread_count
+from .models import DigestSubscription, Notification, PendingFanOut
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(NotificationTests.author)
+
+    def comment(self, user):
+        Comment.objects.create(
+            post=NotificationTests.post, author=user, text='Комментарий'
+        )
+
+    def test_comments_collapse(self):
+        """Комментарии к одному посту сворачиваются в одно уведомление."""
+        self.assertEqual(unread_count(NotificationTests.author), 0)
+        for reader in NotificationTests.readers:
+            self.comment(reader)
+        # повторный комментарий не добавляет участника
+        self.comment(NotificationTests.readers[0])
+        self.comment(NotificationTests.author)
+
+        notification = Notification.objects.get(
+            recipient=NotificationTests.author
+        )
+        self.assertEqual(notification.verb, Notification.COMMENT)
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.actor, NotificationTests.readers[0])
+        self.assertEqual(unread_count(NotificationTests.author), 1)
+
+    def test_one_unread_notification_per_event(self):
+        """Второе непрочитанное уведомление о том же событии запрещено."""
+        self.comment(NotificationTests.readers[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=NotificationTests.author,
+                actor=NotificationTests.readers[1],
+                verb=Notification.COMMENT,
+                post_id=NotificationTests.post.pk
+            )
+        Notification.objects.update(unread=False)
+        self.comment(NotificationTests.readers[1])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_comment_without_post(self):
+        """Комментарий без поста не ломает уведомления."""
+        Comment.objects.create(
+            author=NotificationTests.readers[0], text='Без поста'
+        )
+        self.assertFalse(Notification.objects.filter(
+            verb=Notification.COMMENT
+        ).exists())
+
+    def test_follow(self):
+        """Автор узнаёт о новом подписчике."""
+        Follow.objects.create(
+            user=NotificationTests.readers[0], author=NotificationTests.author
+        )
+        notification = Notification.objects.get(
+            recipient=NotificationTests.author
+        )
+        self.assertEqual(notification.verb, Notification.FOLLOW)
+
+    def test_fan_out_is_batched(self):
+        """Подписчики получают уведомления пачками."""
+        for reader in NotificationTests.readers:
+            Follow.objects.create(user=reader, author=NotificationTests.author)
+        with CaptureQueriesContext(connection) as queries:
+            sent = fan_out(
+                NotificationTests.author,
+                Notification.POST,
+                [reader.pk for reader in NotificationTests.readers],
+                NotificationTests.post.pk,
+                batch_size=2
+            )
+        self.assertEqual(sent, 5)
+        self.assertEqual(len(queries), 3)
+
+    def test_new_post_fan_out_is_queued(self):
+        """Новый пост ставит рассылку в очередь, её разбирает команда."""
+        for reader in NotificationTests.readers:
+            Follow.objects.create(user=reader, author=NotificationTests.author)
+        post = Post.objects.create(
+            author=NotificationTests.author, text='Новый пост'
+        )
+        self.assertFalse(
+            Notification.objects.filter(verb=Notification.POST).exists()
+        )
+        pending = PendingFanOut.objects.get()
+        self.assertEqual(pending.post_id, post.pk)
+
+        # прерванная рассылка уже дошла до третьего подписчика
+        pending.cursor = NotificationTests.readers[2].pk
+        pending.save()
+        self.assertEqual(process_fan_outs(batch_size=1), 2)
+        self.assertEqual(
+            sorted(Notification.objects.filter(
+                verb=Notification.POST
+            ).values_list('recipient__username', flat=True)),
+            ['reader3', 'reader4']
+        )
+        self.assertFalse(PendingFanOut.objects.exists())
+        self.assertEqual(process_fan_outs(), 0)
+
+    def test_header_count_is_cached(self):
+        """Шапка берёт число непрочитанных из кеша, а не из COUNT."""
+        self.comment(NotificationTests.readers[0])
+        unread_count(NotificationTests.author)
+        self.comment(NotificationTests.readers[1])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('about:tech'))
+        self.assertContains(response, '<span class="badge bg-danger">1</span>')
+        for query in queries:
+            self.assertNotIn('notifications_notification', query['sql'])
+
+    @override_settings(NOTIFICATIONS_PER_PAGE=2)
+    def test_inbox(self):
+        """Входящие листаются по курсору и помечаются прочитанными."""
+        for reader in NotificationTests.readers[:3]:
+            Follow.objects.create(user=reader, author=NotificationTests.author)
+            Comment.objects.create(
+                post=Post.objects.create(author=NotificationTests.author),
+                author=reader,
+                text='Комментарий'
+            )
+        response = self.client.get(reverse('notifications:inbox'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 2)
+        self.assertTrue(all(item.unread for item in page_obj))
+        # уведомления со следующих страниц ещё не показаны
+        self.assertEqual(unread_count(NotificationTests.author), 2)
+        self.assertEqual(Notification.objects.filter(unread=True).count(), 2)
+
+        pks = []
+        url = reverse('notifications:inbox')
+        while url:
+            response = self.client.get(url)
+            pks.extend(item.pk for item in response.context['page_obj'])
+            url = response.context['page_obj'].has_next() and (
+                reverse('notifications:inbox')
+                + f'?after={response.context["page_obj"].next_cursor}'
+            )
+        self.assertEqual(
+            pks,
+            list(Notification.objects.filter(
+                recipient=NotificationTests.author
+            ).values_list('pk', flat=True))
+        )
+        self.assertEqual(len(pks), 4)
+        self.assertEqual(unread_count(NotificationTests.author), 0)
+        self.assertFalse(Notification.objects.filter(unread=True).exists())
+
+
+@override_settings(
+    EMAIL_POOL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.now = window_end(DigestSubscription.DAILY) + timedelta(hours=8)
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(2)
+        ]
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com'
+            )
+            for i in range(3)
+        ]
+        for reader in cls.readers:
+            DigestSubscription.objects.create(user=reader)
+        # reader0 читает обоих авторов, reader1 — первого, reader2 — никого
+        for author in cls.authors:
+            Follow.objects.create(user=cls.readers[0], author=author)
+        Follow.objects.create(user=cls.readers[1], author=cls.authors[0])
+        for i, author in enumerate(cls.authors):
+            post = Post.objects.create(author=author, text=f'Пост {i}')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=cls.now - timedelta(hours=12)
+            )
+        post = Post.objects.create(author=cls.authors[0], text='Старый пост')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=cls.now - timedelta(days=3)
+        )
+
+    def test_collect_posts_in_one_query(self):
+        """Посты всех подписчиков порции выбираются одним запросом."""
+        subscriptions = list(
+            DigestSubscription.objects.select_related('user')
+        )
+        with CaptureQueriesContext(connection) as queries:
+            digests = collect_posts(
+                subscriptions,
+                window_end(DigestSubscription.DAILY, DigestTests.now),
+                timedelta(days=1)
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            {
+                user_id: sorted(post.text for post in posts)
+                for user_id, posts in digests.items()
+            },
+            {
+                DigestTests.readers[0].pk: ['Пост 0', 'Пост 1'],
+                DigestTests.readers[1].pk: ['Пост 0'],
+            }
+        )
+
+    def test_send_digests(self):
+        """Письма уходят один раз за окно, повторный запуск пустой."""
+        sent = send_digests(
+            DigestSubscription.DAILY, max_rate=0, now=DigestTests.now
+        )
+        self.assertEqual(sent, 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['reader0@example.com', 'reader1@example.com']
+        )
+        self.assertIn('Пост 1', mail.outbox[0].body + mail.outbox[1].body)
+        self.assertNotIn('Старый пост', mail.outbox[0].body)
+        self.assertFalse(
+            DigestSubscription.objects.filter(sent_until=None).exists()
+        )
+        self.assertEqual(
+            send_digests(
+                DigestSubscription.DAILY, max_rate=0, now=DigestTests.now
+            ),
+            0
+        )
+
+    def test_resume(self):
+        """Прерванная рассылка продолжается с тех, кому письмо не ушло."""
+        DigestSubscription.objects.filter(
+            user=DigestTests.readers[0]
+        ).update(
+            sent_until=window_end(DigestSubscription.DAILY, DigestTests.now)
+        )
+        sent = send_digests(
+            DigestSubscription.DAILY,
+            batch_size=1,
+            max_rate=0,
+            now=DigestTests.now
+        )
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].to, ['reader1@example.com'])
+
+    def test_failure_keeps_sent_subscriptions(self):
+        """Обрыв посреди порции не повторяет уже принятые письма."""
+        backend = mail.get_connection()
+        send = backend.send_messages
+
+        def fail_second(messages):
+            if mail.outbox:
+                raise SMTPServerDisconnected()
+            return send(messages)
+
+        backend.send_messages = fail_second
+        with self.assertRaises(SMTPServerDisconnected):
+            send_digests(
+                DigestSubscription.DAILY,
+                max_rate=0,
+                connection=backend,
+                now=DigestTests.now
+            )
+        self.assertEqual(len(mail.outbox), 1)
+        sent = send_digests(
+            DigestSubscription.DAILY, max_rate=0, now=DigestTests.now
+        )
+        self.assertEqual(sent, 1)
+        self.assertNotEqual(mail.outbox[0].to, mail.outbox[1].to)
+
+    def test_inactive_and_stale_subscriptions(self):
+        """Неактивным письма не идут, окно не длиннее одного периода."""
+        User.objects.filter(pk=DigestTests.readers[0].pk).update(
+            is_active=False
+        )
+        DigestSubscription.objects.filter(
+            user=DigestTests.readers[1]
+        ).update(sent_until=DigestTests.now - timedelta(days=30))
+        sent = send_digests(
+            DigestSubscription.DAILY, max_rate=0, now=DigestTests.now
+        )
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].to, ['reader1@example.com'])
+        self.assertNotIn('Старый пост', mail.outbox[0].body)
+
+    def test_digest_view(self):
+        """Пользователь сам подписывается на дайджест и отписывается."""
+        user = User.objects.create_user(username='newcomer')
+        client = Client()
+        client.force_login(user)
+        url = reverse('notifications:digest')
+        self.assertEqual(client.get(url).status_code, 200)
+        client.post(url, {'frequency': DigestSubscription.HOURLY})
+        self.assertEqual(
+            DigestSubscription.objects.get(user=user).frequency,
+            DigestSubscription.HOURLY
+        )
+        client.post(url, {'frequency': ''})
+        self.assertFalse(
+            DigestSubscription.objects.filter(user=user).exists()
+        )
+
+    def test_pooled_backend_reuses_connection(self):
+        """Пул открывает новое соединение только после max_messages писем."""
+        backend = PooledEmailBackend(max_messages=2)
+        messages = [
+            mail.EmailMessage('Тема', 'Текст', to=['reader@example.com'])
+            for _ in range(5)
+        ]
+        with backend:
+            self.assertEqual(backend.send_messages(messages[:3]), 3)
+            self.assertEqual(backend.send_messages(messages[3:]), 2)
+        self.assertEqual(backend.connections, 3)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_pooled_backend_resends_only_failed_message(self):
+        """После обрыва соединения повторяется одно письмо, а не порция."""
+        backend = PooledEmailBackend(max_messages=5)
+        messages = [
+            mail.EmailMessage(f'Письмо {i}', 'Текст', to=['r@example.com'])
+            for i in range(4)
+        ]
+        send = backend.connection.send_messages
+        failed = []
+
+        def disconnect_once(portion):
+            if portion[0] is messages[2] and not failed:
+                failed.append(portion[0])
+                raise SMTPServerDisconnected()
+            return send(portion)
+
+        backend.connection.send_messages = disconnect_once
+        with backend:
+            self.assertEqual(backend.send_messages(messages), 4)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ['Письмо 0', 'Письмо 1', 'Письмо 2', 'Письмо 3']
+        )
+        self.assertEqual(backend.connections, 2)
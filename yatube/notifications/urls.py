@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', views.inbox, name='inbox'),
+    path('digest/', views.digest, name='digest'),
+]
@@ -0,0 +1,57 @@
+from core.pagination import keyset_paginate, parse_cursor
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+
+from .forms import DigestForm
+from .inbox import mark_read
+from .models import DigestSubscription
+
+
+@login_required
+def inbox(request):
+    page_obj = keyset_paginate(
+        request.user.notifications.select_related('actor'),
+        'pk',
+        parse_cursor(request.GET.get('after')),
+        settings.NOTIFICATIONS_PER_PAGE,
+        descending=True,
+        number=parse_cursor(request.GET.get('page'))
+    )
+    # страница уже прочитана из базы и покажет, что было новым;
+    # прочитанными становятся только её уведомления
+    mark_read(
+        request.user,
+        [notification.pk for notification in page_obj if notification.unread]
+    )
+
+    return render(
+        request,
+        'notifications/inbox.html',
+        {'page_obj': page_obj}
+    )
+
+
+@login_required
+def digest(request):
+    subscription = DigestSubscription.objects.filter(
+        user=request.user
+    ).first()
+    form = DigestForm(
+        request.POST or None,
+        initial={'frequency': subscription and subscription.frequency}
+    )
+    if not form.is_valid():
+        return render(request, 'notifications/digest.html', {'form': form})
+    frequency = form.cleaned_data['frequency']
+    if not frequency:
+        DigestSubscription.objects.filter(user=request.user).delete()
+    elif subscription is None:
+        # первое письмо придёт за последний период
+        DigestSubscription.objects.create(
+            user=request.user, frequency=frequency
+        )
+    elif subscription.frequency != frequency:
+        subscription.frequency = frequency
+        subscription.save(update_fields=['frequency'])
+    return redirect('notifications:digest')
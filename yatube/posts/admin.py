@@ -1,21 +1,176 @@
+from functools import partial
+
+from core.pagination import parse_cursor
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
+
+from .choices import get_group_choices
+from .counting import bounded_count, cached_count
+from .deletion import enqueue_deletion
+from .duplicates import duplicate_clusters
+from .models import ArchivedPost, Group, PendingDeletion, Post, PostStats
+
+ESTIMATED_COUNT_KEY: str = 'posts:admin:count:{}'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает все строки большой таблицы.
+
+    Для таблицы без фильтров берётся количество строк из кеша, которое
+    пересчитывается не чаще раза в ADMIN_COUNT_CACHE_TTL секунд. Для
+    отфильтрованного списка подсчёт останавливается на ADMIN_COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return cached_count(
+                ESTIMATED_COUNT_KEY.format(queryset.model._meta.label_lower),
+                queryset,
+                settings.ADMIN_COUNT_CACHE_TTL
+            )
+        return bounded_count(queryset, settings.ADMIN_COUNT_LIMIT)
 
-from .models import Group, Post
 
+class KeysetNavigationMixin:
+    """Переход к следующей странице по ключу: ?before=<pk>.
 
-class PostAdmin(admin.ModelAdmin):
+    Страница по смещению заставляет базу пропустить все предыдущие
+    строки, а выборка по pk < before читает индекс сразу с нужного
+    места, как бы далеко ни была страница.
+    """
+    ordering = ('-pk',)
+
+    def changelist_view(self, request, extra_context=None):
+        # ChangeList считает неизвестные GET-параметры фильтрами
+        request.GET = request.GET.copy()
+        request.keyset_before = parse_cursor(
+            request.GET.pop('before', [None])[0]
+        )
+        response = super().changelist_view(request, extra_context)
+
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            results = list(changelist.result_list)
+            if len(results) == changelist.list_per_page:
+                response.context_data['keyset_next_url'] = (
+                    changelist.get_query_string({'before': results[-1].pk})
+                )
+        return response
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        before = getattr(request, 'keyset_before', None)
+        if before is not None:
+            queryset = queryset.filter(pk__lt=before)
+        return queryset
+
+
+class PostAdmin(KeysetNavigationMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs['formfield_callback'] = partial(
+            self.changelist_formfield, request=request
+        )
+        return super().get_changelist_formset(request, **kwargs)
+
+    def changelist_formfield(self, db_field, request, **kwargs):
+        """Поля редактируемых строк списка.
 
-class GroupAdmin(admin.ModelAdmin):
+        Группа выбирается из общего закешированного списка, а не из
+        отдельного запроса на каждую строку.
+        """
+        if db_field.name == 'group':
+            field = forms.ModelChoiceField(
+                queryset=Group.objects.all(),
+                required=False
+            )
+            field.choices = get_group_choices()
+            return field
+        return self.formfield_for_dbfield(db_field, request, **kwargs)
+
+    def get_urls(self):
+        urls = [
+            path(
+                'duplicates/',
+                self.admin_site.admin_view(self.duplicates_view),
+                name='posts_post_duplicates'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def duplicates_view(self, request):
+        """Кластеры почти одинаковых постов среди последних."""
+        recent = Post.objects.order_by('-pk').values('pk')[
+            :settings.POSTS_DUPLICATE_SCAN_SIZE
+        ]
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Почти одинаковые посты',
+            clusters=duplicate_clusters(recent),
+        )
+        return TemplateResponse(
+            request, 'admin/posts/post/duplicates.html', context
+        )
+
+
+class GroupAdmin(KeysetNavigationMixin, admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
     search_fields = ('title', 'description',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+    actions = ('delete_in_chunks',)
+
+    def delete_in_chunks(self, request, queryset):
+        for group in queryset:
+            enqueue_deletion(group)
+        self.message_user(
+            request,
+            f'Групп в очереди на удаление: {len(queryset)}. Их удалит '
+            f'команда delete_in_chunks --queue'
+        )
+    delete_in_chunks.short_description = 'Удалить порциями'
+
+
+class PostStatsAdmin(admin.ModelAdmin):
+    list_display = ('post', 'views')
+    raw_id_fields = ('post',)
+
+
+class ArchivedPostAdmin(KeysetNavigationMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'views')
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
+class PendingDeletionAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'requested')
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(PostStats, PostStatsAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(PendingDeletion, PendingDeletionAdmin)
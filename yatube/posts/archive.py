@@ -0,0 +1,237 @@
+"""Архив старых постов.
+
+Посты старше POSTS_ARCHIVE_AFTER_DAYS вместе с комментариями
+переносятся из Post и Comment в ArchivedPost и ArchivedComment с теми
+же id. В горячей таблице остаются только свежие посты, и индексы лент
+не растут с возрастом сайта.
+
+Ленты сначала читают горячую таблицу и обращаются к архиву только на
+страницах, куда свежие посты уже не достают; страница поста ищет его
+в архиве, если в Post его нет.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, Optional, Tuple
+
+from core.pagination import KeysetPage, keyset_paginate
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .counters import flush_views
+from .counting import (adjust_count, approximate_count, author_count_key,
+                       cached_count)
+from .models import ArchivedComment, ArchivedPost, Comment, Post, PostStats
+from .months import moving_posts
+from .tags import move_to_archive
+
+ARCHIVE_COUNT_KEY: str = 'posts:archive-count:{}'
+
+Progress = Optional[Callable[[int], None]]
+
+
+def archive_count_key(group_id: Optional[int] = None) -> str:
+    return ARCHIVE_COUNT_KEY.format(
+        'all' if group_id is None else f'group:{group_id}'
+    )
+
+
+def archive_author_count_key(author_id: int) -> str:
+    return ARCHIVE_COUNT_KEY.format(f'author:{author_id}')
+
+
+def author_post_count(author_id: int) -> int:
+    """Все посты автора, горячие и архивные, по счётчикам в кеше."""
+    return approximate_count(
+        author_count_key(author_id), Post.objects.filter(author_id=author_id)
+    ) + cached_count(
+        archive_author_count_key(author_id),
+        ArchivedPost.objects.filter(author_id=author_id),
+        settings.POSTS_COUNT_TTL
+    )
+
+
+def _archive_chunk(ids) -> Tuple[Counter, Counter]:
+    """Переносит посты ids в архив.
+
+    Возвращает число перенесённых постов по группам и по авторам.
+    """
+    with transaction.atomic():
+        views = dict(
+            PostStats.objects.filter(post_id__in=ids).values_list(
+                'post_id', 'views'
+            )
+        )
+        posts = list(Post.objects.filter(pk__in=ids))
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.pk,
+                text=post.text,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+                views=views.get(post.pk, 0),
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=comment.pk,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+            )
+            for comment in Comment.objects.filter(post_id__in=ids)
+        )
+        move_to_archive(ids)
+        # удаление уменьшит счётчики горячих лент через сигналы,
+        # а помесячные счётчики учитывают и архив
+        with moving_posts():
+            Post.objects.filter(pk__in=ids).delete()
+
+    groups = Counter(post.group_id for post in posts)
+    authors = Counter(post.author_id for post in posts)
+    return groups, authors
+
+
+def archive_posts(days: int = None, chunk_size: int = None,
+                  pause: float = None, progress: Progress = None) -> int:
+    """Переносит в архив посты старше days дней, порциями."""
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    chunk_size = chunk_size or settings.DELETION_CHUNK_SIZE
+    pause = settings.DELETION_PAUSE if pause is None else pause
+    horizon = timezone.now() - timedelta(days=days)
+    old_posts = Post.objects.filter(pub_date__lt=horizon).order_by('pk')
+
+    archived = 0
+    while True:
+        ids = list(old_posts.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return archived
+        # просмотры из кеша должны попасть в PostStats до переноса
+        flush_views(ids)
+        groups, authors = _archive_chunk(ids)
+        adjust_count(archive_count_key(), len(ids))
+        for group_id, count in groups.items():
+            if group_id is not None:
+                adjust_count(archive_count_key(group_id), count)
+        for author_id, count in authors.items():
+            adjust_count(archive_author_count_key(author_id), count)
+        archived += len(ids)
+        if progress is not None:
+            progress(archived)
+        time.sleep(pause)
+
+
+def get_post_or_404(post_id: int):
+    """Пост из горячей таблицы, а если его там нет — из архива."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        return post
+    post = ArchivedPost.objects.filter(pk=post_id).first()
+    if post is None:
+        raise Http404('Пост не найден')
+    return post
+
+
+def is_archived(post) -> bool:
+    return isinstance(post, ArchivedPost)
+
+
+class ArchivePaginator(Paginator):
+    """Лента из горячей таблицы, которую продолжает архив.
+
+    Страницы, целиком помещающиеся в горячую часть, архив не читают.
+    С ключами счётчиков число постов в горячей части и в архиве
+    берётся из кеша, без них считается запросом. Смещение в архиве
+    для страниц целиком из архива считается точно. Уже известное точное
+    общее число постов можно передать в total: тогда страницы архива
+    отсчитываются от его конца и горячую часть считать не нужно.
+    """
+
+    def __init__(self, object_list, archive_list, per_page,
+                 count_key: str = None, archive_count_key: str = None,
+                 total: int = None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.archive_list = archive_list
+        self.count_key = count_key
+        self.archive_count_key = archive_count_key
+        self.total = total
+
+    @cached_property
+    def count(self):
+        if self.total is not None:
+            return self.total
+        if self.count_key is None:
+            return self.object_list.count() + self.archive_list.count()
+        return approximate_count(
+            self.count_key, self.object_list
+        ) + cached_count(
+            self.archive_count_key, self.archive_list,
+            settings.POSTS_COUNT_TTL
+        )
+
+    def _archive_page(self, bottom: int, limit: int) -> list:
+        """Посты архива с позиции bottom общей ленты."""
+        if self.total is not None:
+            # архив — хвост ленты: позиция от его конца не зависит
+            # от числа горячих постов
+            top = self.total - bottom
+            return list(
+                self.archive_list.reverse()[max(top - limit, 0):top]
+            )[::-1]
+        # счётчик в кеше может отставать, а смещение в архиве должно
+        # быть точным: иначе страницы архива повторят или пропустят
+        # посты. Считается только на страницах целиком из архива
+        offset = max(bottom - self.object_list.count(), 0)
+        return list(self.archive_list[offset:offset + limit])
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page]
+        )
+        if not object_list:
+            object_list = self._archive_page(bottom, self.per_page)
+        elif len(object_list) < self.per_page:
+            # горячая часть кончилась на этой странице: архив
+            # продолжает её с начала
+            object_list += list(
+                self.archive_list[:self.per_page - len(object_list)]
+            )
+        return self._get_page(object_list, number, self)
+
+
+def continue_in_archive(page_obj: KeysetPage, archive_list,
+                        per_page: int) -> KeysetPage:
+    """Дополняет последнюю страницу горячей ленты постами из архива.
+
+    Страницы по ключу идут по убыванию pk, а в архив попадают самые
+    старые посты, поэтому архив продолжает ленту с того же курсора.
+    """
+    if page_obj.has_next():
+        return page_obj
+    last = page_obj[-1].pk if len(page_obj) else page_obj.cursor
+    remaining = per_page - len(page_obj)
+    if not remaining:
+        rest = KeysetPage([])
+        if archive_list.filter(pk__lt=last).exists():
+            rest.next_cursor = last
+    else:
+        rest = keyset_paginate(
+            archive_list, 'pk', last, remaining, descending=True
+        )
+    return KeysetPage(
+        page_obj.object_list + rest.object_list,
+        page_obj.cursor,
+        rest.next_cursor,
+        page_obj.number
+    )
@@ -0,0 +1,35 @@
+"""Общий список групп для выпадающих списков.
+
+Список хранится в кеше, и сигнал сбрасывает его при любом изменении
+групп, поэтому строки админки не запрашивают группы заново. Без срока
+список хранится только в общем кеше (SHARED_CACHE): кеш в памяти
+процесса сигнал сбрасывает лишь в том процессе, где изменили группу,
+и остальные процессы показали бы старый список, в котором нет новой
+группы, а сохранение строки с ней обнулило бы группу поста.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Group
+
+GROUP_CHOICES_KEY: str = 'posts:group-choices'
+
+
+def get_group_choices():
+    """Список групп для выпадающих списков, общий для всех строк."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = [('', '---------')] + [
+            (pk, title)
+            for pk, title in Group.objects.values_list('pk', 'title')
+        ]
+        cache.set(
+            GROUP_CHOICES_KEY,
+            choices,
+            None if settings.SHARED_CACHE else settings.GROUP_CHOICES_TTL
+        )
+    return choices
+
+
+def forget_group_choices() -> None:
+    cache.delete(GROUP_CHOICES_KEY)
@@ -0,0 +1,205 @@
+"""Счётчики просмотров постов с отложенной записью в базу.
+
+Каждый просмотр увеличивает атомарный счётчик в кеше, а в таблицу
+PostStats накопленные значения попадают пачкой: по таймеру или когда
+набралось достаточно постов с непереданными просмотрами. При падении
+процесса теряется не больше того, что накопилось с последнего сброса.
+
+Без общего кеша (SHARED_CACHE) счётчики видны только своему процессу,
+поэтому сбрасывает их сам процесс веб-сервера: в запросах, в фоновом
+потоке, который запускает wsgi.py, и при завершении. Команда
+flush_post_views читает счётчики всех процессов и работает только с
+общим кешем.
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Post, PostStats
+
+VIEWS_KEY: str = 'posts:views:{}'
+FLUSH_LOCK_KEY: str = 'posts:views:flush-lock'
+FLUSH_LOCK_TIMEOUT: int = 60
+# у SQLite ограничено число параметров в одном запросе
+FLUSH_BATCH_SIZE: int = 300
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending_ids = set()
+_last_flush = time.monotonic()
+_flusher = None
+
+
+def _views_key(post_id: int) -> str:
+    return VIEWS_KEY.format(post_id)
+
+
+def register_view(post_id: int) -> None:
+    """Учитывает просмотр поста и при необходимости сбрасывает счётчики."""
+    key = _views_key(post_id)
+    # add не перезапишет счётчик, уже созданный другим процессом
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ вытеснили из кеша между add и incr
+        cache.set(key, 1, timeout=None)
+
+    with _lock:
+        _pending_ids.add(post_id)
+        need_flush = (
+            len(_pending_ids) >= settings.POST_VIEWS_FLUSH_THRESHOLD
+            or time.monotonic() - _last_flush
+            >= settings.POST_VIEWS_FLUSH_INTERVAL
+        )
+    if need_flush:
+        flush_views()
+
+
+def get_pending_views(post_ids: Iterable[int]) -> Dict[int, int]:
+    """Возвращает просмотры, ещё не записанные в базу."""
+    keys = {_views_key(post_id): post_id for post_id in post_ids}
+    return {
+        keys[key]: value
+        for key, value in cache.get_many(list(keys)).items()
+        if value
+    }
+
+
+def get_views_many(post_ids: Iterable[int]) -> Dict[int, int]:
+    """Возвращает полное число просмотров: из базы и из кеша."""
+    post_ids = list(post_ids)
+    views = dict.fromkeys(post_ids, 0)
+    views.update(
+        PostStats.objects.filter(
+            post_id__in=post_ids
+        ).values_list('post_id', 'views')
+    )
+    for post_id, pending in get_pending_views(post_ids).items():
+        views[post_id] += pending
+    return views
+
+
+def get_views(post_id: int) -> int:
+    return get_views_many([post_id])[post_id]
+
+
+def _save_views(deltas: Dict[int, int]) -> None:
+    """Прибавляет просмотры к PostStats двумя запросами на пачку."""
+    with transaction.atomic():
+        PostStats.objects.bulk_create(
+            [PostStats(post_id=post_id) for post_id in deltas],
+            ignore_conflicts=True
+        )
+        PostStats.objects.filter(post_id__in=deltas).update(
+            views=F('views') + Case(
+                *[
+                    When(post_id=post_id, then=Value(delta))
+                    for post_id, delta in deltas.items()
+                ],
+                default=Value(0),
+                output_field=IntegerField()
+            ),
+            updated=timezone.now()
+        )
+
+
+def flush_views(post_ids: Optional[Iterable[int]] = None) -> int:
+    """Переносит накопленные в кеше просмотры в базу.
+
+    Без аргументов сбрасывает посты, просмотренные в этом процессе.
+    Возвращает число перенесённых просмотров.
+    """
+    global _last_flush
+
+    with _lock:
+        if post_ids is None:
+            post_ids = list(_pending_ids)
+            _pending_ids.clear()
+        else:
+            post_ids = list(post_ids)
+            _pending_ids.difference_update(post_ids)
+        _last_flush = time.monotonic()
+
+    if not post_ids:
+        return 0
+
+    # сбросом одновременно занимается только один процесс
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        with _lock:
+            _pending_ids.update(post_ids)
+        return 0
+
+    flushed = 0
+    try:
+        for start in range(0, len(post_ids), FLUSH_BATCH_SIZE):
+            flushed += _flush_batch(post_ids[start:start + FLUSH_BATCH_SIZE])
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return flushed
+
+
+def _flush_batch(post_ids) -> int:
+    deltas = get_pending_views(post_ids)
+    # просмотры удалённых постов записывать некуда
+    existing = set(
+        Post.objects.filter(pk__in=deltas).values_list('pk', flat=True)
+    )
+    for post_id in set(deltas) - existing:
+        cache.delete(_views_key(post_id))
+        del deltas[post_id]
+    if not deltas:
+        return 0
+
+    # сначала списываем счётчики: просмотры, пришедшие во время записи,
+    # останутся в кеше до следующего сброса
+    for post_id, delta in deltas.items():
+        cache.decr(_views_key(post_id), delta)
+    try:
+        _save_views(deltas)
+    except Exception:
+        for post_id, delta in deltas.items():
+            cache.incr(_views_key(post_id), delta)
+        raise
+    return sum(deltas.values())
+
+
+def _flush_periodically(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            flush_views()
+        except Exception:
+            logger.exception('Не удалось сбросить просмотры постов')
+        finally:
+            # соединения этого потока не должны висеть между сбросами
+            connections.close_all()
+
+
+def start_flusher() -> None:
+    """Запускает фоновый сброс просмотров в процессе веб-сервера.
+
+    Поток сбрасывает счётчики раз в POST_VIEWS_FLUSH_INTERVAL секунд,
+    даже если запросов к постам нет; остаток сбрасывается при выходе.
+    """
+    global _flusher
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_periodically,
+            args=(settings.POST_VIEWS_FLUSH_INTERVAL,),
+            name='post-views-flusher',
+            daemon=True
+        )
+    _flusher.start()
+    atexit.register(flush_views)
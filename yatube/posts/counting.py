@@ -0,0 +1,98 @@
+"""Число постов в больших лентах без COUNT(*) на каждый запрос.
+
+Количество хранится в кеше и поддерживается сигналами: создание,
+удаление и перенос поста в другую группу сдвигают счётчики. Раз в
+POSTS_COUNT_TTL секунд значение пересчитывается заново, так что
+расхождение после записей в обход сигналов живёт не дольше этого.
+
+При промахе кеша сначала считается не больше POSTS_EXACT_COUNT_LIMIT
+строк: маленькую ленту дешевле посчитать точно. Большая лента
+пересчитывается целиком одним процессом под блокировкой, остальные
+тем временем получают нижнюю оценку.
+"""
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+COUNT_KEY: str = 'posts:count:{}'
+LOCK_KEY: str = 'posts:count-lock:{}'
+LOCK_TIMEOUT: int = 60
+
+
+def count_key(group_id: Optional[int] = None) -> str:
+    return COUNT_KEY.format(
+        'all' if group_id is None else f'group:{group_id}'
+    )
+
+
+def author_count_key(author_id: int) -> str:
+    return COUNT_KEY.format(f'author:{author_id}')
+
+
+def bounded_count(queryset, limit: int) -> int:
+    """COUNT(*), который останавливается на limit строк."""
+    return queryset.order_by()[:limit].count()
+
+
+def cached_count(key: str, queryset, timeout: int) -> int:
+    """Точное количество, пересчитываемое не чаще раза в timeout."""
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def approximate_count(key: str, queryset) -> int:
+    count = cache.get(key)
+    if count is not None:
+        return count
+    limit = settings.POSTS_EXACT_COUNT_LIMIT
+    count = bounded_count(queryset, limit + 1)
+    if count > limit:
+        if not cache.add(LOCK_KEY.format(key), True, LOCK_TIMEOUT):
+            # счётчик уже пересчитывает другой запрос
+            return count
+        try:
+            count = queryset.count()
+        finally:
+            cache.delete(LOCK_KEY.format(key))
+    cache.set(key, count, settings.POSTS_COUNT_TTL)
+    return count
+
+
+def adjust_count(key: str, delta: int) -> None:
+    """Сдвигает счётчик, если он сейчас есть в кеше."""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # ключа нет: его посчитают заново при следующем запросе
+        pass
+
+
+class CountingPaginator(Paginator):
+    """Пагинатор ленты, который берёт число постов из счётчика."""
+
+    def __init__(self, object_list, per_page, count_key: str, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.count_key, self.object_list)
+
+    def page(self, number):
+        # число постов приблизительное, поэтому страница не обрезается
+        # по нему: последняя страница покажет всё, что есть в базе
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+    @property
+    def estimated(self) -> bool:
+        return self.count > settings.POSTS_EXACT_COUNT_LIMIT
@@ -0,0 +1,190 @@
+"""Удаление пользователей и групп порциями.
+
+Каскадное удаление автора с тысячами постов или обнуление группы
+у всех её постов одной транзакцией держит блокировку записи SQLite
+всё это время. Здесь зависимые строки удаляются небольшими порциями,
+каждая в своей транзакции, а между порциями блокировка отпускается.
+Файлы картинок удаляются после того, как строки уже удалены.
+
+Админка только ставит удаление в очередь PendingDeletion, а выполняет
+его команда delete_in_chunks --queue: запрос админки не ждёт, пока
+удалятся тысячи строк.
+
+Обнуление группы идёт через update() в обход сигналов, поэтому
+счётчики лент группы сдвигаются здесь же, после каждой порции.
+"""
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from core.auth import forget_cached_users
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import models, transaction
+
+from .archive import archive_author_count_key, archive_count_key
+from .counting import adjust_count, count_key
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                     PendingDeletion, Post)
+
+User = get_user_model()
+
+Progress = Optional[Callable[[str, int], None]]
+
+
+class ChunkedDeletion:
+    def __init__(self, chunk_size: int = None, pause: float = None,
+                 progress: Progress = None):
+        self.chunk_size = chunk_size or settings.DELETION_CHUNK_SIZE
+        self.pause = settings.DELETION_PAUSE if pause is None else pause
+        self.progress = progress
+        self.report = Counter()
+
+    def _chunks(self, queryset):
+        """Отдаёт порции id, пока queryset не опустеет."""
+        while True:
+            ids = list(
+                queryset.order_by('pk').values_list('pk', flat=True)[
+                    :self.chunk_size
+                ]
+            )
+            if not ids:
+                return
+            yield ids
+            # даём другим запросам получить блокировку записи
+            time.sleep(self.pause)
+
+    def _delete(self, label: str, queryset) -> None:
+        model = queryset.model
+        for ids in self._chunks(queryset):
+            with transaction.atomic():
+                model.objects.filter(pk__in=ids).delete()
+            self._done(label, len(ids))
+
+    def _done(self, label: str, count: int) -> None:
+        self.report[label] += count
+        if self.progress is not None:
+            self.progress(label, self.report[label])
+
+    def _delete_posts(self, queryset, comment_model=Comment) -> None:
+        model = queryset.model
+        for ids in self._chunks(queryset):
+            self._delete(
+                'comments', comment_model.objects.filter(post_id__in=ids)
+            )
+            rows = list(model.objects.filter(pk__in=ids).values_list(
+                'group_id', 'author_id'
+            ))
+            # картинки без ссылок удалит сигнал после коммита порции
+            with transaction.atomic():
+                model.objects.filter(pk__in=ids).delete()
+            if model is ArchivedPost:
+                # счётчики горячих лент сдвигают сигналы, архивные — нет
+                adjust_count(archive_count_key(), -len(ids))
+                for group_id, count in Counter(
+                    group_id for group_id, _ in rows
+                ).items():
+                    if group_id is not None:
+                        adjust_count(archive_count_key(group_id), -count)
+                for author_id, count in Counter(
+                    author_id for _, author_id in rows
+                ).items():
+                    adjust_count(archive_author_count_key(author_id), -count)
+            self._done('posts', len(ids))
+
+    def _delete_user_rows(self, user) -> None:
+        """Порциями удаляет все остальные строки, ссылающиеся на user.
+
+        Иначе их удалил бы каскад user.delete() одной транзакцией:
+        уведомления, их участники, рассылки, подписки на дайджест,
+        упоминания, рекомендации. Связи ищутся по модели, так что
+        сюда попадают и таблицы других приложений.
+        """
+        for relation in user._meta.get_fields(include_hidden=True):
+            if not (relation.one_to_many or relation.one_to_one):
+                continue
+            if not relation.auto_created or relation.concrete:
+                continue
+            if relation.on_delete is not models.CASCADE:
+                continue
+            model = relation.related_model
+            self._delete(
+                model._meta.model_name,
+                model.objects.filter(**{relation.field.name: user})
+            )
+
+    def delete_user(self, user) -> Counter:
+        self._delete('comments', Comment.objects.filter(author=user))
+        self._delete('comments', ArchivedComment.objects.filter(author=user))
+        self._delete('follows', Follow.objects.filter(user=user))
+        self._delete('follows', Follow.objects.filter(author=user))
+        self._delete_posts(Post.objects.filter(author=user))
+        self._delete_posts(
+            ArchivedPost.objects.filter(author=user), ArchivedComment
+        )
+        self._delete_user_rows(user)
+        user.delete()
+        self._done('users', 1)
+        return self.report
+
+    def delete_group(self, group: Group) -> Counter:
+        keys = {
+            Post: count_key(group.pk),
+            ArchivedPost: archive_count_key(group.pk),
+        }
+        for model in (Post, ArchivedPost):
+            posts = model.objects.filter(group=group)
+            for ids in self._chunks(posts):
+                with transaction.atomic():
+                    model.objects.filter(pk__in=ids).update(group=None)
+                adjust_count(keys[model], -len(ids))
+                self._done('detached', len(ids))
+        group.delete()
+        cache.delete_many(keys.values())
+        self._done('groups', 1)
+        return self.report
+
+
+def delete_user(user, **kwargs) -> Counter:
+    return ChunkedDeletion(**kwargs).delete_user(user)
+
+
+def delete_group(group: Group, **kwargs) -> Counter:
+    return ChunkedDeletion(**kwargs).delete_group(group)
+
+
+def enqueue_deletion(target) -> None:
+    """Ставит пользователя или группу в очередь на удаление."""
+    if isinstance(target, Group):
+        kind = PendingDeletion.GROUP
+    else:
+        kind = PendingDeletion.USER
+        # пока удаление ждёт очереди, пользователь не может войти;
+        # update() обходит сигналы, поэтому кеш пользователя для
+        # CachedAuthenticationMiddleware сбрасывается здесь
+        User.objects.filter(pk=target.pk).update(is_active=False)
+        transaction.on_commit(lambda: forget_cached_users([target.pk]))
+    PendingDeletion.objects.get_or_create(kind=kind, object_id=target.pk)
+
+
+def process_deletions(**kwargs) -> int:
+    """Выполняет удаления из очереди; возвращает их число.
+
+    Удаление порциями можно прервать и начать заново, поэтому запись
+    очереди убирается только после того, как объект удалён целиком.
+    """
+    done = 0
+    for pending in list(PendingDeletion.objects.all()):
+        deletion = ChunkedDeletion(**kwargs)
+        if pending.kind == PendingDeletion.GROUP:
+            group = Group.objects.filter(pk=pending.object_id).first()
+            if group is not None:
+                deletion.delete_group(group)
+        else:
+            user = User.objects.filter(pk=pending.object_id).first()
+            if user is not None:
+                deletion.delete_user(user)
+        pending.delete()
+        done += 1
+    return done
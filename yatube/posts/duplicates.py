@@ -0,0 +1,190 @@
+"""Поиск почти одинаковых постов через MinHash и LSH.
+
+Для каждого поста хранится MinHash-подпись множества его словесных
+шинглов. Подпись режется на полосы, и хеш каждой полосы записывается
+в индексированную таблицу корзин. Посты с похожими текстами с высокой
+вероятностью совпадают хотя бы в одной корзине, поэтому проверка
+нового текста — это по одному короткому индексированному запросу на
+полосу, а не сравнение со всеми постами. Из корзины берутся только
+самые новые посты, так что время проверки не растёт с размером
+кластера спама.
+"""
+import hashlib
+import re
+import zlib
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, PostBucket, PostSignature
+
+PERMUTATIONS: int = 128
+BANDS: int = 32
+ROWS: int = PERMUTATIONS // BANDS
+SHINGLE_SIZE: int = 3
+# дальше кандидатов не проверяем, чтобы проверка не зависела
+# от размера уже найденного кластера: из каждой корзины читаются
+# только самые новые посты
+MAX_CANDIDATES: int = 100
+BUCKET_CANDIDATES: int = 25
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+TOKEN_RE = re.compile(r'\w+')
+
+_random = np.random.RandomState(30)
+PERMUTATION_A = _random.randint(
+    1, 1 << 31, size=PERMUTATIONS, dtype=np.uint64
+)
+PERMUTATION_B = _random.randint(
+    0, 1 << 31, size=PERMUTATIONS, dtype=np.uint64
+)
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """Возвращает MinHash-подпись текста или None для коротких текстов."""
+    tokens = TOKEN_RE.findall(text.lower())
+    shingles = {
+        ' '.join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+    if len(shingles) < settings.POSTS_DUPLICATE_MIN_SHINGLES:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    permuted = (
+        (np.outer(hashes, PERMUTATION_A) + PERMUTATION_B) % MERSENNE_PRIME
+    ) & MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def lsh_buckets(signature: np.ndarray) -> List[int]:
+    """Хеши полос подписи; номер полосы входит в хеш."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(
+            bytes([band]) + rows, digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Оценка коэффициента Жаккара по двум подписям."""
+    return float(np.mean(first == second))
+
+
+def _signature_from_db(value) -> np.ndarray:
+    return np.frombuffer(bytes(value), dtype=np.uint32)
+
+
+def find_near_duplicates(
+    text: str, exclude: Optional[int] = None
+) -> List[Tuple[int, float]]:
+    """Возвращает пары (id поста, сходство) для похожих постов."""
+    signature = minhash(text)
+    if signature is None:
+        return []
+    # из корзины читается не больше BUCKET_CANDIDATES новых постов по
+    # индексу (bucket, post): строк не больше BANDS * BUCKET_CANDIDATES,
+    # сколько бы постов ни было в кластере
+    shared = Counter()
+    for bucket in lsh_buckets(signature):
+        shared.update(
+            PostBucket.objects.filter(bucket=bucket).exclude(
+                post_id=exclude
+            ).order_by('-post_id').values_list(
+                'post_id', flat=True
+            )[:BUCKET_CANDIDATES]
+        )
+    # первыми проверяются посты с наибольшим числом общих полос,
+    # при равенстве — новые
+    candidates = sorted(
+        shared, key=lambda post_id: (-shared[post_id], -post_id)
+    )
+    signatures = PostSignature.objects.filter(
+        post_id__in=list(candidates[:MAX_CANDIDATES])
+    ).values_list('post_id', 'minhash')
+    duplicates = [
+        (post_id, similarity(signature, _signature_from_db(value)))
+        for post_id, value in signatures
+    ]
+    return sorted(
+        (
+            (post_id, score) for post_id, score in duplicates
+            if score >= settings.POSTS_DUPLICATE_THRESHOLD
+        ),
+        key=lambda item: -item[1]
+    )
+
+
+def index_post(post: Post) -> None:
+    """Сохраняет подпись поста и его корзины LSH."""
+    signature = minhash(post.text)
+    with transaction.atomic():
+        PostBucket.objects.filter(post=post).delete()
+        if signature is None:
+            PostSignature.objects.filter(post=post).delete()
+            return
+        PostSignature.objects.update_or_create(
+            post=post, defaults={'minhash': signature.tobytes()}
+        )
+        PostBucket.objects.bulk_create(
+            PostBucket(post=post, bucket=bucket)
+            for bucket in lsh_buckets(signature)
+        )
+
+
+def duplicate_clusters(post_ids, limit: int = 100) -> List[List[Post]]:
+    """Группирует посты post_ids с постами из общих корзин LSH.
+
+    post_ids — список id или queryset из одного поля pk. Читаются только
+    корзины этих постов, а не вся таблица корзин.
+    """
+    checked = PostBucket.objects.filter(
+        post_id__in=post_ids
+    ).values('bucket')
+    rows = PostBucket.objects.filter(
+        bucket__in=checked
+    ).order_by('bucket', 'post_id').values_list('bucket', 'post_id')
+
+    # объединяем посты с общими корзинами в компоненты связности
+    parent = {}
+
+    def find(post_id):
+        parent.setdefault(post_id, post_id)
+        while parent[post_id] != post_id:
+            parent[post_id] = parent[parent[post_id]]
+            post_id = parent[post_id]
+        return post_id
+
+    first_in_bucket = {}
+    for bucket, post_id in rows:
+        root = find(post_id)
+        if bucket in first_in_bucket:
+            parent[root] = find(first_in_bucket[bucket])
+        else:
+            first_in_bucket[bucket] = post_id
+
+    clusters = {}
+    for post_id in parent:
+        clusters.setdefault(find(post_id), []).append(post_id)
+    # большие кластеры первыми, при равенстве — с более новыми постами
+    clusters = sorted(
+        (ids for ids in clusters.values() if len(ids) > 1),
+        key=lambda ids: (-len(ids), -max(ids))
+    )[:limit]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for ids in clusters for post_id in ids]
+    )
+    return [
+        [posts[post_id] for post_id in sorted(ids) if post_id in posts]
+        for ids in clusters
+    ]
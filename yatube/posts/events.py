@@ -0,0 +1,33 @@
+"""Уведомления о новых постах для открытых лент.
+
+Новый пост публикуется после коммита в общий канал, в канал своей
+группы и в канал автора. Лента подписчика слушает каналы всех
+авторов, на которых он подписан.
+"""
+from typing import List
+
+from core.events import Broker
+
+broker = Broker()
+
+ALL_CHANNEL: str = 'posts'
+
+
+def group_channel(group_id: int) -> str:
+    return f'group:{group_id}'
+
+
+def author_channel(author_id: int) -> str:
+    return f'author:{author_id}'
+
+
+def post_channels(post) -> List[str]:
+    channels = [ALL_CHANNEL, author_channel(post.author_id)]
+    if post.group_id is not None:
+        channels.append(group_channel(post.group_id))
+    return channels
+
+
+def publish_post(post) -> None:
+    for channel in post_channels(post):
+        broker.publish(channel)
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .duplicates import find_near_duplicates
+from .images import normalize_image
 from .models import Comment, Post
 
 
@@ -13,6 +16,20 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка',
         }
 
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if find_near_duplicates(text, exclude=self.instance.pk):
+            raise forms.ValidationError(
+                'Почти такой же пост уже опубликован'
+            )
+        return text
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
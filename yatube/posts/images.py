@@ -0,0 +1,58 @@
+"""Обработка картинок постов при загрузке.
+
+Картинка поворачивается по EXIF, уменьшается до POST_IMAGE_MAX_SIZE
+по большей стороне и пересохраняется в POST_IMAGE_FORMAT без
+метаданных. Если Pillow собран без WebP, используется JPEG.
+Анимированные картинки сохраняются как есть.
+"""
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image, ImageOps, features
+
+EXTENSIONS: dict = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def output_format() -> str:
+    if settings.POST_IMAGE_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return settings.POST_IMAGE_FORMAT
+
+
+def normalize_image(upload) -> File:
+    """Возвращает файл с обработанной картинкой вместо загруженного."""
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    upload.seek(0)
+    image = Image.open(upload)
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    # JPEG сразу декодируется в уменьшенном масштабе
+    image.draft('RGB', (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+    image_format = output_format()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        has_alpha = (
+            'A' in image.getbands() or 'transparency' in image.info
+        )
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    output = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    # без exif и icc_profile Pillow не переносит метаданные
+    image.save(
+        output,
+        image_format,
+        quality=settings.POST_IMAGE_QUALITY,
+        optimize=True,
+    )
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=f'{name}.{EXTENSIONS[image_format]}')
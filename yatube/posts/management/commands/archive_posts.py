@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Возраст поста в днях, по умолчанию '
+                 'POSTS_ARCHIVE_AFTER_DAYS',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Сколько постов переносить за одну транзакцию',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            help='Пауза между порциями, в секундах',
+        )
+
+    def progress(self, count):
+        self.stdout.write(f'posts: {count}')
+
+    def handle(self, *args, **options):
+        archived = archive_posts(
+            days=options['days'],
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            progress=self.progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено в архив: {archived}')
+        )
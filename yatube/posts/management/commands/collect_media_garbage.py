@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов, на которые больше нет ссылок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Сколько файлов сверять с базой за один запрос',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            help='Не трогать файлы моложе стольких секунд',
+        )
+
+    def handle(self, *args, **options):
+        progress = None
+        if options['verbosity'] > 1 or options['dry_run']:
+            progress = self.stdout.write
+        report = collect_garbage(
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            min_age=options['min_age'],
+            progress=progress,
+        )
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'Просмотрено файлов: {report["scanned"]}, '
+            f'{action.lower()}: {report["deleted"]}'
+        )
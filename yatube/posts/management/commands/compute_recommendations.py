@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import compute_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для подписки'
+
+    def handle(self, *args, **options):
+        count = compute_recommendations()
+        self.stdout.write(f'Пользователей с рекомендациями: {count}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг популярных постов'
+
+    def handle(self, *args, **options):
+        count = compute_trending()
+        self.stdout.write(f'Постов в рейтинге: {count}')
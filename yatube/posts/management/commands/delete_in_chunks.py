@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import ChunkedDeletion, process_deletions
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Удаляет пользователя или группу порциями, не блокируя базу'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', help='Имя пользователя')
+        target.add_argument('--group', help='Слаг группы')
+        target.add_argument(
+            '--queue',
+            action='store_true',
+            help='Удалить всё, что поставлено в очередь из админки',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Сколько строк удалять за одну транзакцию',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            help='Пауза между порциями, в секундах',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='С --queue проверять очередь каждые '
+                 'DELETION_QUEUE_INTERVAL секунд',
+        )
+
+    def progress(self, label, count):
+        self.stdout.write(f'{label}: {count}')
+
+    def handle_queue(self, options):
+        while True:
+            done = process_deletions(
+                chunk_size=options['chunk_size'],
+                pause=options['pause'],
+                progress=self.progress,
+            )
+            self.stdout.write(f'Удалено из очереди: {done}')
+            if not options['loop']:
+                return
+            time.sleep(settings.DELETION_QUEUE_INTERVAL)
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            self.handle_queue(options)
+            return
+        deletion = ChunkedDeletion(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            progress=self.progress,
+        )
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден'
+                )
+            deletion.delete_user(user)
+        else:
+            try:
+                group = Group.objects.get(slug=options['group'])
+            except Group.DoesNotExist:
+                raise CommandError(f'Группа {options["group"]} не найдена')
+            deletion.delete_group(group)
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.counters import flush_views
+from posts.models import Post
+
+CHUNK_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = 'Переносит накопленные в общем кеше просмотры постов в базу'
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            # у команды свой кеш процесса, счётчиков веб-сервера в нём нет
+            raise CommandError(
+                'Без общего кеша (DJANGO_MEMCACHED) просмотры сбрасывают '
+                'процессы веб-сервера сами'
+            )
+        flushed = 0
+        post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+        chunk = []
+        for post_id in post_ids.iterator():
+            chunk.append(post_id)
+            if len(chunk) == CHUNK_SIZE:
+                flushed += flush_views(chunk)
+                chunk = []
+        flushed += flush_views(chunk)
+        self.stdout.write(f'Перенесено просмотров: {flushed}')
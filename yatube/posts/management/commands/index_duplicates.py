@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.duplicates import index_post
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит MinHash-подписи постов, у которых их ещё нет'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.filter(
+            signature__isnull=True
+        ).only('pk', 'text').order_by('pk')
+        count = 0
+        for post in posts.iterator():
+            index_post(post)
+            count += 1
+        self.stdout.write(f'Обработано постов: {count}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import index_post_tags
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает теги и упоминания всех постов'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('pk', 'text', 'pub_date').order_by('pk')
+        count = 0
+        for post in posts.iterator():
+            index_post_tags(post)
+            count += 1
+        self.stdout.write(f'Обработано постов: {count}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.months import rebuild_month_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает помесячные счётчики постов для архива'
+
+    def handle(self, *args, **options):
+        count = rebuild_month_counts()
+        self.stdout.write(f'Месяцев в счётчиках: {count}')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.similarity import update_index
+
+
+class Command(BaseCommand):
+    help = 'Добавляет новые и изменённые посты в индекс похожих постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Построить индекс заново по всем постам',
+        )
+
+    def handle(self, *args, **options):
+        processed = update_index(rebuild=options['rebuild'])
+        self.stdout.write(f'Обработано постов: {processed}')
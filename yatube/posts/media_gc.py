@@ -0,0 +1,143 @@
+"""Сборка мусора в загруженных картинках постов.
+
+Файлы в MEDIA_ROOT/posts/ остаются на диске после замены картинки
+или удаления поста. Имена картинок из базы складываются в фильтр
+Блума, список файлов читается потоком через os.scandir, и всё,
+чего точно нет в фильтре, удаляется порциями вместе с миниатюрами.
+Ложные срабатывания фильтра только оставляют часть мусора до
+следующего запуска, но никогда не удаляют нужный файл.
+"""
+import hashlib
+import math
+import os
+import time
+from collections import Counter
+from typing import Iterable, Iterator, List
+
+import numpy as np
+from django.conf import settings
+from .models import ArchivedPost, Post
+from .storage import release_image
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, value: str) -> np.ndarray:
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return np.array(
+            [(first + i * second) % self.size for i in range(self.hashes)],
+            dtype=np.int64
+        )
+
+    def add(self, value: str) -> None:
+        positions = self._positions(value)
+        np.bitwise_or.at(
+            self.bits, positions >> 3,
+            (1 << (positions & 7)).astype(np.uint8)
+        )
+
+    def __contains__(self, value: str) -> bool:
+        positions = self._positions(value)
+        return bool(np.all(self.bits[positions >> 3] & (1 << (positions & 7))))
+
+
+def iter_files(root: str, min_age: float = 0) -> Iterator[str]:
+    """Отдаёт пути файлов относительно MEDIA_ROOT, не читая каталог целиком.
+
+    Файлы моложе min_age секунд пропускаются: пост с такой картинкой
+    может ещё не успеть сохраниться.
+    """
+    deadline = time.time() - min_age
+    stack = [os.path.join(settings.MEDIA_ROOT, root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.stat().st_mtime < deadline:
+                    yield os.path.relpath(
+                        entry.path, settings.MEDIA_ROOT
+                    ).replace(os.sep, '/')
+
+
+def referenced_images() -> BloomFilter:
+    """Картинки постов, в том числе архивных."""
+    querysets = [
+        model.objects.exclude(image='').values_list('image', flat=True)
+        for model in (Post, ArchivedPost)
+    ]
+    bloom = BloomFilter(
+        sum(images.count() for images in querysets),
+        settings.MEDIA_GC_ERROR_RATE
+    )
+    for images in querysets:
+        for name in images.iterator():
+            bloom.add(name)
+    return bloom
+
+
+def _batches(names: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def collect_garbage(dry_run: bool = False, batch_size: int = None,
+                    min_age: float = None, progress=None) -> Counter:
+    """Удаляет файлы картинок, на которые не ссылается ни один пост.
+
+    Возвращает счётчики просмотренных и удалённых файлов.
+    """
+    batch_size = batch_size or settings.MEDIA_GC_BATCH_SIZE
+    if min_age is None:
+        min_age = settings.MEDIA_GC_MIN_AGE
+    upload_to = Post._meta.get_field('image').upload_to
+    bloom = referenced_images()
+    report = Counter()
+
+    def orphans():
+        for name in iter_files(upload_to, min_age):
+            report['scanned'] += 1
+            if name not in bloom:
+                yield name
+
+    for batch in _batches(orphans(), batch_size):
+        # пост мог сослаться на файл уже после построения фильтра
+        used = set(
+            Post.objects.filter(image__in=batch).values_list(
+                'image', flat=True
+            )
+        ).union(
+            ArchivedPost.objects.filter(image__in=batch).values_list(
+                'image', flat=True
+            )
+        )
+        for name in batch:
+            if name in used:
+                continue
+            # release_image ещё раз проверит ссылки и заявки загрузок
+            # под блокировкой записи
+            if not dry_run and not release_image(name):
+                continue
+            if progress is not None:
+                progress(name)
+            report['deleted'] += 1
+    return report
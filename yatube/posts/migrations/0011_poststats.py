@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('views', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Просмотры')),
+            ],
+            options={
+                'verbose_name': 'Статистика поста',
+                'verbose_name_plural': 'Статистика постов',
+            },
+        ),
+    ]
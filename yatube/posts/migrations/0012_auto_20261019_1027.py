@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_poststats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('activity', models.FloatField(help_text='Взвешенная сумма событий на момент расчёта', verbose_name='Затухающая активность')),
+                ('views_seen', models.PositiveIntegerField(default=0, verbose_name='Учтённые просмотры')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('rank', models.PositiveIntegerField(unique=True, verbose_name='Место')),
+                ('computed', models.DateTimeField(verbose_name='Время расчёта')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddField(
+            model_name='poststats',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Обновлено'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_auto_20261019_1027'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('minhash', models.BinaryField(verbose_name='MinHash-подпись')),
+            ],
+            options={
+                'verbose_name': 'Подпись поста',
+                'verbose_name_plural': 'Подписи постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(verbose_name='Корзина LSH')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Корзина LSH',
+                'verbose_name_plural': 'Корзины LSH',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postbucket',
+            index=models.Index(fields=['bucket', 'post'], name='posts_bucket_idx'),
+        ),
+    ]
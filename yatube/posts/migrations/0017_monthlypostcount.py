@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_auto_20261019_1055'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Область')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('count', models.IntegerField(default=0, verbose_name='Постов')),
+            ],
+            options={
+                'verbose_name': 'Постов за месяц',
+                'verbose_name_plural': 'Постов по месяцам',
+                'ordering': ['-month'],
+                'unique_together': {('scope', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('marked', models.DateTimeField(verbose_name='Изменён')),
+            ],
+            options={
+                'verbose_name': 'Пост для переиндексации',
+                'verbose_name_plural': 'Посты для переиндексации',
+            },
+        ),
+    ]
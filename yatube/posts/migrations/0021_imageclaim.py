@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_dirtypost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageClaim',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('pending', models.PositiveIntegerField(default=0, verbose_name='Загрузок')),
+                ('claimed', models.DateTimeField(verbose_name='Последняя загрузка')),
+            ],
+            options={
+                'verbose_name': 'Загрузка картинки',
+                'verbose_name_plural': 'Загрузки картинок',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:05
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils.timezone import utc
+
+
+def count_current_views(apps, schema_editor):
+    # накопленные раньше просмотры не должны разом попасть в рейтинг
+    PostStats = apps.get_model('posts', 'PostStats')
+    PostStats.objects.update(trending_views=F('views'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_imageclaim'),
+    ]
+
+    operations = [
+        # время старых подписок неизвестно: они не считаются свежими
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=datetime.datetime(2000, 1, 1, 0, 0, tzinfo=utc), verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', 'created'], name='posts_follow_recent_idx'),
+        ),
+        migrations.AddField(
+            model_name='poststats',
+            name='trending_views',
+            field=models.PositiveIntegerField(default=0, verbose_name='Учтённые в рейтинге просмотры'),
+        ),
+        migrations.RunPython(count_current_views, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='trendingpost',
+            name='views_seen',
+        ),
+    ]
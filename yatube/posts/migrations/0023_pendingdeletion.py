@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_recent_follows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=8, verbose_name='Что удалить')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id')),
+                ('requested', models.DateTimeField(auto_now_add=True, verbose_name='Дата запроса')),
+            ],
+            options={
+                'verbose_name': 'Удаление в очереди',
+                'verbose_name_plural': 'Удаления в очереди',
+                'ordering': ('pk',),
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from collections import Counter
+from datetime import date, datetime
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def backfill_month_counts(apps, schema_editor):
+    # посты, созданные до 0017, в помесячные счётчики не попали
+    MonthlyPostCount = apps.get_model('posts', 'MonthlyPostCount')
+    counts = Counter()
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        rows = model.objects.annotate(
+            month=TruncMonth('pub_date')
+        ).values('month', 'author_id', 'group_id').annotate(
+            count=Count('pk')
+        ).order_by()
+        for row in rows.iterator():
+            month = row['month']
+            if isinstance(month, datetime):
+                month = timezone.localtime(month)
+                month = date(month.year, month.month, 1)
+            scopes = ['all', f'author:{row["author_id"]}']
+            if row['group_id'] is not None:
+                scopes.append(f'group:{row["group_id"]}')
+            for scope in scopes:
+                counts[scope, month] += row['count']
+    MonthlyPostCount.objects.all().delete()
+    MonthlyPostCount.objects.bulk_create(
+        (
+            MonthlyPostCount(scope=scope, month=month, count=count)
+            for (scope, month), count in counts.items()
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_pendingdeletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_month_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_backfill_month_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dirtypost',
+            name='post',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='posts.Post', verbose_name='Пост'),
+        ),
+    ]
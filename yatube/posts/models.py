@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import post_images
+
 User = get_user_model()
 
 
@@ -24,7 +26,8 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -45,7 +48,9 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=post_images,
+        blank=True,
+        db_index=True
     )
 
     def __str__(self) -> str:
@@ -104,3 +109,319 @@ class Follow(models.Model):
         verbose_name='Автор',
         related_name='following'
     )
+    created = models.DateTimeField(
+        'Дата подписки',
+        auto_now_add=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['author', 'created'], name='posts_follow_recent_idx'
+            ),
+        ]
+
+
+class PostStats(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пост'
+    )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        db_index=True
+    )
+    trending_views = models.PositiveIntegerField(
+        'Учтённые в рейтинге просмотры',
+        default=0
+    )
+    updated = models.DateTimeField(
+        'Обновлено',
+        auto_now=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика поста'
+        verbose_name_plural = 'Статистика постов'
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField('Балл')
+
+    class Meta:
+        ordering = ('-score', 'author_id')
+        unique_together = ('user', 'author')
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    activity = models.FloatField(
+        'Затухающая активность',
+        help_text='Взвешенная сумма событий на момент расчёта'
+    )
+    score = models.FloatField('Рейтинг')
+    rank = models.PositiveIntegerField('Место', unique=True)
+    computed = models.DateTimeField('Время расчёта')
+
+    class Meta:
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        ordering = ['rank']
+
+
+class ImageClaim(models.Model):
+    """Загрузки картинки, чьи посты ещё не сохранены в базе."""
+    name = models.CharField('Файл', max_length=255, primary_key=True)
+    pending = models.PositiveIntegerField('Загрузок', default=0)
+    claimed = models.DateTimeField('Последняя загрузка')
+
+    class Meta:
+        verbose_name = 'Загрузка картинки'
+        verbose_name_plural = 'Загрузки картинок'
+
+
+class DirtyPost(models.Model):
+    """Отредактированный или удалённый пост, который ждёт индекса похожих."""
+    # пометка удалённого поста переживает сам пост
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    marked = models.DateTimeField('Изменён')
+
+    class Meta:
+        verbose_name = 'Пост для переиндексации'
+        verbose_name_plural = 'Посты для переиндексации'
+
+
+class PendingDeletion(models.Model):
+    """Пользователь или группа, которых удалит delete_in_chunks --queue."""
+    USER = 'user'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+    kind = models.CharField('Что удалить', max_length=8, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id')
+    requested = models.DateTimeField('Дата запроса', auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        unique_together = ('kind', 'object_id')
+        verbose_name = 'Удаление в очереди'
+        verbose_name_plural = 'Удаления в очереди'
+
+
+class PostSignature(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Пост'
+    )
+    minhash = models.BinaryField('MinHash-подпись')
+
+    class Meta:
+        verbose_name = 'Подпись поста'
+        verbose_name_plural = 'Подписи постов'
+
+
+class PostBucket(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets',
+        verbose_name='Пост'
+    )
+    bucket = models.BigIntegerField('Корзина LSH')
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        indexes = [
+            models.Index(fields=['bucket', 'post'], name='posts_bucket_idx'),
+        ]
+
+
+class ArchivedPost(models.Model):
+    """Пост старше POSTS_ARCHIVE_AFTER_DAYS, перенесённый из Post.
+
+    id совпадает с id исходного поста, поэтому ссылки на пост не
+    меняются. Просмотры переносятся из PostStats в поле views.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=post_images,
+        blank=True,
+        db_index=True
+    )
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    archived = models.DateTimeField('Перенесён в архив', auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+    class Meta:
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['author', 'pub_date'], name='posts_archive_author_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='posts_archive_group_idx'
+            ),
+        ]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+    class Meta:
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        ordering = ['-created']
+
+
+class MonthlyPostCount(models.Model):
+    """Число постов за месяц: на всём сайте, в группе или у автора.
+
+    scope — 'all', 'group:<id>' или 'author:<id>', month — первое
+    число месяца.
+    """
+    scope = models.CharField('Область', max_length=32)
+    month = models.DateField('Месяц')
+    count = models.IntegerField('Постов', default=0)
+
+    class Meta:
+        verbose_name = 'Постов за месяц'
+        verbose_name_plural = 'Постов по месяцам'
+        ordering = ['-month']
+        unique_together = ('scope', 'month')
+
+
+class PostReference(models.Model):
+    """Ссылка из текста поста: горячего или уже перенесённого в архив.
+
+    pub_date копируется из поста, чтобы лента по тегу или упоминанию
+    читалась одним диапазоном индекса без соединения с постами.
+    """
+    post = models.ForeignKey(
+        Post,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        ArchivedPost,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Архивный пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    @property
+    def entry(self):
+        return self.post or self.archived_post
+
+    class Meta:
+        abstract = True
+        ordering = ['-pub_date']
+
+
+class Hashtag(PostReference):
+    tag = models.CharField('Тег', max_length=100)
+
+    class Meta(PostReference.Meta):
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+        indexes = [
+            models.Index(fields=['tag', 'pub_date'], name='posts_tag_idx'),
+        ]
+
+
+class Mention(PostReference):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь'
+    )
+
+    class Meta(PostReference.Meta):
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date'], name='posts_mention_idx'
+            ),
+        ]
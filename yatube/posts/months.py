@@ -0,0 +1,112 @@
+"""Помесячные счётчики постов для архива по датам.
+
+Навигация архива строится по маленькой таблице MonthlyPostCount, а не
+по GROUP BY над всеми постами. Счётчики ведутся для всего сайта, для
+каждой группы и каждого автора и сдвигаются сигналами при создании,
+удалении и переносе поста в другую группу. Посты, созданные в обход
+сигналов, учитывает команда rebuild_month_counts.
+"""
+import contextlib
+import threading
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedPost, MonthlyPostCount, Post
+
+SITE_SCOPE: str = 'all'
+
+_state = threading.local()
+
+
+def group_scope(group_id: int) -> str:
+    return f'group:{group_id}'
+
+
+def author_scope(author_id: int) -> str:
+    return f'author:{author_id}'
+
+
+def post_scopes(author_id: int, group_id: Optional[int]) -> List[str]:
+    scopes = [SITE_SCOPE, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def month_of(moment: datetime) -> date:
+    moment = timezone.localtime(moment)
+    return date(moment.year, moment.month, 1)
+
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Начало месяца и начало следующего; ValueError для неверной даты."""
+    start = datetime(year, month, 1)
+    if month == 12:
+        end = datetime(year + 1, 1, 1)
+    else:
+        end = datetime(year, month + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def counting_enabled() -> bool:
+    return not getattr(_state, 'suspended', False)
+
+
+@contextlib.contextmanager
+def moving_posts():
+    """Посты переносятся, а не исчезают: счётчики не трогаются."""
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = False
+
+
+def adjust_month(scopes: Iterable[str], month: date, delta: int) -> None:
+    for scope in scopes:
+        if delta > 0:
+            _, created = MonthlyPostCount.objects.get_or_create(
+                scope=scope, month=month, defaults={'count': delta}
+            )
+            if created:
+                continue
+        MonthlyPostCount.objects.filter(scope=scope, month=month).update(
+            count=F('count') + delta
+        )
+
+
+def month_counts(scope: str) -> List[MonthlyPostCount]:
+    """Непустые месяцы, самые новые сверху."""
+    return list(
+        MonthlyPostCount.objects.filter(scope=scope, count__gt=0)
+    )
+
+
+def rebuild_month_counts() -> int:
+    """Пересчитывает все счётчики по постам; возвращает число строк."""
+    counts = Counter()
+    for model in (Post, ArchivedPost):
+        rows = model.objects.annotate(
+            month=TruncMonth('pub_date')
+        ).values('month', 'author_id', 'group_id').annotate(
+            count=Count('pk')
+        ).order_by()
+        for row in rows.iterator():
+            month = row['month']
+            if isinstance(month, datetime):
+                month = month_of(month)
+            for scope in post_scopes(row['author_id'], row['group_id']):
+                counts[scope, month] += row['count']
+    with transaction.atomic():
+        MonthlyPostCount.objects.all().delete()
+        MonthlyPostCount.objects.bulk_create(
+            MonthlyPostCount(scope=scope, month=month, count=count)
+            for (scope, month), count in counts.items()
+        )
+    return len(counts)
@@ -0,0 +1,160 @@
+"""Рекомендации авторов для подписки.
+
+Граф подписок и связи авторов с группами загружаются в память
+в виде CSR-массивов: для вершины i её соседи лежат в
+indices[indptr[i]:indptr[i + 1]]. Рекомендации считаются пакетно для
+всех пользователей и записываются в таблицу Recommendation, поэтому
+страницы читают только готовый список и не обращаются к графу.
+Таблица, а не кеш: команда работает в своём процессе, и её результат
+должен быть виден всем процессам веб-сервера.
+"""
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Follow, Post, Recommendation
+
+User = get_user_model()
+
+INSERT_BATCH_SIZE: int = 1000
+
+
+class CSRGraph:
+    """Ориентированный граф в сжатом построчном формате."""
+
+    def __init__(self, sources, targets, size: int):
+        order = np.argsort(sources, kind='stable')
+        self.indices = np.asarray(targets, dtype=np.int64)[order]
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=size), out=self.indptr[1:]
+        )
+
+    def neighbours(self, vertex: int) -> np.ndarray:
+        return self.indices[self.indptr[vertex]:self.indptr[vertex + 1]]
+
+    def neighbours_of(self, vertices) -> np.ndarray:
+        """Соседи всех вершин из vertices, с повторами."""
+        if not len(vertices):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.neighbours(v) for v in vertices])
+
+
+def _load_graph():
+    """Загружает подписки и группы авторов в CSR-массивы.
+
+    Пользователи нумеруются позициями в отсортированном массиве их id,
+    группы — позициями в массиве id групп.
+    """
+    user_ids = np.fromiter(
+        User.objects.order_by('pk').values_list('pk', flat=True).iterator(),
+        dtype=np.int64
+    )
+    follows = np.array(
+        list(Follow.objects.values_list('user_id', 'author_id').iterator()),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    memberships = np.array(
+        list(
+            Post.objects.filter(group__isnull=False).values_list(
+                'author_id', 'group_id'
+            ).distinct().iterator()
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    author_ids = np.array(
+        list(Post.objects.values_list('author_id', flat=True).distinct()),
+        dtype=np.int64
+    )
+
+    group_ids, group_index = np.unique(memberships[:, 1], return_inverse=True)
+    member_index = np.searchsorted(user_ids, memberships[:, 0])
+    size = len(user_ids)
+    is_author = np.zeros(size, dtype=bool)
+    is_author[np.searchsorted(user_ids, author_ids)] = True
+    return (
+        user_ids,
+        is_author,
+        CSRGraph(
+            np.searchsorted(user_ids, follows[:, 0]),
+            np.searchsorted(user_ids, follows[:, 1]),
+            size
+        ),
+        CSRGraph(member_index, group_index, size),
+        CSRGraph(group_index, member_index, len(group_ids)),
+    )
+
+
+def _recommend_for(user, follows, user_groups, group_members, is_author):
+    """Возвращает пары (номер автора, балл) для пользователя user."""
+    weights = settings.RECOMMENDATIONS_WEIGHTS
+    followed = follows.neighbours(user)
+    friends_of_friends = follows.neighbours_of(followed)
+    same_group = group_members.neighbours_of(user_groups.neighbours(user))
+
+    candidates = np.concatenate([friends_of_friends, same_group])
+    if not len(candidates):
+        return []
+    scores = np.concatenate([
+        np.full(len(friends_of_friends), weights['friends_of_friends']),
+        np.full(len(same_group), weights['shared_groups']),
+    ])
+    candidates, inverse = np.unique(candidates, return_inverse=True)
+    scores = np.bincount(inverse, weights=scores)
+
+    allowed = is_author[candidates] & ~np.isin(candidates, followed)
+    allowed &= candidates != user
+    candidates, scores = candidates[allowed], scores[allowed]
+    top = np.lexsort((candidates, -scores))[:settings.RECOMMENDATIONS_COUNT]
+    return list(zip(candidates[top].tolist(), scores[top].tolist()))
+
+
+def compute_recommendations() -> int:
+    """Пересчитывает рекомендации всех пользователей и пишет их в базу.
+
+    Возвращает число пользователей, получивших рекомендации.
+    """
+    user_ids, is_author, follows, user_groups, group_members = _load_graph()
+
+    raw = {}
+    for user in range(len(user_ids)):
+        recommended = _recommend_for(
+            user, follows, user_groups, group_members, is_author
+        )
+        if recommended:
+            raw[int(user_ids[user])] = [
+                (int(user_ids[author]), score)
+                for author, score in recommended
+            ]
+
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(
+            (
+                Recommendation(user_id=user_id, author_id=author, score=score)
+                for user_id, items in raw.items()
+                for author, score in items
+            ),
+            batch_size=INSERT_BATCH_SIZE
+        )
+    return len(raw)
+
+
+def get_recommendations(user) -> List:
+    """Рекомендованные пользователю авторы, лучшие первыми."""
+    if not user.is_authenticated:
+        return []
+    return [
+        item.author
+        for item in Recommendation.objects.filter(
+            user=user
+        ).select_related('author')
+    ]
+
+
+def discard_recommendation(user, author) -> None:
+    """Убирает автора из рекомендаций после подписки на него."""
+    Recommendation.objects.filter(user=user, author=author).delete()
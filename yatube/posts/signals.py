@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .choices import forget_group_choices
+from .counting import adjust_count, author_count_key, count_key
+from .duplicates import index_post
+from .events import publish_post
+from .models import ArchivedPost, Group, MonthlyPostCount, Post
+from .months import (adjust_month, counting_enabled, group_scope, month_of,
+                     post_scopes)
+from .similarity import mark_dirty
+from .storage import release_image, settle_image
+from .tags import index_post_tags
+
+
+@receiver(post_save, sender=Post)
+def reindex_edited_post(sender, instance, created, **kwargs):
+    """Отредактированный пост пересчитывается в индексе похожих."""
+    if not created:
+        mark_dirty(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    """Удалённый пост убирается из индекса похожих при обновлении."""
+    mark_dirty(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post_signature(sender, instance, **kwargs):
+    """Подпись поста для поиска дубликатов обновляется при сохранении."""
+    index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post_references(sender, instance, **kwargs):
+    """Теги и упоминания поста пересобираются при сохранении."""
+    index_post_tags(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_choices(sender, **kwargs):
+    """Список групп в админке пересобирается после изменения групп."""
+    forget_group_choices()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_values(sender, instance, **kwargs):
+    """Запоминает картинку и группу поста до сохранения."""
+    if instance.image and not instance.image._committed:
+        # файл запишет FileField.pre_save уже после этого сигнала
+        instance._uploaded_image = True
+    if instance.pk is None:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'image', 'group_id'
+    ).first()
+    if previous is None:
+        return
+    image, group_id = previous
+    if image and image != instance.image.name:
+        instance._replaced_image = image
+    if group_id != instance.group_id:
+        instance._previous_group_id = group_id
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    """Старая картинка освобождается после замены."""
+    name = instance.__dict__.pop('_replaced_image', None)
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_save, sender=Post)
+def settle_uploaded_image(sender, instance, **kwargs):
+    """Заявка загрузки снимается, когда пост с картинкой закоммичен."""
+    if instance.__dict__.pop('_uploaded_image', False):
+        name = instance.image.name
+        transaction.on_commit(lambda: settle_image(name))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_deleted_image(sender, instance, **kwargs):
+    """Картинка удалённого поста освобождается после коммита."""
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    """Новый или перенесённый в другую группу пост меняет счётчики."""
+    month = month_of(instance.pub_date)
+    if created:
+        adjust_count(count_key(), 1)
+        adjust_count(author_count_key(instance.author_id), 1)
+        if instance.group_id is not None:
+            adjust_count(count_key(instance.group_id), 1)
+        adjust_month(
+            post_scopes(instance.author_id, instance.group_id), month, 1
+        )
+        return
+    if '_previous_group_id' not in instance.__dict__:
+        return
+    previous_group_id = instance.__dict__.pop('_previous_group_id')
+    if previous_group_id is not None:
+        adjust_count(count_key(previous_group_id), -1)
+        adjust_month([group_scope(previous_group_id)], month, -1)
+    if instance.group_id is not None:
+        adjust_count(count_key(instance.group_id), 1)
+        adjust_month([group_scope(instance.group_id)], month, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    adjust_count(count_key(), -1)
+    adjust_count(author_count_key(instance.author_id), -1)
+    if instance.group_id is not None:
+        adjust_count(count_key(instance.group_id), -1)
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_months(sender, instance, **kwargs):
+    """Посты удалённой группы остаются без группы, её месяцы не нужны."""
+    MonthlyPostCount.objects.filter(scope=group_scope(instance.pk)).delete()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def count_deleted_month(sender, instance, **kwargs):
+    """Удалённый пост, горячий или архивный, уходит из счётчиков месяцев."""
+    if counting_enabled():
+        adjust_month(
+            post_scopes(instance.author_id, instance.group_id),
+            month_of(instance.pub_date),
+            -1
+        )
+
+
+@receiver(post_save, sender=Post)
+def notify_new_post(sender, instance, created, **kwargs):
+    """Открытые ленты узнают о новом посте после коммита."""
+    if created:
+        transaction.on_commit(lambda: publish_post(instance))
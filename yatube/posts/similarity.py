@@ -0,0 +1,344 @@
+"""Индекс похожих постов.
+
+Текст поста превращается в вектор хешированных признаков с весами
+TF-IDF: слова раскладываются по корзинам хеша, частоты документов
+хранятся по корзинам, а сами веса сворачиваются в вектор небольшой
+фиксированной размерности со случайными знаками. Векторы всех постов
+лежат в файлах .npy и читаются через mmap.
+
+Каждая запись индекса — отдельный каталог-поколение с массивами и
+meta.json. Готовое поколение включается одной атомарной заменой файла
+CURRENT с его именем, поэтому читатель никогда не смешает массивы
+разных поколений. Предыдущее поколение остаётся на диске для тех, кто
+успел прочитать CURRENT до замены, более старые удаляются.
+
+Приближённый поиск соседей идёт по 16-битным кодам знаков случайных
+проекций: сначала отбираются посты с близким по Хэммингу кодом, и
+только для них считается косинусная близость.
+
+Индекс обновляет команда в отдельном процессе, поэтому всё, что она
+должна узнать от веб-сервера, лежит в базе: отредактированные и
+удалённые посты помечаются в таблице DirtyPost. Готовые списки похожих
+кешируются под ключом с версией индекса и устаревают сами, когда
+индекс пересобран.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DirtyPost, Post
+
+BUCKETS_BITS: int = 18
+BUCKETS: int = 1 << BUCKETS_BITS
+DIMENSIONS: int = 256
+CODE_BITS: int = 16
+CANDIDATES: int = 200
+MIN_SIMILARITY: float = 0.1
+REBUILD_CHUNK_SIZE: int = 1000
+# у SQLite ограничено число параметров в одном запросе
+QUERY_CHUNK_SIZE: int = 900
+
+RELATED_KEY: str = 'posts:related:{}:{}'
+CURRENT_FILE: str = 'CURRENT'
+ARRAYS = ('ids', 'vectors', 'codes', 'df')
+
+TOKEN_RE = re.compile(r'\w{2,}')
+POPCOUNT = np.array(
+    [bin(i).count('1') for i in range(1 << CODE_BITS)], dtype=np.uint8
+)
+PLANES = np.random.RandomState(29).standard_normal(
+    (DIMENSIONS, CODE_BITS)
+).astype(np.float32)
+
+_lock = threading.Lock()
+_loaded = {'stamp': None, 'index': None}
+
+
+def _buckets(text: str) -> np.ndarray:
+    tokens = TOKEN_RE.findall(text.lower())
+    return np.fromiter(
+        (zlib.crc32(token.encode()) for token in tokens),
+        dtype=np.uint32,
+        count=len(tokens)
+    )
+
+
+def _encode(vectors: np.ndarray) -> np.ndarray:
+    bits = (vectors @ PLANES) > 0
+    return (bits * (1 << np.arange(CODE_BITS))).sum(axis=1).astype(np.uint16)
+
+
+class SimilarityIndex:
+    def __init__(self, ids, vectors, codes, df, n_docs: int, last_id: int):
+        self.ids = ids
+        self.vectors = vectors
+        self.codes = codes
+        self.df = df
+        self.n_docs = n_docs
+        self.last_id = last_id
+        # меняется с каждой записью индекса на диск
+        self.version = 0
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, dtype=np.int64),
+            np.empty((0, DIMENSIONS), dtype=np.float32),
+            np.empty(0, dtype=np.uint16),
+            np.zeros(BUCKETS, dtype=np.int32),
+            0,
+            0
+        )
+
+    def embed(self, text: str) -> np.ndarray:
+        """Возвращает нормированный вектор текста."""
+        hashes = _buckets(text)
+        vector = np.zeros(DIMENSIONS, dtype=np.float32)
+        if not len(hashes):
+            return vector
+        hashes, counts = np.unique(hashes, return_counts=True)
+        buckets = hashes & (BUCKETS - 1)
+        idf = np.log((1 + self.n_docs) / (1 + self.df[buckets])) + 1
+        weights = (1 + np.log(counts)) * idf
+        # старшие биты хеша задают координату и знак признака
+        dimensions = (hashes >> BUCKETS_BITS) % DIMENSIONS
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        np.add.at(vector, dimensions, signs * weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add_document_frequencies(self, text: str) -> None:
+        buckets = np.unique(_buckets(text) & (BUCKETS - 1))
+        self.df[buckets] += 1
+        self.n_docs += 1
+
+    def nearest(self, vector: np.ndarray, k: int, exclude=None):
+        """Возвращает до k пар (id поста, близость)."""
+        if not len(self.ids) or not vector.any():
+            return []
+        code = _encode(vector[np.newaxis])[0]
+        distances = POPCOUNT[self.codes ^ code]
+        # точную близость считаем только для постов с ближайшими кодами
+        candidates = np.arange(len(distances))
+        if len(distances) > CANDIDATES:
+            candidates = np.argpartition(distances, CANDIDATES)[:CANDIDATES]
+        if exclude is not None:
+            candidates = candidates[self.ids[candidates] != exclude]
+        scores = self.vectors[candidates] @ vector
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores)
+        return [
+            (int(self.ids[i]), float(score))
+            for i, score in zip(candidates[order], scores[order])
+            if score >= MIN_SIMILARITY
+        ]
+
+    @staticmethod
+    def current() -> str:
+        return os.path.join(settings.SIMILARITY_INDEX_DIR, CURRENT_FILE)
+
+    @classmethod
+    def load(cls, mmap_mode=None):
+        try:
+            with open(cls.current()) as current_file:
+                generation = current_file.read().strip()
+        except FileNotFoundError:
+            return cls.empty()
+        root = os.path.join(settings.SIMILARITY_INDEX_DIR, generation)
+        with open(os.path.join(root, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        loaded = {
+            name: np.load(
+                os.path.join(root, f'{name}.npy'), mmap_mode=mmap_mode
+            )
+            for name in ARRAYS
+        }
+        index = cls(n_docs=meta['n_docs'], last_id=meta['last_id'], **loaded)
+        index.version = int(generation)
+        return index
+
+    def save(self) -> None:
+        """Записывает новое поколение и включает его заменой CURRENT."""
+        base = settings.SIMILARITY_INDEX_DIR
+        os.makedirs(base, exist_ok=True)
+        generation = str(time.time_ns())
+        root = os.path.join(base, generation)
+        os.makedirs(root)
+        for name in ARRAYS:
+            with open(os.path.join(root, f'{name}.npy'), 'wb') as array_file:
+                np.save(array_file, np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(root, 'meta.json'), 'w') as meta_file:
+            json.dump({'n_docs': self.n_docs, 'last_id': self.last_id},
+                      meta_file)
+
+        current = self.current()
+        previous = None
+        if os.path.exists(current):
+            with open(current) as current_file:
+                previous = current_file.read().strip()
+        with open(f'{current}.tmp', 'w') as current_file:
+            current_file.write(generation)
+        os.replace(f'{current}.tmp', current)
+        self.version = int(generation)
+
+        for name in os.listdir(base):
+            path = os.path.join(base, name)
+            if name not in (generation, previous) and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def get_index() -> SimilarityIndex:
+    """Возвращает индекс, перечитывая его после пересборки."""
+    try:
+        stat = os.stat(SimilarityIndex.current())
+    except FileNotFoundError:
+        return SimilarityIndex.empty()
+    # замена CURRENT всегда даёт новый inode, даже в пределах одного
+    # такта часов файловой системы
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    with _lock:
+        if _loaded['stamp'] != stamp:
+            _loaded['index'] = SimilarityIndex.load(mmap_mode='r')
+            _loaded['stamp'] = stamp
+        return _loaded['index']
+
+
+def _related_key(version: int, post_id: int) -> str:
+    return RELATED_KEY.format(version, post_id)
+
+
+def _embed_chunk(index: SimilarityIndex, rows):
+    """Векторы порции новых постов; частоты слов учитываются сразу."""
+    for _, text in rows:
+        index.add_document_frequencies(text)
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    vectors = np.array(
+        [index.embed(text) for _, text in rows], dtype=np.float32
+    ).reshape(-1, DIMENSIONS)
+    return ids, vectors
+
+
+def _append_new_posts(index: SimilarityIndex) -> int:
+    """Добавляет в индекс посты новее last_id; массивы склеиваются раз."""
+    id_chunks, vector_chunks = [index.ids], [index.vectors]
+    rows = []
+    new_posts = Post.objects.filter(
+        pk__gt=index.last_id
+    ).order_by('pk').values_list('pk', 'text')
+    for row in new_posts.iterator():
+        rows.append(row)
+        if len(rows) == REBUILD_CHUNK_SIZE:
+            ids, vectors = _embed_chunk(index, rows)
+            id_chunks.append(ids)
+            vector_chunks.append(vectors)
+            rows = []
+    if rows:
+        ids, vectors = _embed_chunk(index, rows)
+        id_chunks.append(ids)
+        vector_chunks.append(vectors)
+    added = sum(len(ids) for ids in id_chunks[1:])
+    if added:
+        new_vectors = np.concatenate(vector_chunks[1:])
+        index.ids = np.concatenate(id_chunks)
+        index.vectors = np.concatenate(vector_chunks)
+        index.codes = np.concatenate([index.codes, _encode(new_vectors)])
+        index.last_id = int(index.ids[-1])
+    return added
+
+
+def update_index(rebuild: bool = False) -> int:
+    """Добавляет в индекс новые посты и пересчитывает изменённые.
+
+    Возвращает число обработанных постов.
+    """
+    # пометки, сделанные после этого момента, доживут до следующего раза
+    started = timezone.now()
+    index = SimilarityIndex.empty() if rebuild else SimilarityIndex.load()
+    dirty = [] if rebuild else list(
+        DirtyPost.objects.filter(
+            marked__lte=started
+        ).values_list('post_id', flat=True)
+    )
+
+    processed = _append_new_posts(index)
+
+    # изменённые посты пересчитываются на месте, частоты слов
+    # уточнятся при следующей полной пересборке; помеченных, но
+    # исчезнувших из базы постов больше нет — они убираются из индекса
+    edited = [pk for pk in dirty if pk <= index.last_id]
+    deleted = []
+    for start in range(0, len(edited), QUERY_CHUNK_SIZE):
+        chunk = edited[start:start + QUERY_CHUNK_SIZE]
+        rows = dict(Post.objects.filter(
+            pk__in=chunk
+        ).values_list('pk', 'text'))
+        deleted.extend(pk for pk in chunk if pk not in rows)
+        for post_id, text in rows.items():
+            position = np.searchsorted(index.ids, post_id)
+            if position < len(index.ids) and index.ids[position] == post_id:
+                vector = index.embed(text)
+                index.vectors[position] = vector
+                index.codes[position] = _encode(vector[np.newaxis])[0]
+                processed += 1
+    if deleted:
+        kept = ~np.isin(index.ids, deleted)
+        processed += len(index.ids) - int(kept.sum())
+        index.ids = index.ids[kept]
+        index.vectors = index.vectors[kept]
+        index.codes = index.codes[kept]
+
+    # новая версия индекса сама делает устаревшими кешированные списки
+    index.save()
+    DirtyPost.objects.filter(marked__lte=started).delete()
+    return processed
+
+
+def mark_dirty(post_id: int) -> None:
+    """Помечает отредактированный или удалённый пост для индекса."""
+    now = timezone.now()
+    if not DirtyPost.objects.filter(post_id=post_id).update(marked=now):
+        DirtyPost.objects.bulk_create(
+            [DirtyPost(post_id=post_id, marked=now)], ignore_conflicts=True
+        )
+    cache.delete(_related_key(get_index().version, post_id))
+
+
+def related_posts(post: Post) -> List[dict]:
+    """Возвращает похожие посты, кешируя результат для каждого поста."""
+    index = get_index()
+    key = _related_key(index.version, post.pk)
+    related = cache.get(key)
+    if related is not None:
+        return related
+
+    position = np.searchsorted(index.ids, post.pk)
+    if position < len(index.ids) and index.ids[position] == post.pk:
+        vector = np.asarray(index.vectors[position])
+    else:
+        # пост ещё не попал в индекс
+        vector = index.embed(post.text)
+    nearest = index.nearest(
+        vector, settings.RELATED_POSTS_COUNT, exclude=post.pk
+    )
+    posts = Post.objects.only('text').in_bulk(
+        [post_id for post_id, _ in nearest]
+    )
+    related = [
+        {'pk': post_id, 'text': posts[post_id].text}
+        for post_id, _ in nearest
+        if post_id in posts
+    ]
+    cache.set(key, related, settings.RELATED_POSTS_CACHE_TTL)
+    return related
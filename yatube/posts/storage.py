@@ -0,0 +1,138 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Файл называется sha256 своего содержимого и лежит в каталоге из первых
+байтов хеша: posts/ab/cd/abcd….jpg. Одинаковые загрузки получают одно
+имя, поэтому второй копии на диске нет, а sorl-thumbnail находит уже
+готовые миниатюры по тому же ключу. Сколько постов ссылается на файл,
+видно по индексированному полю Post.image; файл удаляется, когда
+ссылок не остаётся.
+
+Загрузка, которая переиспользует существующий файл, сначала заявляет
+его в таблице ImageClaim, а заявка снимается после коммита поста.
+release_image удаляет файл в той же транзакции, что проверяет заявки
+и ссылки, поэтому файл не пропадёт между проверкой «уже есть» в save
+и сохранением нового поста. Заявки загрузок, чей пост так и не
+сохранился, перестают действовать через IMAGE_CLAIM_TIMEOUT секунд.
+"""
+import hashlib
+import posixpath
+from datetime import timedelta
+
+from core.templatetags.responsive_images import forget_renditions
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+SHARD_DEPTH: int = 2
+SHARD_WIDTH: int = 2
+
+
+def content_hash(content) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """posts/photo.JPG -> posts/ab/cd/abcd….jpg"""
+    shards = [
+        digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+        for i in range(SHARD_DEPTH)
+    ]
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(
+        posixpath.dirname(name), *shards, digest + extension
+    )
+
+
+def claim_image(name: str) -> None:
+    from .models import ImageClaim
+
+    now = timezone.now()
+    claimed = ImageClaim.objects.filter(name=name).update(
+        pending=F('pending') + 1, claimed=now
+    )
+    if not claimed:
+        ImageClaim.objects.create(name=name, pending=1, claimed=now)
+
+
+def settle_image(name: str) -> None:
+    """Снимает заявку загрузки, чей пост уже в базе."""
+    from .models import ImageClaim
+
+    ImageClaim.objects.filter(name=name, pending__gt=0).update(
+        pending=F('pending') - 1
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content_hash(content))
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f'Имя файла {name} длиннее {max_length} символов'
+            )
+        with transaction.atomic():
+            # заявка блокирует release_image до конца этой транзакции
+            claim_image(name)
+            if self.exists(name):
+                # такой файл уже загружали
+                return name
+        available = self.get_available_name(name, max_length=max_length)
+        if available != name:
+            # файл с тем же хешем записывают одновременно с нами
+            settle_image(name)
+            claim_image(available)
+        return self._save(available, content)
+
+
+post_images = ContentAddressedStorage()
+
+
+def delete_image(name: str) -> None:
+    """Удаляет файл картинки вместе с миниатюрами."""
+    delete_thumbnails(ImageFile(name, storage=post_images))
+    forget_renditions(name)
+
+
+def release_image(name: str) -> bool:
+    """Удаляет картинку, если на неё не ссылаются посты и загрузки.
+
+    Возвращает True, если файл удалён.
+    """
+    from .models import ArchivedPost, ImageClaim, Post
+
+    if not name:
+        return False
+    stale = timezone.now() - timedelta(seconds=settings.IMAGE_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        # запись берёт блокировку раньше чтений: загрузка того же файла
+        # подождёт, пока файл не будет удалён или оставлен
+        ImageClaim.objects.filter(
+            name=name, claimed__lt=stale
+        ).update(pending=0)
+        if (
+            ImageClaim.objects.select_for_update().filter(
+                name=name, pending__gt=0
+            ).exists()
+            or Post.objects.filter(image=name).exists()
+            or ArchivedPost.objects.filter(image=name).exists()
+        ):
+            return False
+        ImageClaim.objects.filter(name=name).delete()
+        delete_image(name)
+    return True
@@ -0,0 +1,62 @@
+"""Теги (#тег) и упоминания (@username) в текстах постов.
+
+При сохранении поста теги и упоминания выписываются в таблицы
+Hashtag и Mention с индексами (tag, pub_date) и (user, pub_date).
+Лента по тегу или упоминаниям — один диапазон индекса, а не LIKE по
+текстам всех постов. При переносе поста в архив ссылки переходят на
+архивную копию и остаются в лентах.
+"""
+import re
+from typing import List
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .models import Hashtag, Mention
+
+User = get_user_model()
+
+# & в начале исключает сущности вида &#x27; в экранированном тексте
+TAG_RE = re.compile(r'(?<![\w#&])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})')
+
+
+def parse_tags(text: str) -> List[str]:
+    """Теги текста в нижнем регистре, без повторов, в порядке появления."""
+    return list(dict.fromkeys(tag.lower() for tag in TAG_RE.findall(text)))
+
+
+def parse_mentions(text: str) -> List[str]:
+    # точка в конце — обычно конец предложения, а не часть имени
+    return list(dict.fromkeys(
+        name.rstrip('.') for name in MENTION_RE.findall(text)
+    ))
+
+
+def index_post_tags(post) -> None:
+    """Пересобирает теги и упоминания поста по его тексту."""
+    tags = parse_tags(post.text)
+    names = parse_mentions(post.text)
+    user_ids = User.objects.filter(
+        username__in=names
+    ).values_list('pk', flat=True) if names else []
+    with transaction.atomic():
+        Hashtag.objects.filter(post=post).delete()
+        Mention.objects.filter(post=post).delete()
+        Hashtag.objects.bulk_create(
+            Hashtag(post=post, tag=tag, pub_date=post.pub_date)
+            for tag in tags
+        )
+        Mention.objects.bulk_create(
+            Mention(post=post, user_id=user_id, pub_date=post.pub_date)
+            for user_id in user_ids
+        )
+
+
+def move_to_archive(post_ids) -> None:
+    """Переводит ссылки постов post_ids на их архивные копии."""
+    for model in (Hashtag, Mention):
+        model.objects.filter(post_id__in=post_ids).update(
+            archived_post_id=F('post_id'), post=None
+        )
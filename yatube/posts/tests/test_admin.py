@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.choices import get_group_choices
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@ya.ru', password='admin'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.admin, text=f'Тестовый пост {i}', group=cls.group)
+            for i in range(5)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(PostAdminTests.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Строки списка не добавляют запросов к базе."""
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        Post.objects.create(
+            author=PostAdminTests.admin,
+            text='Ещё один пост',
+            group=PostAdminTests.group
+        )
+        with self.assertNumQueries(5):
+            self.client.get(url)
+
+    def test_keyset_navigation(self):
+        """Параметр before показывает записи старше курсора."""
+        before = Post.objects.order_by('-pk')[1].pk
+        response = self.client.get(
+            reverse('admin:posts_post_changelist') + f'?before={before}'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        pks = [post.pk for post in response.context['cl'].result_list]
+        self.assertTrue(all(pk < before for pk in pks))
+        self.assertEqual(len(pks), 3)
+
+    def test_group_choices_are_invalidated(self):
+        """Общий список групп обновляется после создания группы."""
+        self.assertEqual(len(get_group_choices()), 2)
+        Group.objects.create(
+            title='Новая группа', slug='new-slug', description='Описание'
+        )
+        self.assertEqual(len(get_group_choices()), 3)
@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts.archive import archive_posts
+from posts.counting import author_count_key
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                          Post, PostStats)
+
+User = get_user_model()
+
+
+@override_settings(POSTS_COUNT_PER_PAGE=10, POSTS_ARCHIVE_AFTER_DAYS=30)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(13)
+        ]
+        cls.old_posts = posts[:5]
+        cls.hot_posts = posts[5:]
+        # первые пять постов опубликованы больше 30 дней назад
+        for days, post in enumerate(reversed(cls.old_posts), 31):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=days)
+            )
+        cls.comment = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Комментарий'
+        )
+        PostStats.objects.create(post=cls.old_posts[0], views=7)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ArchiveTests.user)
+        self.archived = archive_posts(pause=0)
+
+    def test_old_posts_are_moved(self):
+        """Старые посты с комментариями и просмотрами уходят в архив."""
+        old_ids = [post.pk for post in ArchiveTests.old_posts]
+        self.assertEqual(self.archived, 5)
+        self.assertFalse(Post.objects.filter(pk__in=old_ids).exists())
+        self.assertEqual(Post.objects.count(), 8)
+        archived = ArchivedPost.objects.get(pk=old_ids[0])
+        self.assertEqual(archived.text, 'Пост 0')
+        self.assertEqual(archived.views, 7)
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=ArchiveTests.comment.pk).post,
+            archived
+        )
+        self.assertEqual(archive_posts(pause=0), 0)
+
+    def test_feed_continues_into_archive(self):
+        """Лента дочитывает архив после горячих постов."""
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 13)
+        texts = [post.text for post in page_obj]
+        self.assertEqual(texts[:8], [f'Пост {i}' for i in range(12, 4, -1)])
+        self.assertEqual(texts[8:], ['Пост 4', 'Пост 3'])
+
+        response = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост 2', 'Пост 1', 'Пост 0']
+        )
+
+        response = self.client.get(
+            reverse('posts:profile', args=['author']) + '?page=2'
+        )
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_first_page_does_not_read_archive(self):
+        """Страница из одних горячих постов не обращается к архиву."""
+        Post.objects.bulk_create(
+            Post(author=ArchiveTests.user, text='Ещё пост') for _ in range(2)
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']][-1],
+            'Пост 5'
+        )
+        self.assertTrue(all(
+            isinstance(post, Post) for post in response.context['page_obj']
+        ))
+
+    def test_fragments_continue_into_archive(self):
+        """Бесконечная прокрутка переходит в архив по тому же курсору."""
+        url = reverse('posts:index_fragment')
+        response = self.client.get(url)
+        content = response.content.decode()
+        self.assertEqual(content.count('<article>'), 10)
+        self.assertIn('Пост 3', content)
+
+        response = self.client.get(response['X-Next-Page'])
+        content = response.content.decode()
+        self.assertEqual(content.count('<article>'), 3)
+        self.assertIn('Пост 0', content)
+        self.assertEqual(response['X-Next-Page'], '')
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается, но комментировать его нельзя."""
+        post_id = ArchiveTests.old_posts[0].pk
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post_id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertFalse(response.context['is_edit'])
+        self.assertEqual(response.context['views'], 7)
+        self.assertEqual(response.context['post_count'], 13)
+        self.assertContains(response, 'Комментарий')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[post_id])
+        )
+
+        response = self.client.post(
+            reverse('posts:add_comment', args=[post_id]),
+            {'text': 'Новый комментарий'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_author_feeds_do_not_count_posts(self):
+        """Профиль и страница поста берут число постов из счётчиков."""
+        urls = [
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[ArchiveTests.hot_posts[0].pk]),
+        ]
+        # первый запрос заполняет счётчики автора в кеше
+        self.client.get(urls[0])
+        Post.objects.create(author=ArchiveTests.user, text='Новый пост')
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.context['post_count'], 14)
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] and 'post"' in query['sql']
+                    for query in queries.captured_queries
+                ))
+
+    def test_archive_pages_use_exact_offset(self):
+        """Устаревший счётчик горячей части не сдвигает страницы архива."""
+        self.client.get(reverse('posts:profile', args=['author']))
+        cache.set(author_count_key(ArchiveTests.user.pk), 12)
+        response = self.client.get(
+            reverse('posts:profile', args=['author']) + '?page=2'
+        )
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост 2', 'Пост 1', 'Пост 0']
+        )
+
+    def test_follow_feed_continues_into_archive(self):
+        """Лента подписок листается по курсору и дочитывает архив."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=ArchiveTests.user)
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+
+        response = self.client.get(
+            reverse('posts:follow_index')
+            + f'?after={page_obj.next_cursor}&page=2'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            [post.text for post in page_obj], ['Пост 2', 'Пост 1', 'Пост 0']
+        )
+        self.assertEqual(page_obj.number, 2)
+        self.assertFalse(page_obj.has_next())
@@ -0,0 +1,88 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(5)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def test_html_is_gzipped(self):
+        """HTML сжимается, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('<html', gzip.decompress(response.content).decode())
+
+    def test_no_compression_without_accept_encoding(self):
+        """Без Accept-Encoding ответ не сжимается."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 7)
+    def test_small_responses_are_not_compressed(self):
+        """Ответы меньше COMPRESSION_MIN_SIZE отдаются как есть."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(
+        POST_DETAIL_STREAMING_THRESHOLD=2, STREAMING_CHUNK_SIZE=2
+    )
+    def test_post_detail_is_streamed(self):
+        """Пост с большим числом комментариев отдаётся потоком."""
+        url = reverse(
+            'posts:post_detail', kwargs={'post_id': CompressionTests.post.pk}
+        )
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for i in range(5):
+            self.assertIn(f'Комментарий {i}', content)
+        self.assertTrue(content.rstrip().endswith('</body>'))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn('Комментарий 4', content.decode())
+
+    def test_post_detail_does_not_count_comments(self):
+        """Решение о потоковой выдаче не требует COUNT комментариев."""
+        url = reverse(
+            'posts:post_detail', kwargs={'post_id': CompressionTests.post.pk}
+        )
+        for threshold in (2, 100):
+            with self.subTest(threshold=threshold):
+                with self.settings(POST_DETAIL_STREAMING_THRESHOLD=threshold):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                        content = b''.join(
+                            response.streaming_content
+                        ) if response.streaming else response.content
+                self.assertEqual(content.decode().count('Комментарий '), 5)
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] and 'comment"' in query['sql']
+                    for query in queries.captured_queries
+                ))
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.counters import (flush_views, get_pending_views, get_views,
+                            register_view)
+from posts.models import Post, PostStats
+
+User = get_user_model()
+
+
+@override_settings(
+    POST_VIEWS_FLUSH_INTERVAL=3600,
+    POST_VIEWS_FLUSH_THRESHOLD=100
+)
+class PostViewsCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='APushkin')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        flush_views()
+
+    def test_views_are_pending_until_flush(self):
+        """Просмотры копятся в кеше и учитываются при чтении."""
+        post_id = PostViewsCounterTests.post.pk
+        for _ in range(3):
+            register_view(post_id)
+
+        self.assertFalse(PostStats.objects.filter(post_id=post_id).exists())
+        self.assertEqual(get_views(post_id), 3)
+
+        self.assertEqual(flush_views(), 3)
+        self.assertEqual(PostStats.objects.get(post_id=post_id).views, 3)
+        self.assertEqual(get_pending_views([post_id]), {})
+        self.assertEqual(get_views(post_id), 3)
+
+    def test_flush_adds_to_existing_stats(self):
+        """Повторный сброс прибавляет просмотры к уже записанным."""
+        post_id = PostViewsCounterTests.post.pk
+        PostStats.objects.create(post_id=post_id, views=10)
+        register_view(post_id)
+        flush_views()
+        self.assertEqual(PostStats.objects.get(post_id=post_id).views, 11)
+
+    @override_settings(POST_VIEWS_FLUSH_THRESHOLD=1)
+    def test_flush_on_threshold(self):
+        """Счётчики сбрасываются в базу по достижении порога."""
+        register_view(PostViewsCounterTests.post.pk)
+        self.assertEqual(
+            PostStats.objects.get(post_id=PostViewsCounterTests.post.pk).views,
+            1
+        )
+
+    def test_post_detail_counts_views(self):
+        """Страница поста учитывает и показывает просмотры."""
+        url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': PostViewsCounterTests.post.pk}
+        )
+        client = Client()
+        client.get(url)
+        response = client.get(url)
+        self.assertEqual(response.context['views'], 2)
+
+    def test_command_requires_shared_cache(self):
+        """Команда сбрасывает счётчики только из общего кеша."""
+        register_view(PostViewsCounterTests.post.pk)
+        with self.assertRaises(CommandError):
+            call_command('flush_post_views', stdout=StringIO())
+        self.assertFalse(PostStats.objects.exists())
+
+        # в тестах кеш один на процесс и ведёт себя как общий
+        with self.settings(SHARED_CACHE=True):
+            call_command('flush_post_views', stdout=StringIO())
+        self.assertEqual(
+            PostStats.objects.get(post_id=PostViewsCounterTests.post.pk).views,
+            1
+        )
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.counting import CountingPaginator, approximate_count, count_key
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ApproximateCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(3)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def test_count_is_cached(self):
+        """Повторный подсчёт берётся из кеша без запроса."""
+        self.assertEqual(approximate_count(count_key(), Post.objects), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                approximate_count(count_key(), Post.objects), 3
+            )
+
+    def test_counters_follow_signals(self):
+        """Создание, перенос и удаление поста сдвигают счётчики."""
+        group_key = count_key(ApproximateCountTests.group.pk)
+        other_key = count_key(ApproximateCountTests.other_group.pk)
+        approximate_count(count_key(), Post.objects)
+        approximate_count(group_key, ApproximateCountTests.group.posts)
+        approximate_count(other_key, ApproximateCountTests.other_group.posts)
+
+        post = Post.objects.create(
+            author=ApproximateCountTests.user,
+            text='Новый пост',
+            group=ApproximateCountTests.group,
+        )
+        self.assertEqual(cache.get(count_key()), 4)
+        self.assertEqual(cache.get(group_key), 4)
+
+        post.group = ApproximateCountTests.other_group
+        post.save()
+        self.assertEqual(cache.get(group_key), 3)
+        self.assertEqual(cache.get(other_key), 1)
+
+        post.delete()
+        self.assertEqual(cache.get(count_key()), 3)
+        self.assertEqual(cache.get(other_key), 0)
+
+    @override_settings(POSTS_EXACT_COUNT_LIMIT=2)
+    def test_large_feed_is_estimated(self):
+        """Пагинатор большой ленты помечает количество как оценку."""
+        paginator = CountingPaginator(Post.objects.all(), 10, count_key())
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.estimated)
+
+    def test_index_uses_counter(self):
+        """Главная страница берёт число постов из счётчика."""
+        cache.set(count_key(), 25)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].paginator.num_pages, 3
+        )
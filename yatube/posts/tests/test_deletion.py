@@ -0,0 +1,129 @@
+from io import StringIO
+
+from core.auth import user_key
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from posts.counting import approximate_count, count_key
+from posts.deletion import delete_group, delete_user, enqueue_deletion
+from notifications.models import DigestSubscription, Notification
+from posts.models import (Comment, Follow, Group, PendingDeletion, Post,
+                          Recommendation)
+
+User = get_user_model()
+
+
+class ChunkedDeletionTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(5):
+            post = Post.objects.create(
+                author=self.author,
+                text=f'Тестовый пост {number}',
+                group=self.group,
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_delete_user(self):
+        """Пользователь удаляется вместе с постами, порция за порцией."""
+        report = delete_user(self.author, chunk_size=2, pause=0)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(report['posts'], 5)
+        self.assertEqual(report['comments'], 5)
+
+    def test_delete_user_rows_of_other_apps(self):
+        """Уведомления и подписки пользователя удаляются порциями до него."""
+        reader_post = Post.objects.create(author=self.reader, text='Пост')
+        Comment.objects.create(
+            post=reader_post, author=self.author, text='Ответ'
+        )
+        DigestSubscription.objects.create(user=self.author)
+        Recommendation.objects.create(
+            user=self.reader, author=self.author, score=1.0
+        )
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.author
+        ).exists())
+        self.assertTrue(Notification.objects.filter(
+            actor=self.author
+        ).exists())
+
+        report = delete_user(self.author, chunk_size=2, pause=0)
+        self.assertGreater(report['notification'], 0)
+        self.assertEqual(report['digestsubscription'], 1)
+        self.assertEqual(report['recommendation'], 1)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(Notification.actors.through.objects.exists())
+
+    def test_delete_group_keeps_posts(self):
+        """После удаления группы посты остаются без группы."""
+        report = delete_group(self.group, chunk_size=2, pause=0)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 5)
+        self.assertEqual(report['detached'], 5)
+
+    def test_delete_group_adjusts_counters(self):
+        """Посты, отвязанные от группы, уходят из её счётчика."""
+        key = count_key(self.group.pk)
+        posts = Post.objects.filter(group=self.group)
+        self.assertEqual(approximate_count(key, posts), 5)
+        counts = []
+
+        def progress(label, count):
+            if label == 'detached':
+                counts.append(cache.get(key))
+
+        delete_group(self.group, chunk_size=2, pause=0, progress=progress)
+        self.assertEqual(counts, [3, 1, 0])
+        self.assertIsNone(cache.get(key))
+
+    def test_command_reports_progress(self):
+        """Команда печатает прогресс удаления."""
+        out = StringIO()
+        call_command(
+            'delete_in_chunks', '--user=author', chunk_size=2, pause=0,
+            stdout=out
+        )
+        self.assertIn('posts: 5', out.getvalue())
+        self.assertFalse(User.objects.filter(username='author').exists())
+
+    def test_admin_action_only_enqueues(self):
+        """Админка ставит удаление в очередь, а удаляет команда."""
+        enqueue_deletion(self.author)
+        enqueue_deletion(self.group)
+        self.assertTrue(Post.objects.exists())
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+
+        out = StringIO()
+        call_command(
+            'delete_in_chunks', '--queue', chunk_size=2, pause=0,
+            stdout=out
+        )
+        self.assertIn('Удалено из очереди: 2', out.getvalue())
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertFalse(Group.objects.exists())
+        self.assertFalse(PendingDeletion.objects.exists())
+
+
+class EnqueueDeletionTests(TransactionTestCase):
+    def test_queued_user_leaves_auth_cache(self):
+        """Поставленный в очередь пользователь уходит из кеша входа."""
+        user = User.objects.create_user(username='author')
+        cache.set(user_key(user.pk), user)
+        enqueue_deletion(user)
+        self.assertIsNone(cache.get(user_key(user.pk)))
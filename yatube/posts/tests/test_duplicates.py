@@ -0,0 +1,87 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.duplicates import duplicate_clusters, find_near_duplicates
+from posts.forms import PostForm
+from posts.models import Post
+
+User = get_user_model()
+
+SPAM_TEXT = (
+    'Только сегодня в нашем магазине скидки на все товары для дома, '
+    'успейте купить мебель и посуду по лучшим ценам в городе, '
+    'доставка бесплатно при заказе от тысячи рублей'
+)
+
+
+class NearDuplicateTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='spammer')
+        cls.post = Post.objects.create(author=cls.user, text=SPAM_TEXT)
+
+    def test_slightly_changed_copy_is_found(self):
+        """Копия с небольшими изменениями находится как дубликат."""
+        duplicates = find_near_duplicates(SPAM_TEXT + ' звоните')
+        self.assertEqual(duplicates[0][0], NearDuplicateTests.post.pk)
+
+    def test_bucket_reads_only_newest_posts(self):
+        """Из корзины читаются только самые новые посты кластера."""
+        copies = [
+            Post.objects.create(
+                author=NearDuplicateTests.user, text=SPAM_TEXT + '!' * i
+            )
+            for i in range(4)
+        ]
+        with mock.patch('posts.duplicates.BUCKET_CANDIDATES', 2):
+            duplicates = find_near_duplicates(SPAM_TEXT)
+        self.assertEqual(
+            sorted(post_id for post_id, _ in duplicates),
+            [copies[2].pk, copies[3].pk]
+        )
+
+    def test_form_rejects_duplicate(self):
+        """Форма не пропускает почти одинаковый пост."""
+        form = PostForm(data={'text': SPAM_TEXT + ' звоните'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('text', form.errors)
+
+    def test_form_allows_editing_own_post(self):
+        """Пост не считается дубликатом самого себя."""
+        form = PostForm(
+            data={'text': SPAM_TEXT}, instance=NearDuplicateTests.post
+        )
+        self.assertTrue(form.is_valid())
+
+    def test_short_texts_are_not_checked(self):
+        """Короткие тексты не проверяются на дубликаты."""
+        Post.objects.create(
+            author=NearDuplicateTests.user, text='Тестовый пост'
+        )
+        self.assertEqual(find_near_duplicates('Тестовый пост'), [])
+
+    def test_admin_lists_clusters(self):
+        """Админка показывает кластеры дубликатов."""
+        copy = Post.objects.create(
+            author=NearDuplicateTests.user, text=SPAM_TEXT + '!'
+        )
+        self.assertEqual(
+            duplicate_clusters([copy.pk]), [[NearDuplicateTests.post, copy]]
+        )
+        other = Post.objects.create(
+            author=NearDuplicateTests.user, text='Тестовый пост'
+        )
+        self.assertEqual(duplicate_clusters([other.pk]), [])
+
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@ya.ru', password='admin'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(reverse('admin:posts_post_duplicates'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['clusters']), 1)
@@ -0,0 +1,126 @@
+from core.events import Broker
+from django.contrib.auth import get_user_model
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.events import ALL_CHANNEL, broker, publish_post
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class BrokerTests(TestCase):
+    def test_events_are_coalesced(self):
+        """Подписка копит число событий, а не сами события."""
+        events = Broker()
+        subscription = events.subscribe(['a', 'b'])
+        for _ in range(1000):
+            events.publish('a')
+        events.publish('b', 2)
+        events.publish('c')
+        self.assertEqual(subscription.pending, 1002)
+        self.assertEqual(subscription.wait(0), 1002)
+        self.assertEqual(subscription.wait(0), 0)
+
+    @override_settings(EVENTS_MAX_CONNECTIONS=1)
+    def test_connections_are_limited(self):
+        """Сверх EVENTS_MAX_CONNECTIONS подписки не выдаются."""
+        events = Broker()
+        subscription = events.subscribe(['a'])
+        self.assertIsNone(events.subscribe(['a']))
+        subscription.close()
+        subscription.close()
+        self.assertEqual(events.connections, 0)
+        self.assertIsNotNone(events.subscribe(['a']))
+
+
+@override_settings(EVENTS_HEARTBEAT=0.01)
+class EventStreamTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(EventStreamTests.reader)
+
+    def open_stream(self, url):
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.addCleanup(response.close)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        return response, stream
+
+    def test_new_post_is_announced(self):
+        """Каждая лента получает событие о посте, который в неё попадает."""
+        urls = (
+            reverse('posts:index_events'),
+            reverse('posts:group_events', args=['test-slug']),
+            reverse('posts:follow_events'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                _, stream = self.open_stream(url)
+                publish_post(Post(
+                    author=EventStreamTests.author,
+                    group=EventStreamTests.group
+                ))
+                publish_post(Post(
+                    author=EventStreamTests.reader,
+                    group=EventStreamTests.group
+                ))
+                expected = 1 if url.endswith('/follow/') else 2
+                self.assertEqual(
+                    next(stream).decode(),
+                    f'event: posts\ndata: {{"count": {expected}}}\n\n'
+                )
+
+    def test_heartbeat_without_events(self):
+        """Без подходящих событий в поток уходит комментарий."""
+        _, stream = self.open_stream(
+            reverse('posts:group_events', args=['test-slug'])
+        )
+        publish_post(Post(
+            author=EventStreamTests.author, group=EventStreamTests.other_group
+        ))
+        self.assertEqual(next(stream), b': heartbeat\n\n')
+
+    def test_closed_stream_unsubscribes(self):
+        """Закрытый поток снимает подписку, даже если его не читали."""
+        connections = broker.connections
+        response = self.client.get(reverse('posts:index_events'))
+        self.assertEqual(broker.connections, connections + 1)
+        response.close()
+        self.assertEqual(broker.connections, connections)
+
+    @override_settings(EVENTS_MAX_CONNECTIONS=0)
+    def test_overloaded_server_refuses(self):
+        """Когда соединений слишком много, клиенту отвечают 503."""
+        response = self.client.get(reverse('posts:index_events'))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+class NewPostSignalTests(TransactionTestCase):
+    def test_post_is_published_after_commit(self):
+        """Созданный пост публикуется в общий канал."""
+        subscription = broker.subscribe([ALL_CHANNEL])
+        self.addCleanup(subscription.close)
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Тестовый пост')
+        self.assertEqual(subscription.wait(0), 1)
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Тестовый пост {i}', group=cls.group
+            )
+            for i in range(15)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FeedFragmentTests.reader)
+
+    def test_page_links_first_fragment(self):
+        """Страница ленты ссылается на фрагмент после последнего поста."""
+        response = self.client.get(reverse('posts:index'))
+        last = response.context['page_obj'][-1]
+        self.assertEqual(
+            response.context['next_fragment_url'],
+            reverse('posts:index_fragment') + f'?after={last.pk}'
+        )
+
+    def test_fragment_contains_only_articles(self):
+        """Фрагмент — это только посты, без base.html."""
+        urls = (
+            reverse('posts:index_fragment'),
+            reverse('posts:group_fragment', args=['test-slug']),
+            reverse('posts:profile_fragment', args=['author']),
+            reverse('posts:follow_fragment'),
+        )
+        after = FeedFragmentTests.posts[5].pk
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(f'{url}?after={after}')
+                content = response.content.decode()
+                self.assertNotIn('<html', content)
+                self.assertEqual(content.count('<article>'), 5)
+                self.assertIn('Тестовый пост 4', content)
+                self.assertEqual(response['X-Next-Page'], '')
+
+    def test_fragment_is_cached_per_cursor(self):
+        """Фрагмент для курсора повторно отдаётся из кеша."""
+        url = reverse('posts:index_fragment') + '?after=100'
+        self.client.logout()
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_next_page_header(self):
+        """В заголовке передаётся адрес следующего фрагмента."""
+        response = self.client.get(reverse('posts:index_fragment'))
+        self.assertEqual(
+            response['X-Next-Page'],
+            reverse('posts:index_fragment')
+            + f'?after={FeedFragmentTests.posts[5].pk}'
+        )
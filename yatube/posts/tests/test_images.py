@@ -0,0 +1,98 @@
+from io import BytesIO
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import mock
+
+from core.templatetags.responsive_images import responsive_image
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.images import normalize_image
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(size=(3000, 1000), image_format='PNG', name='big.png'):
+    buffer = BytesIO()
+    image = Image.new('RGB', size, 'white')
+    exif = Image.Exif()
+    # модель камеры попадёт в EXIF-метаданные
+    exif[0x0110] = 'Test Camera'
+    image.save(buffer, image_format, exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=1200,
+    POST_IMAGE_RENDITIONS=(480, 960),
+)
+class UploadPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(UploadPipelineTests.user)
+
+    def test_image_is_normalized(self):
+        """Картинка уменьшается и сохраняется в WebP без метаданных."""
+        result = normalize_image(make_upload())
+        self.assertTrue(result.name.endswith('.webp'))
+        image = Image.open(result)
+        self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(image.size, (1200, 400))
+        self.assertNotIn('exif', image.info)
+
+    def test_create_post_with_image(self):
+        """Загруженная через форму картинка сохраняется обработанной."""
+        self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': make_upload()},
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image.name.endswith('.webp'))
+
+    def test_article_has_srcset(self):
+        """В ленте картинка отдаётся набором размеров."""
+        Post.objects.create(
+            author=UploadPipelineTests.user,
+            text='Пост с картинкой',
+            image=normalize_image(make_upload()),
+        )
+        response = self.client.get(reverse('posts:index'))
+        content = response.content.decode()
+        self.assertIn('type="image/webp"', content)
+        self.assertIn(' 480w, ', content)
+        self.assertIn(' 960w', content)
+
+    def test_renditions_are_cached(self):
+        """Повторный показ берёт миниатюры одним чтением кеша."""
+        post = Post.objects.create(
+            author=UploadPipelineTests.user,
+            text='Пост с картинкой',
+            image=normalize_image(make_upload()),
+        )
+        first = responsive_image(post.image, '960x339', crop='center')
+        self.assertIn(' 480w, ', first['webp_srcset'])
+        with mock.patch(
+            'core.templatetags.responsive_images.get_thumbnail'
+        ) as get_thumbnail:
+            second = responsive_image(post.image, '960x339', crop='center')
+        get_thumbnail.assert_not_called()
+        self.assertEqual(first, second)
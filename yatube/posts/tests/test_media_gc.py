@@ -0,0 +1,72 @@
+import os
+from io import StringIO
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.media_gc import BloomFilter, collect_garbage
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('used.gif', 'orphan.gif'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', name), 'wb'):
+                pass
+        Post.objects.create(
+            author=MediaGarbageCollectorTests.user,
+            text='Тестовый пост',
+            image='posts/used.gif',
+        )
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, 'posts', name))
+
+    def test_bloom_filter(self):
+        """Добавленные имена всегда находятся в фильтре."""
+        bloom = BloomFilter(100, 0.01)
+        names = [f'posts/{number}.jpg' for number in range(100)]
+        for name in names:
+            bloom.add(name)
+        self.assertTrue(all(name in bloom for name in names))
+
+    def test_orphans_are_deleted(self):
+        """Удаляются только файлы, на которые нет ссылок."""
+        report = collect_garbage(min_age=0)
+        self.assertEqual(report['scanned'], 2)
+        self.assertEqual(report['deleted'], 1)
+        self.assertTrue(self.exists('used.gif'))
+        self.assertFalse(self.exists('orphan.gif'))
+
+    def test_dry_run_keeps_files(self):
+        """В пробном режиме команда только печатает имена."""
+        out = StringIO()
+        call_command(
+            'collect_media_garbage', '--dry-run', min_age=0, stdout=out
+        )
+        self.assertIn('posts/orphan.gif', out.getvalue())
+        self.assertTrue(self.exists('orphan.gif'))
+
+    def test_fresh_files_are_kept(self):
+        """Только что загруженные файлы не трогаются."""
+        collect_garbage()
+        self.assertTrue(self.exists('orphan.gif'))
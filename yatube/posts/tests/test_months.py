@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts.archive import archive_posts
+from posts.models import Group, MonthlyPostCount, Post
+from posts.months import (SITE_SCOPE, author_scope, group_scope, month_of,
+                          rebuild_month_counts)
+
+User = get_user_model()
+
+
+def month_count(scope, month):
+    counter = MonthlyPostCount.objects.filter(scope=scope, month=month).first()
+    return counter.count if counter is not None else 0
+
+
+class MonthCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def test_counts_follow_signals(self):
+        """Создание, перенос и удаление поста сдвигают счётчики месяца."""
+        post = Post.objects.create(
+            author=MonthCountTests.user,
+            text='Тестовый пост',
+            group=MonthCountTests.group,
+        )
+        month = month_of(post.pub_date)
+        group_key = group_scope(MonthCountTests.group.pk)
+        other_key = group_scope(MonthCountTests.other_group.pk)
+        self.assertEqual(month_count(SITE_SCOPE, month), 1)
+        self.assertEqual(
+            month_count(author_scope(MonthCountTests.user.pk), month), 1
+        )
+        self.assertEqual(month_count(group_key, month), 1)
+
+        post.group = MonthCountTests.other_group
+        post.save()
+        self.assertEqual(month_count(group_key, month), 0)
+        self.assertEqual(month_count(other_key, month), 1)
+
+        post.delete()
+        self.assertEqual(month_count(SITE_SCOPE, month), 0)
+        self.assertEqual(month_count(other_key, month), 0)
+
+    def test_archiving_keeps_counts(self):
+        """Перенос в архив не меняет число постов за месяц."""
+        post = Post.objects.create(
+            author=MonthCountTests.user, text='Тестовый пост'
+        )
+        archive_posts(days=-1, pause=0)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertEqual(month_count(SITE_SCOPE, month_of(post.pub_date)), 1)
+
+
+class MonthArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        dates = {
+            'Январский пост': datetime(2021, 1, 31, 23, 59),
+            'Февральский пост': datetime(2021, 2, 1),
+            'Ещё февральский': datetime(2021, 2, 28, 12),
+        }
+        for text, pub_date in dates.items():
+            post = Post.objects.create(
+                author=cls.user, text=text, group=cls.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(pub_date)
+            )
+        rebuild_month_counts()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def test_month_pages(self):
+        """Страницы архива показывают только посты своего месяца."""
+        urls = (
+            reverse('posts:month_archive', args=[2021, 2]),
+            reverse('posts:group_month_archive', args=['test-slug', 2021, 2]),
+            reverse('posts:profile_month_archive', args=['author', 2021, 2]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                texts = {post.text for post in response.context['page_obj']}
+                self.assertEqual(
+                    texts, {'Февральский пост', 'Ещё февральский'}
+                )
+                self.assertEqual(
+                    [
+                        (item.month.month, item.count)
+                        for item in response.context['months']
+                    ],
+                    [(2, 2), (1, 1)]
+                )
+
+    def test_month_is_range_scan(self):
+        """Посты выбираются по диапазону дат, без функций над pub_date."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:month_archive', args=[2021, 1]))
+        for query in queries:
+            self.assertNotIn('django_datetime', query['sql'])
+            self.assertNotIn('GROUP BY', query['sql'])
+
+    def test_wrong_month(self):
+        """Несуществующий месяц — это 404."""
+        response = self.client.get(
+            reverse('posts:month_archive', args=[2021, 13])
+        )
+        self.assertEqual(response.status_code, 404)
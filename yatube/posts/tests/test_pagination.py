@@ -0,0 +1,34 @@
+from core.pagination import KeysetPage, page_navigation, page_window
+from django.core.paginator import Paginator
+from django.http import QueryDict
+from django.test import TestCase
+
+
+class PaginationWidgetTests(TestCase):
+    def test_page_window(self):
+        """Окно номеров не зависит от числа страниц."""
+        self.assertEqual(page_window(1, 3, 2), [1, 2, 3])
+        self.assertEqual(
+            page_window(50, 100000, 2),
+            [1, None, 48, 49, 50, 51, 52, None, 100000]
+        )
+        self.assertEqual(page_window(4, 10, 2), [1, 2, 3, 4, 5, 6, None, 10])
+        self.assertEqual(page_window(5, None, 0), [1, None, 5])
+
+    def test_offset_navigation_keeps_query(self):
+        """Ссылки сохраняют остальные GET-параметры."""
+        page = Paginator(range(1000), 10).page(50)
+        nav = page_navigation(page, QueryDict('q=text&page=50'))
+        self.assertEqual(len(nav['links']), 9)
+        self.assertEqual(nav['next_url'], '?q=text&page=51')
+        self.assertEqual(nav['links'][-1]['url'], '?q=text&page=100')
+
+    def test_keyset_navigation(self):
+        """У страницы по курсору есть первая и следующая страницы."""
+        page = KeysetPage([1, 2], cursor=20, next_cursor=30, number=3)
+        nav = page_navigation(page, QueryDict('after=20&page=3'))
+        self.assertEqual(nav['next_url'], '?after=30&page=4')
+        self.assertEqual(
+            [link['number'] for link in nav['links']], [1, None, 3]
+        )
+        self.assertEqual(nav['links'][0]['url'], '?')
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+from posts.recommendations import (compute_recommendations,
+                                   get_recommendations)
+
+User = get_user_model()
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend_of_friend = User.objects.create_user(username='fof')
+        cls.neighbour = User.objects.create_user(username='neighbour')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in (cls.friend, cls.friend_of_friend, cls.neighbour):
+            Post.objects.create(author=author, text='Тестовый пост')
+        Post.objects.create(
+            author=cls.reader, text='Пост в группе', group=cls.group
+        )
+        Post.objects.create(
+            author=cls.neighbour, text='Пост соседа', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+
+    def setUp(self) -> None:
+        cache.clear()
+        compute_recommendations()
+        self.client = Client()
+        self.client.force_login(RecommendationsTests.reader)
+
+    def test_recommendations_from_graph(self):
+        """Рекомендуются друзья друзей и соседи по группам."""
+        usernames = [
+            item.username
+            for item in get_recommendations(RecommendationsTests.reader)
+        ]
+        self.assertEqual(usernames, ['fof', 'neighbour'])
+
+    def test_recommendations_survive_cache_clear(self):
+        """Рекомендации хранятся в базе, а не в кеше процесса."""
+        cache.clear()
+        self.assertEqual(
+            len(get_recommendations(RecommendationsTests.reader)), 2
+        )
+
+    def test_followed_author_is_not_recommended(self):
+        """После подписки автор пропадает из рекомендаций."""
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'fof'})
+        )
+        usernames = [
+            item.username
+            for item in get_recommendations(RecommendationsTests.reader)
+        ]
+        self.assertNotIn('fof', usernames)
+
+    def test_follow_page_shows_recommendations(self):
+        """Рекомендации передаются в контекст ленты подписок."""
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['recommendations']), 2)
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+from contextlib import closing
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from core.middleware import ReplicaMiddleware
+from core.replicas import allow_replica_reads, sync_replica
+from core.routers import ReplicaRouter
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SyncReplicaTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.directory = mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(rmtree, self.directory, ignore_errors=True)
+        self.source = os.path.join(self.directory, 'db.sqlite3')
+        self.replica = os.path.join(self.directory, 'db.replica1.sqlite3')
+        with closing(sqlite3.connect(self.source)) as primary:
+            primary.execute('PRAGMA journal_mode=WAL')
+            primary.execute('CREATE TABLE post (text TEXT)')
+            primary.execute("INSERT INTO post VALUES ('первый')")
+            primary.commit()
+
+    def read_replica(self):
+        uri = f'file:{self.replica}?mode=ro'
+        with closing(sqlite3.connect(uri, uri=True)) as replica:
+            return [text for text, in replica.execute('SELECT text FROM post')]
+
+    def test_replica_is_copy_of_primary(self):
+        """Реплика содержит данные основной базы на момент копирования."""
+        sync_replica(self.source, self.replica)
+        self.assertEqual(self.read_replica(), ['первый'])
+
+        with closing(sqlite3.connect(self.source)) as primary:
+            primary.execute("INSERT INTO post VALUES ('второй')")
+            primary.commit()
+        self.assertEqual(self.read_replica(), ['первый'])
+        sync_replica(self.source, self.replica)
+        self.assertEqual(self.read_replica(), ['первый', 'второй'])
+
+    def test_replica_is_read_only(self):
+        """Реплику, открытую с mode=ro, нельзя изменить."""
+        sync_replica(self.source, self.replica)
+        uri = f'file:{self.replica}?mode=ro'
+        with closing(sqlite3.connect(uri, uri=True)) as replica:
+            with self.assertRaises(sqlite3.OperationalError):
+                replica.execute("INSERT INTO post VALUES ('третий')")
+
+    def test_open_connection_keeps_old_version(self):
+        """Открытое соединение дочитывает реплику, которую подменили."""
+        sync_replica(self.source, self.replica)
+        uri = f'file:{self.replica}?mode=ro'
+        with closing(sqlite3.connect(uri, uri=True)) as replica:
+            with closing(sqlite3.connect(self.source)) as primary:
+                primary.execute('DELETE FROM post')
+                primary.commit()
+            sync_replica(self.source, self.replica)
+            rows = replica.execute('SELECT text FROM post').fetchall()
+        self.assertEqual(rows, [('первый',)])
+        self.assertEqual(self.read_replica(), [])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        """Куда middleware направит чтение постов в этом запросе."""
+        def get_response(request):
+            return HttpResponse(self.router.db_for_read(Post))
+        return ReplicaMiddleware(get_response)(request)
+
+    def test_reads_go_to_replica_only_in_requests(self):
+        """Вне запроса и для чужих приложений чтение идёт в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with allow_replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica1')
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает основную базу."""
+        response = self.route(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+
+        response = self.route(self.factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        self.assertEqual(self.route(request).content, b'default')
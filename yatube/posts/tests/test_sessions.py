@@ -0,0 +1,81 @@
+from core.auth import user_key
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Follow
+
+User = get_user_model()
+
+
+# в тестах кеш один на процесс, то есть общий для всех запросов
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    MIDDLEWARE=[
+        'core.middleware.CachedAuthenticationMiddleware'
+        if name == 'django.contrib.auth.middleware.AuthenticationMiddleware'
+        else name
+        for name in settings.MIDDLEWARE
+    ]
+)
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(CachedSessionTests.user)
+
+    def queries(self, url):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return ' '.join(query['sql'] for query in queries)
+
+    def test_session_and_user_come_from_cache(self):
+        """Повторный запрос не читает ни сессию, ни пользователя из базы."""
+        sql = self.queries(reverse('about:tech'))
+        self.assertNotIn('django_session', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_follow_views_do_not_refetch_user(self):
+        """Подписка не перечитывает текущего пользователя по имени."""
+        self.client.get(reverse('about:tech'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse('posts:profile_follow', args=['author'])
+            )
+        lookups = [
+            query['sql'] for query in queries
+            if 'FROM "auth_user"' in query['sql']
+        ]
+        self.assertEqual(len(lookups), 1)
+        self.assertIn('author', str(lookups))
+        self.assertTrue(Follow.objects.filter(
+            user=CachedSessionTests.user, author=CachedSessionTests.author
+        ).exists())
+
+        self.assertNotIn(
+            'FROM "auth_user"', self.queries(reverse('posts:follow_index'))
+        )
+
+    def test_user_save_invalidates_cache(self):
+        """Сохранение пользователя убирает его из кеша."""
+        self.client.get(reverse('about:tech'))
+        self.assertIsNotNone(cache.get(user_key(CachedSessionTests.user.pk)))
+
+        user = User.objects.get(pk=CachedSessionTests.user.pk)
+        user.set_password('new-password')
+        user.save()
+        self.assertIsNone(cache.get(user_key(user.pk)))
+
+        # старая сессия после смены пароля больше не действует
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
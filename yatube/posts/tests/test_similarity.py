@@ -0,0 +1,119 @@
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import DirtyPost, Post
+from posts.similarity import (SimilarityIndex, get_index, related_posts,
+                              update_index)
+
+User = get_user_model()
+
+TEMP_INDEX_DIR = mkdtemp()
+
+
+@override_settings(SIMILARITY_INDEX_DIR=TEMP_INDEX_DIR)
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='APushkin')
+        cls.cats = Post.objects.create(
+            author=cls.user,
+            text='Кошки любят спать на солнце, кошки любят рыбу',
+        )
+        cls.more_cats = Post.objects.create(
+            author=cls.user,
+            text='Наши кошки весь день спят на солнце',
+        )
+        cls.football = Post.objects.create(
+            author=cls.user,
+            text='Футбольный матч закончился вничью в дополнительное время',
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        rmtree(TEMP_INDEX_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        update_index(rebuild=True)
+
+    def test_related_posts_are_similar(self):
+        """Похожим считается пост на ту же тему."""
+        related = related_posts(RelatedPostsTests.cats)
+        self.assertEqual(related[0]['pk'], RelatedPostsTests.more_cats.pk)
+        self.assertNotIn(
+            RelatedPostsTests.cats.pk, [item['pk'] for item in related]
+        )
+
+    def test_index_is_updated_incrementally(self):
+        """Обновление индекса обрабатывает только новые и изменённые посты."""
+        self.assertEqual(update_index(), 0)
+        Post.objects.create(
+            author=RelatedPostsTests.user,
+            text='Кошки и солнце',
+        )
+        post = RelatedPostsTests.football
+        post.text = 'Кошки смотрят футбол'
+        post.save()
+        # команда работает в другом процессе и не видит его кеш
+        cache.clear()
+        self.assertEqual(update_index(), 2)
+        self.assertFalse(DirtyPost.objects.exists())
+        self.assertEqual(update_index(), 0)
+
+    def test_deleted_post_leaves_index(self):
+        """Удалённый пост убирается из индекса при обновлении."""
+        post = Post.objects.create(
+            author=RelatedPostsTests.user,
+            text='Кошки спят на солнце',
+        )
+        update_index()
+        post.delete()
+        self.assertEqual(update_index(), 1)
+        self.assertNotIn(post.pk, SimilarityIndex.load().ids)
+        self.assertFalse(DirtyPost.objects.exists())
+
+    def test_index_generations(self):
+        """Поколение включается заменой CURRENT, старые удаляются."""
+        version = get_index().version
+        update_index()
+        update_index()
+        index = get_index()
+        self.assertNotEqual(index.version, version)
+        self.assertEqual(len(index.ids), 3)
+        generations = [
+            name for name in os.listdir(TEMP_INDEX_DIR)
+            if os.path.isdir(os.path.join(TEMP_INDEX_DIR, name))
+        ]
+        self.assertEqual(len(generations), 2)
+        self.assertIn(str(index.version), generations)
+
+    def test_related_lists_follow_index_version(self):
+        """После обновления индекса списки похожих пересчитываются."""
+        related_posts(RelatedPostsTests.football)
+        post = RelatedPostsTests.more_cats
+        post.text = 'Футбольный матч и дополнительное время'
+        post.save()
+        update_index()
+        self.assertEqual(
+            related_posts(RelatedPostsTests.football)[0]['pk'], post.pk
+        )
+
+    def test_post_detail_shows_related_posts(self):
+        """Похожие посты передаются в контекст страницы поста."""
+        response = Client().get(
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': RelatedPostsTests.cats.pk}
+            )
+        )
+        self.assertEqual(
+            response.context['related_posts'][0]['pk'],
+            RelatedPostsTests.more_cats.pk
+        )
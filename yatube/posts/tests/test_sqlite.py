@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from io import StringIO
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from core.sqlite import apply_pragmas, optimize_sqlite
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+
+class SqlitePragmaTests(TestCase):
+    def test_new_connection_is_configured(self):
+        """Соединение Django получает настройки из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            cache_size, = cursor.fetchone()
+        self.assertEqual(cache_size, settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_file_database_switches_to_wal(self):
+        """Файловая база переводится в режим WAL."""
+        directory = mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'db.sqlite3')
+        with closing(sqlite3.connect(path)) as database:
+            apply_pragmas(database, settings.SQLITE_PRAGMAS)
+            mode, = database.execute('PRAGMA journal_mode').fetchone()
+        self.assertEqual(mode, 'wal')
+
+
+class SqliteOptimizeTests(TransactionTestCase):
+    def test_optimize_runs_after_interval(self):
+        """PRAGMA optimize выполняется не чаще SQLITE_OPTIMIZE_INTERVAL."""
+        connection.ensure_connection()
+        connection.optimized_at = time.monotonic()
+        with CaptureQueriesContext(connection) as queries:
+            optimize_sqlite(sender=None)
+        self.assertEqual(len(queries), 0)
+
+        connection.optimized_at -= settings.SQLITE_OPTIMIZE_INTERVAL + 1
+        with CaptureQueriesContext(connection) as queries:
+            optimize_sqlite(sender=None)
+        self.assertEqual(
+            [query['sql'] for query in queries], ['PRAGMA optimize']
+        )
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    def test_benchmark_reports_both_modes(self):
+        """Бенчмарк печатает результаты до и после настройки."""
+        out = StringIO()
+        call_command(
+            'benchmark_sqlite', duration=0.1, threads=2, rows=10, stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('до:'))
+        self.assertTrue(lines[1].startswith('после:'))
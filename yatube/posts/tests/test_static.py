@@ -0,0 +1,96 @@
+import gzip
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from core.storage import purge_css
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+TEMP_STATIC_ROOT = mkdtemp(dir=settings.BASE_DIR)
+
+
+class PurgeCssTests(TestCase):
+    def test_unused_rules_are_removed(self):
+        """Правила с классами не из шаблонов удаляются."""
+        css = (
+            '@charset "UTF-8";/*! license */'
+            '.btn,.unused{color:red}'
+            '.unused .btn{color:blue}'
+            '@media (min-width:576px){.unused{margin:0}.card{margin:1px}}'
+            '@keyframes spin{from{opacity:0}}'
+            'a[href^="https://x.y"]{color:green}'
+            '/*# sourceMappingURL=bootstrap.min.css.map */'
+        )
+        self.assertEqual(
+            purge_css(css, {'btn', 'card'}),
+            '@charset "UTF-8";/*! license */'
+            '.btn{color:red}'
+            '@media (min-width:576px){.card{margin:1px}}'
+            '@keyframes spin{from{opacity:0}}'
+            'a[href^="https://x.y"]{color:green}'
+        )
+
+    def test_pseudo_class_arguments(self):
+        """Классы внутри :not(…) и :is(…) не требуются от шаблонов."""
+        css = (
+            '.btn:not(.unused){color:red}'
+            '.card:is(.unused,.btn) a{color:blue}'
+            ':not(.unused)>.gone,.btn{margin:0}'
+        )
+        self.assertEqual(
+            purge_css(css, {'btn', 'card'}),
+            '.btn:not(.unused){color:red}'
+            '.card:is(.unused,.btn) a{color:blue}'
+            '.btn{margin:0}'
+        )
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_fingerprinted_urls(self):
+        """Шаблоны ссылаются на статику с хешем в имени."""
+        response = self.client.get('/')
+        url = staticfiles_storage.url('css/bootstrap.min.css')
+        self.assertRegex(url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        self.assertContains(response, url)
+
+    def test_precompressed_response(self):
+        """Клиенту с gzip отдаётся сжатая копия с долгим кешем."""
+        url = staticfiles_storage.url('css/bootstrap.min.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        css = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn(b'.navbar', css)
+        self.assertNotIn(b'.carousel', css)
+
+    def test_plain_response(self):
+        """Без Accept-Encoding отдаётся исходный файл."""
+        response = self.client.get(
+            staticfiles_storage.url('img/logo.png')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+    def test_missing_manifest_entry(self):
+        """Имя без файла в манифесте возвращается как есть."""
+        self.assertEqual(
+            staticfiles_storage.url('img/fav/fav.ico'),
+            '/static/img/fav/fav.ico'
+        )
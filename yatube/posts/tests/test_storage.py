@@ -0,0 +1,115 @@
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from posts.models import ImageClaim, Post
+from posts.storage import (claim_image, post_images, release_image,
+                           settle_image)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='author')
+
+    def create_post(self, content=SMALL_GIF, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся в одном файле с именем по хешу."""
+        first = self.create_post()
+        second = self.create_post(name='copy.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
+        directory = os.path.dirname(
+            os.path.join(TEMP_MEDIA_ROOT, first.image.name)
+        )
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_file_is_deleted_with_last_reference(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+        first.delete()
+        self.assertTrue(self.exists(name))
+        second.delete()
+        self.assertFalse(self.exists(name))
+
+    def test_replaced_image_is_released(self):
+        """После замены картинки старый файл удаляется."""
+        post = self.create_post()
+        name = post.image.name
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', 'image/gif'
+        )
+        post.save()
+        self.assertNotEqual(post.image.name, name)
+        self.assertFalse(self.exists(name))
+        self.assertTrue(self.exists(post.image.name))
+
+    def test_claimed_file_survives_release(self):
+        """Файл, который переиспользует незавершённая загрузка, остаётся."""
+        post = self.create_post()
+        name = post.image.name
+        self.assertFalse(ImageClaim.objects.filter(pending__gt=0).exists())
+
+        # вторая загрузка нашла файл, но её пост ещё не сохранён
+        claim_image(name)
+        post.delete()
+        self.assertTrue(self.exists(name))
+
+        settle_image(name)
+        self.assertTrue(release_image(name))
+        self.assertFalse(self.exists(name))
+
+    @override_settings(IMAGE_CLAIM_TIMEOUT=-1)
+    def test_stale_claim_expires(self):
+        """Заявка загрузки, чей пост не сохранился, со временем истекает."""
+        post = self.create_post()
+        name = post.image.name
+        claim_image(name)
+        post.delete()
+        self.assertFalse(self.exists(name))
+
+    def test_max_length_is_checked(self):
+        """Имя по хешу не может быть длиннее поля."""
+        with self.assertRaises(SuspiciousFileOperation):
+            post_images.save(
+                'posts/small.gif',
+                SimpleUploadedFile('small.gif', SMALL_GIF),
+                max_length=20
+            )
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.archive import archive_posts
+from posts.models import Hashtag, Mention, Post
+from posts.tags import parse_mentions, parse_tags
+
+User = get_user_model()
+
+
+class ParseTests(TestCase):
+    def test_parse_tags(self):
+        """Теги приводятся к нижнему регистру и не повторяются."""
+        self.assertEqual(
+            parse_tags('#Django и #django, #тег; a#b ##c &#x27;'),
+            ['django', 'тег']
+        )
+
+    def test_parse_mentions(self):
+        """Точка в конце упоминания не считается частью имени."""
+        self.assertEqual(
+            parse_mentions('Привет, @leo. Пишите на mail@example.com @ann'),
+            ['leo', 'ann']
+        )
+
+
+class TagFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост про #Django для @reader.'
+        )
+        cls.other = Post.objects.create(
+            author=cls.author, text='Пост про #python'
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def test_post_is_indexed_on_save(self):
+        """Теги и упоминания выписываются при сохранении и правке."""
+        post = TagFeedTests.post
+        self.assertEqual(
+            list(Hashtag.objects.filter(post=post).values_list(
+                'tag', flat=True
+            )),
+            ['django']
+        )
+        self.assertTrue(
+            Mention.objects.filter(post=post, user=TagFeedTests.reader)
+            .exists()
+        )
+
+        post.text = 'Теперь про #python'
+        post.save()
+        self.assertEqual(
+            list(Hashtag.objects.filter(post=post).values_list(
+                'tag', flat=True
+            )),
+            ['python']
+        )
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+
+    def test_tag_feed(self):
+        """Лента тега читает таблицу тегов, а не тексты постов."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:tag_posts', args=['DJANGO'])
+            )
+        self.assertEqual(
+            [item.entry for item in response.context['page_obj']],
+            [TagFeedTests.post]
+        )
+        for query in queries:
+            self.assertNotIn('LIKE', query['sql'])
+
+    def test_mentions_feed(self):
+        """Лента упоминаний пользователя."""
+        response = self.client.get(
+            reverse('posts:user_mentions', args=['reader'])
+        )
+        self.assertEqual(
+            [item.entry for item in response.context['page_obj']],
+            [TagFeedTests.post]
+        )
+
+    def test_archived_posts_stay_in_feed(self):
+        """Пост, перенесённый в архив, остаётся в ленте тега."""
+        archive_posts(days=-1, pause=0)
+        response = self.client.get(
+            reverse('posts:tag_posts', args=['django'])
+        )
+        self.assertEqual(
+            [item.entry.pk for item in response.context['page_obj']],
+            [TagFeedTests.post.pk]
+        )
+        self.assertContains(response, 'Пост про')
+
+    def test_text_links(self):
+        """В тексте поста теги и упоминания становятся ссылками."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[TagFeedTests.post.pk])
+        )
+        self.assertContains(
+            response,
+            f'<a href="{reverse("posts:tag_posts", args=["django"])}">'
+            '#Django</a>'
+        )
+        self.assertContains(
+            response,
+            f'<a href="{reverse("posts:profile", args=["reader"])}">'
+            '@reader</a>.'
+        )
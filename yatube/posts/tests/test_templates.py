@@ -0,0 +1,54 @@
+from core.profiling import get_stats, reset
+from core.warmup import warm_up_templates
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TemplateProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        Post.objects.create(author=cls.admin, text='Тестовый пост')
+
+    def setUp(self) -> None:
+        cache.clear()
+        reset()
+        self.client = Client()
+        self.client.force_login(TemplateProfilingTests.admin)
+
+    def test_render_is_profiled(self):
+        """Время рендеринга копится по шаблонам и include."""
+        self.client.get(reverse('posts:index'))
+        rows = {(row['kind'], row['name']): row for row in get_stats()}
+        self.assertIn(('template', 'posts/index.html'), rows)
+        self.assertIn(('template', 'includes/article.html'), rows)
+        self.assertIn(('include', "'includes/article.html'"), rows)
+
+    def test_profile_page(self):
+        """Профиль виден на отладочной странице только персоналу."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('template_profile'))
+        self.assertContains(response, 'includes/article.html')
+
+        response = Client().get(reverse('template_profile'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile_reset(self):
+        """POST на отладочную страницу очищает профиль."""
+        self.client.get(reverse('posts:index'))
+        self.client.post(reverse('template_profile'))
+        self.assertFalse(
+            [row for row in get_stats() if row['name'] == 'posts/index.html']
+        )
+
+    def test_warm_up(self):
+        """Прогрев компилирует все шаблоны проекта без ошибок."""
+        self.assertGreater(warm_up_templates(), 10)
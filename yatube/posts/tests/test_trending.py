@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Comment, Follow, Post, PostStats, TrendingPost
+from posts.trending import compute_trending
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='APushkin')
+        cls.reader = User.objects.create_user(username='Turgenev')
+        cls.quiet_post = Post.objects.create(
+            author=cls.user,
+            text='Пост без комментариев',
+        )
+        cls.hot_post = Post.objects.create(
+            author=cls.user,
+            text='Обсуждаемый пост',
+        )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.hot_post,
+                author=cls.reader,
+                text=f'Комментарий {i}',
+            )
+
+    def test_commented_post_ranks_first(self):
+        """Пост с комментариями выше в рейтинге."""
+        self.assertEqual(compute_trending(), 2)
+        ranking = list(
+            TrendingPost.objects.values_list('post_id', flat=True)
+        )
+        self.assertEqual(
+            ranking,
+            [TrendingTests.hot_post.pk, TrendingTests.quiet_post.pk]
+        )
+
+    def test_incremental_run_decays_activity(self):
+        """Повторный расчёт без новых событий только уменьшает рейтинг."""
+        now = timezone.now()
+        compute_trending(now)
+        before = TrendingPost.objects.get(post=TrendingTests.hot_post)
+
+        later = now + timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+        compute_trending(later)
+        after = TrendingPost.objects.get(post=TrendingTests.hot_post)
+        self.assertAlmostEqual(after.activity, before.activity / 2)
+
+    def test_new_comment_is_added_incrementally(self):
+        """Новые комментарии добавляются к сохранённой активности."""
+        compute_trending()
+        before = TrendingPost.objects.get(post=TrendingTests.quiet_post)
+        Comment.objects.create(
+            post=TrendingTests.quiet_post,
+            author=TrendingTests.reader,
+            text='Новый комментарий',
+        )
+        compute_trending()
+        after = TrendingPost.objects.get(post=TrendingTests.quiet_post)
+        self.assertGreater(after.activity, before.activity)
+
+    def test_followers_boost_score(self):
+        """Подписчики автора повышают рейтинг его постов."""
+        compute_trending()
+        before = TrendingPost.objects.get(post=TrendingTests.quiet_post)
+        Follow.objects.create(
+            user=TrendingTests.reader,
+            author=TrendingTests.user
+        )
+        TrendingPost.objects.all().delete()
+        compute_trending()
+        after = TrendingPost.objects.get(post=TrendingTests.quiet_post)
+        self.assertGreater(after.score, before.score)
+
+    def test_old_follows_do_not_boost(self):
+        """Подписки старше окна рейтинга не повышают рейтинг."""
+        follow = Follow.objects.create(
+            user=TrendingTests.reader,
+            author=TrendingTests.user
+        )
+        Follow.objects.filter(pk=follow.pk).update(
+            created=timezone.now() - timedelta(
+                hours=settings.TRENDING_WINDOW_HOURS + 1
+            )
+        )
+        compute_trending()
+        trending = TrendingPost.objects.get(post=TrendingTests.quiet_post)
+        self.assertAlmostEqual(trending.score, trending.activity)
+
+    def test_views_of_unranked_post_count(self):
+        """Прирост просмотров старого поста вне рейтинга учитывается."""
+        old_post = Post.objects.create(
+            author=TrendingTests.user, text='Старый пост'
+        )
+        Post.objects.filter(pk=old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        PostStats.objects.create(post=old_post, views=5, trending_views=5)
+        compute_trending()
+        self.assertFalse(
+            TrendingPost.objects.filter(post=old_post).exists()
+        )
+
+        PostStats.objects.filter(post=old_post).update(
+            views=105, updated=timezone.now()
+        )
+        compute_trending()
+        trending = TrendingPost.objects.get(post=old_post)
+        self.assertAlmostEqual(
+            trending.activity, 100 * settings.TRENDING_WEIGHTS['view']
+        )
+        self.assertEqual(
+            PostStats.objects.get(post=old_post).trending_views, 105
+        )
+
+    def test_trending_page_uses_keyset_pagination(self):
+        """Страница популярного листается по месту в рейтинге."""
+        compute_trending()
+        client = Client()
+        with self.settings(POSTS_COUNT_PER_PAGE=1):
+            response = client.get(reverse('posts:trending'))
+            page_obj = response.context['page_obj']
+            self.assertEqual(
+                page_obj[0].post, TrendingTests.hot_post
+            )
+            self.assertEqual(page_obj.next_cursor, 1)
+
+            response = client.get(
+                reverse('posts:trending') + f'?after={page_obj.next_cursor}'
+            )
+            page_obj = response.context['page_obj']
+            self.assertEqual(page_obj[0].post, TrendingTests.quiet_post)
+            self.assertFalse(page_obj.has_next())
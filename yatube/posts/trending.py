@@ -0,0 +1,204 @@
+"""Расчёт популярных постов.
+
+Рейтинг поста складывается из событий (публикация, комментарии,
+просмотры), вклад каждого из которых экспоненциально затухает со
+временем. Экспонента позволяет считать инкрементально: сохранённая
+активность домножается на общий множитель затухания, а заново читаются
+только события, случившиеся после прошлого запуска.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, PostStats, TrendingPost
+
+# у SQLite ограничено число параметров в одном запросе
+QUERY_CHUNK_SIZE: int = 900
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), QUERY_CHUNK_SIZE):
+        yield values[start:start + QUERY_CHUNK_SIZE]
+
+
+def _timestamps(dates) -> np.ndarray:
+    return np.fromiter(
+        (date.timestamp() for date in dates),
+        dtype=np.float64,
+        count=len(dates)
+    )
+
+
+def _decay(timestamps, now_ts: float, rate: float) -> np.ndarray:
+    return np.exp(-rate * (now_ts - timestamps))
+
+
+def _follower_boost(post_ids: np.ndarray, since, now,
+                    rate: float) -> np.ndarray:
+    """Множитель рейтинга по свежим подпискам на автора поста.
+
+    Подписка, как и остальные события, затухает со временем: автор
+    с давней большой аудиторией не обгоняет того, на кого подписываются
+    прямо сейчас. Учитываются подписки из окна рейтинга since.
+    """
+    authors = {}
+    for chunk in _chunks(post_ids.tolist()):
+        authors.update(
+            Post.objects.filter(pk__in=chunk).values_list('pk', 'author')
+        )
+    recent = {}
+    now_ts = now.timestamp()
+    for chunk in _chunks(set(authors.values())):
+        follows = list(Follow.objects.filter(
+            author__in=chunk, created__gt=since, created__lte=now
+        ).values_list('author', 'created'))
+        if not follows:
+            continue
+        decayed = _decay(
+            _timestamps([row[1] for row in follows]), now_ts, rate
+        )
+        for (author_id, _), weight in zip(follows, decayed.tolist()):
+            recent[author_id] = recent.get(author_id, 0.0) + weight
+    counts = np.fromiter(
+        (recent.get(authors.get(post_id), 0.0) for post_id in post_ids),
+        dtype=np.float64,
+        count=len(post_ids)
+    )
+    exists = np.fromiter(
+        (post_id in authors for post_id in post_ids),
+        dtype=bool,
+        count=len(post_ids)
+    )
+    boost = 1 + settings.TRENDING_WEIGHTS['followers'] * np.log1p(counts)
+    # удалённые посты выпадают из рейтинга
+    return np.where(exists, boost, 0.0)
+
+
+def _event_contributions(since, now, rate):
+    """Вклад публикаций и комментариев, случившихся после since."""
+    now_ts = now.timestamp()
+    weights = settings.TRENDING_WEIGHTS
+    new_posts = list(Post.objects.filter(
+        pub_date__gt=since, pub_date__lte=now
+    ).values_list('pk', 'pub_date'))
+    comments = list(Comment.objects.filter(
+        created__gt=since, created__lte=now, post__isnull=False
+    ).values_list('post_id', 'created'))
+
+    for events, weight in (
+        (new_posts, weights['post']),
+        (comments, weights['comment']),
+    ):
+        if events:
+            yield (
+                np.array([row[0] for row in events], dtype=np.int64),
+                weight * _decay(
+                    _timestamps([row[1] for row in events]), now_ts, rate
+                )
+            )
+
+
+def _view_contributions(since, counted: list):
+    """Вклад просмотров, перенесённых в базу после since.
+
+    У просмотров нет времени, поэтому прирост с прошлого запуска
+    считается случившимся сейчас. Прирост считается от trending_views
+    каждой строки PostStats, так что учитываются и посты, которых ещё
+    нет в рейтинге. Строки с новым учтённым значением добавляются
+    в counted и сохраняются вместе с рейтингом. Запоминается
+    прочитанное значение, а не текущее: просмотры, перенесённые во
+    время расчёта, достанутся следующему запуску.
+    """
+    stats = list(PostStats.objects.filter(updated__gt=since).only(
+        'post_id', 'views', 'trending_views'
+    ))
+    growing = [item for item in stats if item.views > item.trending_views]
+    if not growing:
+        return
+    post_ids = np.array([item.post_id for item in growing], dtype=np.int64)
+    deltas = np.array(
+        [item.views - item.trending_views for item in growing],
+        dtype=np.float64
+    )
+    for item in growing:
+        item.trending_views = item.views
+    counted.extend(growing)
+    yield post_ids, settings.TRENDING_WEIGHTS['view'] * deltas
+
+
+def compute_trending(now=None) -> int:
+    """Пересчитывает рейтинг и сохраняет упорядоченный список постов.
+
+    Возвращает число постов в рейтинге.
+    """
+    now = now or timezone.now()
+    rate = math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+    window_start = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+
+    state = list(TrendingPost.objects.values_list(
+        'post_id', 'activity', 'computed'
+    ))
+    last_run = max((row[2] for row in state), default=None)
+    since = window_start
+    if last_run is not None and last_run > window_start:
+        since = last_run
+
+    parts = []
+    counted = []
+    if state:
+        parts.append((
+            np.array([row[0] for row in state], dtype=np.int64),
+            np.array([row[1] for row in state], dtype=np.float64)
+            * math.exp(-rate * (now - last_run).total_seconds())
+        ))
+    parts.extend(_event_contributions(since, now, rate))
+    parts.extend(_view_contributions(since, counted))
+    if not parts:
+        return _save_ranking([], [], [], counted, now)
+
+    post_ids, inverse = np.unique(
+        np.concatenate([ids for ids, _ in parts]), return_inverse=True
+    )
+    activity = np.bincount(
+        inverse,
+        weights=np.concatenate([values for _, values in parts]),
+        minlength=len(post_ids)
+    )
+    keep = activity >= settings.TRENDING_MIN_ACTIVITY
+    post_ids, activity = post_ids[keep], activity[keep]
+
+    scores = activity * _follower_boost(post_ids, window_start, now, rate)
+    # по убыванию рейтинга, при равенстве — новые посты выше
+    order = np.lexsort((-post_ids, -scores))
+    order = order[scores[order] > 0][:settings.TRENDING_SIZE]
+
+    return _save_ranking(
+        post_ids[order], activity[order], scores[order], counted, now
+    )
+
+
+def _save_ranking(post_ids, activity, scores, counted, now) -> int:
+    ranking = [
+        TrendingPost(
+            post_id=int(post_id),
+            activity=float(post_activity),
+            score=float(score),
+            rank=rank,
+            computed=now
+        )
+        for rank, (post_id, post_activity, score) in enumerate(
+            zip(post_ids, activity, scores), start=1
+        )
+    ]
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(ranking, batch_size=500)
+        PostStats.objects.bulk_update(
+            counted, ['trending_views'], batch_size=QUERY_CHUNK_SIZE
+        )
+    return len(ranking)
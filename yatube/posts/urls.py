@@ -6,8 +6,15 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<slug:username>/', views.profile, name='profile'),
+    path('tags/<str:tag>/', views.tag_posts, name='tag_posts'),
+    path(
+        'profile/<slug:username>/mentions/',
+        views.user_mentions,
+        name='user_mentions'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -17,6 +24,44 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('fragments/', views.index_fragment, name='index_fragment'),
+    path(
+        'fragments/group/<slug:slug>/',
+        views.group_fragment,
+        name='group_fragment'
+    ),
+    path(
+        'fragments/profile/<slug:username>/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
+    path(
+        'fragments/follow/',
+        views.follow_fragment,
+        name='follow_fragment'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.month_archive,
+        name='month_archive'
+    ),
+    path(
+        'archive/group/<slug:slug>/<int:year>/<int:month>/',
+        views.group_month_archive,
+        name='group_month_archive'
+    ),
+    path(
+        'archive/profile/<slug:username>/<int:year>/<int:month>/',
+        views.profile_month_archive,
+        name='profile_month_archive'
+    ),
+    path('events/', views.index_events, name='index_events'),
+    path(
+        'events/group/<slug:slug>/',
+        views.group_events,
+        name='group_events'
+    ),
+    path('events/follow/', views.follow_events, name='follow_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,24 +1,138 @@
+from itertools import chain
+
+from core.events import event_stream_response
+from core.pagination import keyset_paginate, parse_cursor
+from core.streaming import stream_template
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
+from .archive import (ArchivePaginator, archive_author_count_key,
+                      archive_count_key, author_post_count,
+                      continue_in_archive, get_post_or_404, is_archived)
+from .counters import get_views, register_view
+from .counting import author_count_key, count_key
+from .events import ALL_CHANNEL, author_channel, broker, group_channel
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import (ArchivedPost, Follow, Group, Hashtag, Mention, Post,
+                     TrendingPost)
+from .months import (SITE_SCOPE, author_scope, group_scope, month_counts,
+                     month_range)
+from .recommendations import discard_recommendation, get_recommendations
+from .similarity import related_posts
 
 User = get_user_model()
 
+FRAGMENT_KEY: str = 'posts:fragment:{}:{}'
+
+
+def _next_fragment_url(page_obj, url):
+    """Адрес фрагмента, который продолжает ленту после page_obj."""
+    # счётчик постов приблизительный: страница может оказаться пустой
+    if not page_obj.has_next() or not len(page_obj):
+        return None
+    return f'{url}?after={page_obj[-1].pk}'
+
+
+def _feed_fragment(request, feed, queryset, archive, url, context=None,
+                   public=True):
+    """Следующие посты ленты без обвязки страницы.
+
+    Фрагмент кешируется по курсору: страница после заданного поста
+    не меняется, когда в ленту добавляются новые посты. Адрес
+    следующего фрагмента передаётся в заголовке X-Next-Page. Когда
+    посты в queryset кончаются, лента продолжается из archive.
+    """
+    cursor = parse_cursor(request.GET.get('after'))
+    key = FRAGMENT_KEY.format(feed, cursor)
+    fragment = cache.get(key)
+    if fragment is None:
+        page_obj = continue_in_archive(
+            keyset_paginate(
+                queryset, 'pk', cursor, settings.POSTS_COUNT_PER_PAGE,
+                descending=True
+            ),
+            archive,
+            settings.POSTS_COUNT_PER_PAGE
+        )
+        html = render_to_string(
+            'posts/includes/feed_fragment.html',
+            dict(context or {}, page_obj=page_obj)
+        )
+        next_url = ''
+        if page_obj.has_next():
+            next_url = f'{url}?after={page_obj.next_cursor}'
+        fragment = (html, next_url)
+        cache.set(key, fragment, settings.FEED_FRAGMENT_CACHE_TTL)
+
+    html, next_url = fragment
+    response = HttpResponse(html)
+    response['X-Next-Page'] = next_url
+    if public:
+        patch_cache_control(
+            response, public=True, max_age=settings.FEED_FRAGMENT_CACHE_TTL
+        )
+    else:
+        patch_cache_control(response, private=True)
+    return response
+
 
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    paginator = Paginator(post_list, settings.POSTS_COUNT_PER_PAGE)
+    paginator = ArchivePaginator(
+        Post.objects.select_related('author', 'group'),
+        ArchivedPost.objects.select_related('author', 'group'),
+        settings.POSTS_COUNT_PER_PAGE,
+        count_key(),
+        archive_count_key()
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return render(
         request,
         'posts/index.html',
+        {
+            'page_obj': page_obj,
+            'next_fragment_url': _next_fragment_url(
+                page_obj, reverse('posts:index_fragment')
+            ),
+        }
+    )
+
+
+def index_fragment(request):
+    return _feed_fragment(
+        request,
+        'index',
+        Post.objects.select_related('author', 'group'),
+        ArchivedPost.objects.select_related('author', 'group'),
+        reverse('posts:index_fragment')
+    )
+
+
+def index_events(request):
+    return event_stream_response(broker, [ALL_CHANNEL], 'posts')
+
+
+def trending(request):
+    page_obj = keyset_paginate(
+        TrendingPost.objects.select_related('post__author', 'post__group'),
+        'rank',
+        parse_cursor(request.GET.get('after')),
+        settings.POSTS_COUNT_PER_PAGE,
+        number=parse_cursor(request.GET.get('page'))
+    )
+
+    return render(
+        request,
+        'posts/trending.html',
         {'page_obj': page_obj}
     )
 
@@ -26,23 +140,55 @@ def index(request):
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
 
-    post_list = group.posts.select_related('author')
-    paginator = Paginator(post_list, settings.POSTS_COUNT_PER_PAGE)
+    paginator = ArchivePaginator(
+        group.posts.select_related('author'),
+        group.archived_posts.select_related('author'),
+        settings.POSTS_COUNT_PER_PAGE,
+        count_key(group.pk),
+        archive_count_key(group.pk)
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return render(
         request,
         'posts/group_list.html',
-        {'group': group, 'page_obj': page_obj}
+        {
+            'group': group,
+            'page_obj': page_obj,
+            'next_fragment_url': _next_fragment_url(
+                page_obj, reverse('posts:group_fragment', args=[slug])
+            ),
+        }
+    )
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed_fragment(
+        request,
+        f'group:{group.pk}',
+        group.posts.select_related('author'),
+        group.archived_posts.select_related('author'),
+        reverse('posts:group_fragment', args=[slug]),
+        {'group': group}
     )
 
 
+def group_events(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return event_stream_response(broker, [group_channel(group.pk)], 'posts')
+
+
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.select_related('group')
-    post_count = post_list.count
-    paginator = Paginator(post_list, settings.POSTS_COUNT_PER_PAGE)
+    paginator = ArchivePaginator(
+        user.posts.select_related('group'),
+        user.archived_posts.select_related('group'),
+        settings.POSTS_COUNT_PER_PAGE,
+        author_count_key(user.pk),
+        archive_author_count_key(user.pk)
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
@@ -56,40 +202,186 @@ def profile(request, username):
     context = {
         'author': user,
         'page_obj': page_obj,
-        'post_count': post_count,
-        'following': following
+        'post_count': paginator.count,
+        'following': following,
+        'recommendations': get_recommendations(request.user),
+        'next_fragment_url': _next_fragment_url(
+            page_obj, reverse('posts:profile_fragment', args=[username])
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def profile_fragment(request, username):
+    user = get_object_or_404(User, username=username)
+    return _feed_fragment(
+        request,
+        f'profile:{user.pk}',
+        user.posts.select_related('author', 'group'),
+        user.archived_posts.select_related('author', 'group'),
+        reverse('posts:profile_fragment', args=[username])
+    )
+
+
+def _references_page(request, references):
+    """Страница ленты тега или упоминаний: диапазон индекса по pub_date."""
+    paginator = Paginator(
+        references.select_related(
+            'post__author', 'post__group',
+            'archived_post__author', 'archived_post__group'
+        ),
+        settings.POSTS_COUNT_PER_PAGE
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def tag_posts(request, tag):
+    tag = tag.lower()
+    return render(
+        request,
+        'posts/references.html',
+        {
+            'title': f'#{tag}',
+            'page_obj': _references_page(
+                request, Hashtag.objects.filter(tag=tag)
+            ),
+        }
+    )
+
+
+def user_mentions(request, username):
+    user = get_object_or_404(User, username=username)
+    return render(
+        request,
+        'posts/references.html',
+        {
+            'title': f'Упоминания @{user.username}',
+            'page_obj': _references_page(
+                request, Mention.objects.filter(user=user)
+            ),
+        }
+    )
+
+
+def _month_archive(request, year, month, scope, posts, archived_posts,
+                   url_name, url_args=(), context=None):
+    """Посты за месяц: выборка по диапазону pub_date с индексом.
+
+    Число постов и список месяцев берутся из MonthlyPostCount.
+    """
+    try:
+        start, end = month_range(year, month)
+    except ValueError:
+        raise Http404('Нет такого месяца')
+
+    months = month_counts(scope)
+    for item in months:
+        item.url = reverse(
+            url_name, args=[*url_args, item.month.year, item.month.month]
+        )
+    paginator = ArchivePaginator(
+        posts.filter(pub_date__gte=start, pub_date__lt=end),
+        archived_posts.filter(pub_date__gte=start, pub_date__lt=end),
+        settings.POSTS_COUNT_PER_PAGE,
+        total=next(
+            (item.count for item in months if item.month == start.date()),
+            0
+        )
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(
+        request,
+        'posts/archive.html',
+        dict(
+            context or {},
+            page_obj=page_obj,
+            months=months,
+            month=start,
+        )
+    )
+
+
+def month_archive(request, year, month):
+    return _month_archive(
+        request, year, month, SITE_SCOPE,
+        Post.objects.select_related('author', 'group'),
+        ArchivedPost.objects.select_related('author', 'group'),
+        'posts:month_archive'
+    )
+
+
+def group_month_archive(request, slug, year, month):
+    group = get_object_or_404(Group, slug=slug)
+    return _month_archive(
+        request, year, month, group_scope(group.pk),
+        group.posts.select_related('author'),
+        group.archived_posts.select_related('author'),
+        'posts:group_month_archive', [slug],
+        {'group': group}
+    )
+
+
+def profile_month_archive(request, username, year, month):
+    author = get_object_or_404(User, username=username)
+    return _month_archive(
+        request, year, month, author_scope(author.pk),
+        author.posts.select_related('author', 'group'),
+        author.archived_posts.select_related('author', 'group'),
+        'posts:profile_month_archive', [username],
+        {'author': author}
+    )
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post_or_404(post_id)
+    archived = is_archived(post)
     comments = post.comments.select_related('author')
 
     form = CommentForm(request.POST or None)
     author = post.author
 
-    if request.user == author:
+    # архивный пост только для чтения
+    if request.user == author and not archived:
         is_edit = True
     else:
         is_edit = False
 
-    post_count = Post.objects.filter(author=author).count()
+    post_count = author_post_count(author.pk)
+    if archived:
+        views = post.views
+    else:
+        register_view(post.pk)
+        views = get_views(post.pk)
     context = {
         'username': author.username,
         'full_username': author.get_full_name(),
         'post': post,
         'post_count': post_count,
+        'views': views,
+        'related_posts': [] if archived else related_posts(post),
         'is_edit': is_edit,
+        'archived': archived,
         'form': form,
-        'comments': comments
     }
+    # на один комментарий больше порога: без отдельного COUNT ясно,
+    # нужна ли потоковая выдача, а прочитанное не запрашивается заново
+    threshold = settings.POST_DETAIL_STREAMING_THRESHOLD
+    context['comments'] = list(comments[:threshold + 1])
+    if len(context['comments']) > threshold:
+        return stream_template(
+            request,
+            'posts/post_detail.html',
+            context,
+            chain(context['comments'], comments[threshold + 1:].iterator()),
+            'posts/includes/comment.html',
+            'comment'
+        )
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     is_edit = False
 
     if not request.method == 'POST':
@@ -160,39 +452,79 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    user = get_object_or_404(User, username=request.user)
-
-    post_list = Post.objects.filter(
-        author__following__user=user
-    ).select_related('author', 'group')
-    paginator = Paginator(post_list, settings.POSTS_COUNT_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # ленту подписок листают по курсору: число постов не считается
+    page_obj = continue_in_archive(
+        keyset_paginate(
+            Post.objects.filter(
+                author__following__user=request.user
+            ).select_related('author', 'group'),
+            'pk',
+            parse_cursor(request.GET.get('after')),
+            settings.POSTS_COUNT_PER_PAGE,
+            descending=True,
+            number=parse_cursor(request.GET.get('page'))
+        ),
+        ArchivedPost.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group'),
+        settings.POSTS_COUNT_PER_PAGE
+    )
 
     return render(
         request,
         'posts/follow.html',
-        {'page_obj': page_obj}
+        {
+            'page_obj': page_obj,
+            'recommendations': get_recommendations(request.user),
+            'next_fragment_url': _next_fragment_url(
+                page_obj, reverse('posts:follow_fragment')
+            ),
+        }
+    )
+
+
+@login_required
+def follow_fragment(request):
+    return _feed_fragment(
+        request,
+        f'follow:{request.user.pk}',
+        Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group'),
+        ArchivedPost.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group'),
+        reverse('posts:follow_fragment'),
+        public=False
+    )
+
+
+@login_required
+def follow_events(request):
+    authors = Follow.objects.filter(
+        user=request.user
+    ).values_list('author_id', flat=True)
+    return event_stream_response(
+        broker, [author_channel(author_id) for author_id in authors], 'posts'
     )
 
 
 @login_required
 def profile_follow(request, username):
-    user = get_object_or_404(User, username=request.user)
     author = get_object_or_404(User, username=username)
 
     Follow.objects.create(
-        user=user,
+        user=request.user,
         author=author
     )
+    discard_recommendation(request.user, author)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user = get_object_or_404(User, username=request.user)
     author = get_object_or_404(User, username=username)
 
-    follow = get_object_or_404(Follow, user=user, author=author)
+    follow = get_object_or_404(Follow, user=request.user, author=author)
     follow.delete()
     return redirect('posts:profile', username)
@@ -0,0 +1,97 @@
+// Бесконечная прокрутка лент: когда читатель доходит до конца ленты,
+// следующие посты подгружаются фрагментом без обвязки страницы.
+// Без JavaScript остаётся обычный пагинатор.
+// На первой странице ленты поток событий сообщает о новых постах.
+(function () {
+  'use strict';
+
+  function enhance(feed) {
+    var nextUrl = feed.dataset.nextUrl;
+    if (!nextUrl || !('IntersectionObserver' in window)) {
+      return;
+    }
+    var pagination = feed.parentNode.querySelector('.pagination');
+    if (pagination) {
+      pagination.closest('nav').hidden = true;
+    }
+
+    var sentinel = document.createElement('div');
+    feed.after(sentinel);
+    var loading = false;
+
+    var observer = new IntersectionObserver(function (entries) {
+      if (!entries[0].isIntersecting || loading) {
+        return;
+      }
+      loading = true;
+      fetch(nextUrl, {credentials: 'same-origin'})
+        .then(function (response) {
+          if (!response.ok) {
+            throw new Error(response.statusText);
+          }
+          nextUrl = response.headers.get('X-Next-Page');
+          return response.text();
+        })
+        .then(function (html) {
+          feed.insertAdjacentHTML('beforeend', html);
+          loading = false;
+          if (!nextUrl) {
+            observer.disconnect();
+          }
+        })
+        .catch(function () {
+          // при ошибке возвращаем пагинатор
+          observer.disconnect();
+          if (pagination) {
+            pagination.closest('nav').hidden = false;
+          }
+        });
+    }, {rootMargin: '600px'});
+    observer.observe(sentinel);
+  }
+
+  function pluralize(count) {
+    var mod10 = count % 10;
+    var mod100 = count % 100;
+    if (mod10 === 1 && mod100 !== 11) {
+      return count + ' новый пост';
+    }
+    if (mod10 >= 2 && mod10 <= 4 && (mod100 < 12 || mod100 > 14)) {
+      return count + ' новых поста';
+    }
+    return count + ' новых постов';
+  }
+
+  function listen(feed) {
+    var eventsUrl = feed.dataset.eventsUrl;
+    var banner = feed.parentNode.querySelector('[data-new-posts]');
+    var page = new URLSearchParams(window.location.search).get('page');
+    if (!eventsUrl || !banner || !('EventSource' in window)
+        || (page && page !== '1')) {
+      return;
+    }
+    var source = new EventSource(eventsUrl);
+    source.addEventListener('posts', function (event) {
+      var total = Number(banner.dataset.count || 0)
+        + JSON.parse(event.data).count;
+      banner.dataset.count = total;
+      banner.textContent = pluralize(total) + ' — показать';
+      banner.hidden = false;
+    });
+    source.onerror = function () {
+      // сервер перегружен: EventSource сам не переподключится
+      if (source.readyState === EventSource.CLOSED) {
+        setTimeout(function () {
+          listen(feed);
+        }, 30000);
+      }
+    };
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-feed]').forEach(function (feed) {
+      enhance(feed);
+      listen(feed);
+    });
+  });
+})();
@@ -1 +1,24 @@
-# Register your models here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from posts.deletion import enqueue_deletion
+
+User = get_user_model()
+
+
+class ChunkedDeletionUserAdmin(UserAdmin):
+    actions = ('delete_in_chunks',)
+
+    def delete_in_chunks(self, request, queryset):
+        for user in queryset:
+            enqueue_deletion(user)
+        self.message_user(
+            request,
+            f'Пользователей в очереди на удаление: {len(queryset)}. Их '
+            f'удалит команда delete_in_chunks --queue'
+        )
+    delete_in_chunks.short_description = 'Удалить порциями'
+
+
+admin.site.unregister(User)
+admin.site.register(User, ChunkedDeletionUserAdmin)
@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'g3i-6iei7mc#d4c!08=#7(ni#m31u4w%9-51&_sb0xud%ply^t'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'notifications.apps.NotificationsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,6 +52,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,18 +66,25 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -89,9 +100,28 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: копии db.sqlite3, которые обновляет
+# команда sync_replicas. Их число задаёт DJANGO_DB_REPLICAS.
+# Соединения с репликами не переиспользуются: новое соединение
+# открывает свежую копию файла
+DATABASE_REPLICAS: list = []
+for number in range(1, int(os.environ.get('DJANGO_DB_REPLICAS', '0')) + 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'file:{}?mode=ro'.format(
+            os.path.join(BASE_DIR, f'db.{alias}.sqlite3')
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,6 +163,10 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -142,15 +176,216 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Дайджесты уходят через PooledEmailBackend: одно соединение бэкенда
+# EMAIL_POOL_BACKEND на много писем, не больше EMAIL_POOL_MAX_MESSAGES.
+# Для проверки с локальным SMTP-сервером (python -m smtpd -n -c
+# DebuggingServer localhost:1025) подойдёт
+# EMAIL_POOL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# с EMAIL_HOST = 'localhost' и EMAIL_PORT = 1025
+EMAIL_POOL_BACKEND: str = EMAIL_BACKEND
+EMAIL_POOL_MAX_MESSAGES: int = 100
+DIGEST_EMAIL_BACKEND: str = 'core.mail.PooledEmailBackend'
+DIGEST_BATCH_SIZE: int = 200
+DIGEST_MAX_RATE: float = 10
+DIGEST_MAX_POSTS: int = 20
+# адрес сайта для ссылок в письмах
+SITE_URL: str = os.environ.get('DJANGO_SITE_URL', 'http://127.0.0.1:8000')
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий для всех процессов кеш — memcached по адресам из DJANGO_MEMCACHED
+# через запятую, например 127.0.0.1:11211. Без него у каждого процесса
+# свой LocMemCache, и в кеше нельзя держать то, что должны видеть
+# другие процессы: сессии, пользователей, результаты команд
+MEMCACHED_LOCATION: str = os.environ.get('DJANGO_MEMCACHED', '')
+SHARED_CACHE: bool = bool(MEMCACHED_LOCATION)
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# С общим кешем сессии читаются из кеша и пишутся в кеш и базу, а
+# пользователь запроса берётся из кеша и живёт там не дольше
+# USER_CACHE_TTL секунд. С кешем процесса выход или смена пароля в
+# одном процессе не были бы видны остальным, поэтому тогда остаются
+# сессии в базе и обычный AuthenticationMiddleware
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+USER_CACHE_TTL: int = 15 * 60
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    MIDDLEWARE[MIDDLEWARE.index(
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+    )] = 'core.middleware.CachedAuthenticationMiddleware'
 
 POSTS_COUNT_PER_PAGE: int = 10
+
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATION_WINDOW: int = 2
+
+# Счётчики постов в лентах: не старше POSTS_COUNT_TTL секунд,
+# ленты до POSTS_EXACT_COUNT_LIMIT постов считаются точно
+POSTS_COUNT_TTL: int = 10 * 60
+POSTS_EXACT_COUNT_LIMIT: int = 1000
+
+# Посты старше стольких дней команда archive_posts переносит в архив
+POSTS_ARCHIVE_AFTER_DAYS: int = 90
+
+# Фрагменты лент для бесконечной прокрутки кешируются по курсору
+FEED_FRAGMENT_CACHE_TTL: int = 60
+
+# Уведомления о новых постах (server-sent events): соединений на
+# процесс, интервал пустых сообщений и время жизни потока в секундах,
+# через EVENTS_RETRY секунд браузер переподключается
+EVENTS_MAX_CONNECTIONS: int = 100
+EVENTS_HEARTBEAT: int = 15
+EVENTS_STREAM_LIFETIME: int = 5 * 60
+EVENTS_RETRY: int = 5
+
+# Уведомления подписчикам вставляет команда fan_out_notifications
+# пачками по NOTIFICATIONS_BATCH_SIZE строк, с --loop — раз в
+# NOTIFICATIONS_FAN_OUT_INTERVAL секунд. Число непрочитанных живёт в
+# кеше не дольше NOTIFICATIONS_UNREAD_TTL секунд
+NOTIFICATIONS_BATCH_SIZE: int = 500
+NOTIFICATIONS_FAN_OUT_INTERVAL: int = 5
+NOTIFICATIONS_UNREAD_TTL: int = 60
+NOTIFICATIONS_PER_PAGE: int = 20
+
+# С реплик читаются модели этих приложений. Клиент, который только
+# что писал, REPLICA_PIN_SECONDS секунд читает основную базу: это
+# должно быть дольше, чем REPLICA_SYNC_INTERVAL между обновлениями
+REPLICATED_APPS: tuple = ('posts',)
+REPLICA_PIN_COOKIE: str = 'replica_pin'
+REPLICA_PIN_SECONDS: int = 30
+REPLICA_SYNC_INTERVAL: int = 10
+
+# PRAGMA для каждого нового соединения SQLite; mmap_size в байтах,
+# отрицательный cache_size — в килобайтах, busy_timeout — в мс.
+# Раз в SQLITE_OPTIMIZE_INTERVAL секунд соединение обновляет статистику
+SQLITE_PRAGMAS: dict = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+SQLITE_OPTIMIZE_INTERVAL: int = 60 * 60
+
+# Просмотры постов копятся в кеше и переносятся в базу пачкой:
+# раз в POST_VIEWS_FLUSH_INTERVAL секунд или когда непереданные
+# просмотры набрались у POST_VIEWS_FLUSH_THRESHOLD постов
+POST_VIEWS_FLUSH_INTERVAL: int = 60
+POST_VIEWS_FLUSH_THRESHOLD: int = 100
+
+# Популярные посты пересчитываются командой compute_trending по расписанию
+TRENDING_HALF_LIFE_HOURS: int = 24
+TRENDING_WINDOW_HOURS: int = 72
+TRENDING_SIZE: int = 1000
+TRENDING_MIN_ACTIVITY: float = 0.01
+TRENDING_WEIGHTS: dict = {
+    'post': 1.0,
+    'comment': 3.0,
+    'view': 0.1,
+    'followers': 0.5,
+}
+
+# Рекомендации авторов пересчитываются командой compute_recommendations
+RECOMMENDATIONS_COUNT: int = 5
+RECOMMENDATIONS_WEIGHTS: dict = {
+    'friends_of_friends': 2.0,
+    'shared_groups': 1.0,
+}
+
+# Индекс похожих постов обновляется командой update_similarity_index
+SIMILARITY_INDEX_DIR = os.path.join(BASE_DIR, 'indexes', 'similarity')
+RELATED_POSTS_COUNT: int = 5
+RELATED_POSTS_CACHE_TTL: int = 60 * 60
+
+# Поиск почти одинаковых постов: короткие тексты не проверяются,
+# дубликатом считается пост с оценкой сходства не ниже порога.
+# Страница дубликатов в админке проверяет POSTS_DUPLICATE_SCAN_SIZE
+# последних постов
+POSTS_DUPLICATE_MIN_SHINGLES: int = 8
+POSTS_DUPLICATE_THRESHOLD: float = 0.8
+POSTS_DUPLICATE_SCAN_SIZE: int = 1000
+
+# Списки админки не считают большие таблицы целиком
+ADMIN_COUNT_CACHE_TTL: int = 5 * 60
+ADMIN_COUNT_LIMIT: int = 1000
+# Список групп для выпадающих списков админки. Без общего кеша сигнал
+# сбрасывает его только в своём процессе, поэтому в остальных он живёт
+# не дольше GROUP_CHOICES_TTL секунд
+GROUP_CHOICES_TTL: int = 30
+
+# Удаление пользователей и групп порциями: размер порции и пауза
+# между транзакциями, чтобы не держать блокировку записи SQLite
+DELETION_CHUNK_SIZE: int = 500
+DELETION_PAUSE: float = 0.05
+# как часто delete_in_chunks --queue --loop проверяет очередь, в секундах
+DELETION_QUEUE_INTERVAL: int = 10
+
+# Сборка мусора в картинках постов: доля ложных срабатываний фильтра
+# Блума, размер порции и возраст, моложе которого файлы не трогаются
+MEDIA_GC_ERROR_RATE: float = 0.001
+MEDIA_GC_BATCH_SIZE: int = 500
+MEDIA_GC_MIN_AGE: int = 60 * 60
+# Заявка загрузки на существующий файл картинки, чей пост так и не
+# сохранился, перестаёт защищать файл через столько секунд
+IMAGE_CLAIM_TIMEOUT: int = 60 * 60
+
+# Загрузки пишутся сразу во временный файл, а не в память
+FILE_UPLOAD_HANDLERS: list = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Картинки постов при загрузке уменьшаются и пересохраняются
+# без метаданных; для srcset нарезаются миниатюры этих ширин
+POST_IMAGE_MAX_SIZE: int = 2048
+POST_IMAGE_FORMAT: str = 'WEBP'
+POST_IMAGE_QUALITY: int = 80
+POST_IMAGE_RENDITIONS: tuple = (480, 960, 1440)
+# адреса миниатюр картинки кешируются одной записью; в локальном кеше
+# процесса запись живёт столько секунд, в общем — до удаления картинки
+POST_IMAGE_RENDITIONS_TTL: int = 24 * 60 * 60
+
+# Сборка статики: CSS проекта чистится по словам из этих шаблонов
+# (классы из SAFELIST добавляются скриптами и остаются всегда), файлы
+# без хеша в имени браузер кеширует на STATIC_MAX_AGE секунд
+STATIC_PURGE_PATTERNS: tuple = ('css/*.css',)
+STATIC_PURGE_TEMPLATE_DIRS: list = [TEMPLATES_DIR]
+STATIC_PURGE_SAFELIST: tuple = ('active', 'collapsing', 'fade', 'show')
+STATIC_MAX_AGE: int = 60 * 60
+
+# Сжатие ответов: уровни gzip и brotli, минимальный размер в байтах
+# и типы, которые уже сжаты
+COMPRESSION_GZIP_LEVEL: int = 6
+COMPRESSION_BROTLI_QUALITY: int = 5
+COMPRESSION_MIN_SIZE: int = 512
+COMPRESSION_SKIP_TYPES: tuple = (
+    'image/', 'video/', 'audio/', 'font/',
+    'application/gzip', 'application/zip', 'application/pdf',
+    'text/event-stream',
+)
+
+# Страница поста с большим числом комментариев отдаётся потоком,
+# комментарии рендерятся порциями по STREAMING_CHUNK_SIZE
+POST_DETAIL_STREAMING_THRESHOLD: int = 100
+STREAMING_CHUNK_SIZE: int = 50
+
+# Без DEBUG скомпилированные шаблоны кешируются и шаблоны проекта
+# компилируются при старте веб-сервера (yatube/wsgi.py), но не команд
+# manage.py; профиль рендеринга по умолчанию только в DEBUG
+TEMPLATE_WARMUP: bool = not DEBUG
+TEMPLATE_PROFILING: bool = DEBUG
@@ -13,6 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from core.views import template_profile
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
@@ -24,11 +25,22 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('about/', include('about.urls', namespace='about'))
+    path('about/', include('about.urls', namespace='about')),
+    path(
+        'notifications/',
+        include('notifications.urls', namespace='notifications')
+    ),
 ]
 
 handler404 = 'core.views.page_not_found'
 
+if settings.TEMPLATE_PROFILING:
+    urlpatterns += [
+        path(
+            'debug/templates/', template_profile, name='template_profile'
+        ),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# фоновые задачи и прогрев шаблонов нужны только процессу
+# веб-сервера, а не командам вроде migrate или задачам cron
+from core.warmup import warm_up_templates  # noqa: E402
+from django.conf import settings  # noqa: E402
+from posts.counters import start_flusher  # noqa: E402
+
+start_flusher()
+if settings.TEMPLATE_WARMUP:
+    warm_up_templates()